@@ -8,7 +8,7 @@ from dotenv import load_dotenv
 from datetime import timedelta
 import os
 
-from .extensions import db, migrate
+from .extensions import db, migrate, cache, two_factor_store, mail_queue, password_hasher, user_cache
 
 # Import des namespaces
 from app.routes.places import api as PLACES_NS
@@ -17,6 +17,9 @@ from app.routes.reservations import api as RESERVATIONS_NS
 from app.routes.reviews import api as REVIEWS_NS
 from app.routes.users import api as USERS_NS
 from app.routes.auth import api as AUTH_NS
+from app.routes.cache import api as CACHE_NS
+from app.routes.analytics import api as ANALYTICS_NS
+from app.routes.mail import api as MAIL_NS
 
 # Charger les variables d'environnement
 load_dotenv()
@@ -28,15 +31,23 @@ def create_app():
     app.config.from_object('config.Config')
     app.config['JWT_SECRET_KEY'] = os.getenv('JWT_SECRET_KEY', app.config.get('SECRET_KEY'))
     app.config['JWT_ACCESS_TOKEN_EXPIRES'] = timedelta(hours=1)
+    # Sans cela flask-restx répond 500 aux erreurs JWT (jeton absent,
+    # utilisateur supprimé) au lieu de laisser Flask-JWT-Extended répondre 401
+    app.config['PROPAGATE_EXCEPTIONS'] = True
 
     # EXTENSIONS
     db.init_app(app)
     migrate.init_app(app, db)
+    cache.init_app(app)
+    two_factor_store.init_app(app)
+    mail_queue.init_app(app)
+    password_hasher.init_app(app)
     jwt = JWTManager(app)
+    user_cache.init_app(app, jwt)
     mail = Mail(app)
 
-    # CORS pour développement React
-    CORS(app)
+    # CORS pour développement React ; le curseur de pagination est lu par le client
+    CORS(app, expose_headers=["X-Next-Cursor"])
 
     # API REST
     api = Api(
@@ -53,6 +64,9 @@ def create_app():
     api.add_namespace(REVIEWS_NS, path='/api/reviews')
     api.add_namespace(USERS_NS, path='/api/users')
     api.add_namespace(AUTH_NS, path='/api/auth')
+    api.add_namespace(CACHE_NS, path='/api/cache')
+    api.add_namespace(ANALYTICS_NS, path='/api/analytics')
+    api.add_namespace(MAIL_NS, path='/api/mail')
 
     # ROUTES POUR FICHIERS UPLOADÉS
 
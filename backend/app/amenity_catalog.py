@@ -0,0 +1,119 @@
+# app/amenity_catalog.py
+"""
+Catalogue des équipements en mémoire, partagé par tout le processus.
+
+Les équipements sont peu nombreux et changent rarement : le catalogue est
+chargé en une requête et sert les recherches nom -> id et id -> équipement.
+Chaque écriture sur `amenities` incrémente la génération "amenities" (table
+`generations`, dans la même transaction) ; un worker compare sa génération
+à celle de la base au plus une fois par requête HTTP et recharge si besoin.
+"""
+import threading
+from collections import namedtuple
+
+from flask import g, has_request_context
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from app.extensions import db
+from app.models.amenity import Amenity
+from app.models.generation import read_generation
+
+GENERATION = "amenities"
+
+AmenityEntry = namedtuple("AmenityEntry", ["id", "name"])
+
+
+def _load(session):
+    """(par id, par nom) tels que vus par la transaction de `session`"""
+    entries = [AmenityEntry(row.id, row.name)
+               for row in session.execute(select(Amenity.id, Amenity.name))]
+    return {entry.id: entry for entry in entries}, {entry.name: entry for entry in entries}
+
+
+class AmenityCatalog:
+    """
+    Seul un chargement fait hors de toute écriture non validée sur les
+    équipements est publié au processus. Une session qui vient d'écrire
+    (invalidate(session)) lit sa propre copie jusqu'au commit, après quoi le
+    catalogue partagé est rechargé : des noms annulés par un rollback ne
+    sont jamais partagés.
+    """
+
+    def __init__(self):
+        self._by_id = {}
+        self._by_name = {}
+        self._generation = None
+        self._stale = True
+        self._lock = threading.Lock()
+        self.reloads = 0
+
+    def invalidate(self, session=None):
+        """
+        Force un rechargement à la prochaine lecture (écriture locale).
+        `session` : session dont la transaction a écrit sur `amenities`.
+        """
+        self._stale = True
+        if session is not None:
+            session.info["amenity_catalog_pending"] = True
+            session.info.pop("amenity_catalog_snapshot", None)
+
+    def _current(self):
+        """(par id, par nom) à jour pour la session courante"""
+        session = db.session()
+        if session.info.get("amenity_catalog_pending"):
+            snapshot = session.info.get("amenity_catalog_snapshot")
+            if snapshot is None:
+                snapshot = session.info["amenity_catalog_snapshot"] = _load(session)
+            return snapshot
+
+        if has_request_context() and g.get("amenity_catalog_checked") and not self._stale:
+            return self._by_id, self._by_name
+        generation = read_generation(session.connection(), GENERATION)
+        if self._stale or generation != self._generation:
+            with self._lock:
+                self._stale = False
+                self._by_id, self._by_name = _load(session)
+                self._generation = generation
+                self.reloads += 1
+        if has_request_context():
+            g.amenity_catalog_checked = True
+        return self._by_id, self._by_name
+
+    def get(self, amenity_id):
+        """AmenityEntry pour cet id, ou None"""
+        by_id, _ = self._current()
+        return by_id.get(amenity_id)
+
+    def get_by_name(self, name):
+        """AmenityEntry pour ce nom exact (déjà normalisé), ou None"""
+        _, by_name = self._current()
+        return by_name.get(name)
+
+    def ids_for(self, names):
+        """{nom: id} pour les noms connus du catalogue"""
+        _, by_name = self._current()
+        return {name: by_name[name].id for name in names if name in by_name}
+
+    def all(self):
+        by_id, _ = self._current()
+        return sorted(by_id.values(), key=lambda entry: entry.name)
+
+
+amenity_catalog = AmenityCatalog()
+
+
+def _publish_after_commit(session):
+    if session.info.pop("amenity_catalog_pending", None):
+        session.info.pop("amenity_catalog_snapshot", None)
+        amenity_catalog.invalidate()
+
+
+def _discard_after_rollback(session, previous_transaction):
+    session.info.pop("amenity_catalog_snapshot", None)
+    if not session.in_transaction():
+        session.info.pop("amenity_catalog_pending", None)
+
+
+event.listen(Session, "after_commit", _publish_after_commit)
+event.listen(Session, "after_soft_rollback", _discard_after_rollback)
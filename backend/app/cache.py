@@ -0,0 +1,269 @@
+# app/cache.py
+"""
+Cache de réponses en lecture (read-through) pour les GET publics.
+
+Chaque entrée est associée à des tags (ex. "place:12", "place-list"). Un
+tag a un numéro de version dans le backend : invalider un tag incrémente sa
+version, et une entrée enregistrée avec une ancienne version est ignorée.
+Le même mécanisme fonctionne donc en mémoire (un processus) et sur un
+backend partagé entre workers (Redis ou tout serveur compatible).
+
+Sous conditional_get, l'entrée retient aussi l'ETag (version en base) pour
+lequel elle a été produite : une entrée d'une autre version est ignorée,
+même si le cache local du processus n'a pas vu l'invalidation.
+
+Les tags sont invalidés après chaque commit qui écrit des places, avis,
+images ou équipements (voir _collect_tags), quel que soit le chemin
+d'écriture : facades ou routes.
+"""
+import json
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import g, request
+from flask_restx.utils import unpack
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+try:
+    import redis
+except ImportError:  # backend partagé optionnel
+    redis = None
+
+
+class MemoryBackend:
+    """
+    LRU borné avec expiration (TTL), propre au processus.
+
+    Les versions de tags sont tirées d'un compteur global et gardées dans un
+    LRU borné (maxsize * 4) : un tag oublié prend la plus grande version
+    oubliée (`_floor`), si bien qu'une entrée ne redevient jamais valide
+    après une invalidation ; au pire elle est recalculée.
+    """
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self.max_tags = maxsize * 4
+        self._entries = OrderedDict()
+        self._tags = OrderedDict()
+        self._sequence = 0
+        self._floor = 0
+        self._lock = threading.Lock()
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires = entry
+            if expires <= time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def tag_versions(self, tags):
+        with self._lock:
+            return [self._tags.get(tag, self._floor) for tag in tags]
+
+    def bump_tags(self, tags):
+        with self._lock:
+            for tag in tags:
+                self._sequence += 1
+                self._tags[tag] = self._sequence
+                self._tags.move_to_end(tag)
+            while len(self._tags) > self.max_tags:
+                _, version = self._tags.popitem(last=False)
+                self._floor = max(self._floor, version)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+            self._floor = self._sequence
+
+    def stats(self):
+        return {"size": len(self._entries), "maxsize": self.maxsize, "tags": len(self._tags),
+                "evictions": self.evictions, "expirations": self.expirations}
+
+
+class RedisBackend:
+    """Backend partagé entre workers ; l'expiration et l'éviction sont gérées par Redis"""
+
+    def __init__(self, url, prefix="hbnb:cache:"):
+        if redis is None:
+            raise RuntimeError("The redis package is required for CACHE_BACKEND='redis'")
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def get(self, key):
+        raw = self.client.get(self.prefix + key)
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, key, value, ttl):
+        self.client.set(self.prefix + key, json.dumps(value), ex=max(1, int(ttl)))
+
+    def delete(self, key):
+        self.client.delete(self.prefix + key)
+
+    def tag_versions(self, tags):
+        raw = self.client.mget([f"{self.prefix}tag:{tag}" for tag in tags])
+        return [int(value) if value is not None else 0 for value in raw]
+
+    def bump_tags(self, tags):
+        pipe = self.client.pipeline()
+        for tag in tags:
+            pipe.incr(f"{self.prefix}tag:{tag}")
+        pipe.execute()
+
+    def clear(self):
+        for key in self.client.scan_iter(self.prefix + "*"):
+            self.client.delete(key)
+
+    def stats(self):
+        info = self.client.info("stats")
+        return {"evictions": info.get("evicted_keys"), "expirations": info.get("expired_keys")}
+
+
+class ResponseCache:
+    """Extension Flask : CACHE_BACKEND = 'memory' (défaut), 'redis' ou 'none'"""
+
+    def __init__(self):
+        self.backend = None
+        self.ttl = 30
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.invalidations = 0
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        kind = app.config.get("CACHE_BACKEND", "memory")
+        self.ttl = app.config.get("CACHE_TTL", 30)
+        if kind == "memory":
+            self.backend = MemoryBackend(app.config.get("CACHE_MAXSIZE", 1024))
+        elif kind == "redis":
+            self.backend = RedisBackend(app.config["CACHE_REDIS_URL"])
+        else:
+            self.backend = None
+        app.extensions["response_cache"] = self
+
+    @property
+    def enabled(self):
+        return self.backend is not None
+
+    def _count(self, counter):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def cached(self, tags):
+        """
+        Décorateur de GET : `tags(**kwargs)` donne les tags de l'entrée à
+        partir des paramètres de la route. Seules les réponses 200 sont
+        mises en cache ; la clé inclut la route et la query string. Sous
+        conditional_get, l'entrée n'est servie que pour le même ETag.
+        """
+        def decorator(f):
+            @wraps(f)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return f(*args, **kwargs)
+
+                entry_tags = list(tags(**kwargs))
+                key = f"{request.endpoint}:{request.full_path}"
+                versions = self.backend.tag_versions(entry_tags)
+                etag = g.get("etag")
+
+                entry = self.backend.get(key)
+                if entry is not None:
+                    if entry["versions"] == versions and entry.get("etag") == etag:
+                        self._count("hits")
+                        return entry["data"], 200, entry["headers"]
+                    self._count("stale")
+                self._count("misses")
+
+                data, code, headers = unpack(f(*args, **kwargs))
+                if code == 200:
+                    self.backend.set(key, {"data": data, "headers": dict(headers or {}),
+                                           "versions": versions, "etag": etag}, self.ttl)
+                return data, code, headers
+            return wrapper
+        return decorator
+
+    def invalidate(self, tags):
+        if self.enabled and tags:
+            self.backend.bump_tags(sorted(tags))
+            self._count("invalidations")
+
+    def clear(self):
+        if self.enabled:
+            self.backend.clear()
+
+    def stats(self):
+        return {
+            "backend": type(self.backend).__name__ if self.backend else None,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "stale": self.stale,
+            "invalidations": self.invalidations,
+            **(self.backend.stats() if self.backend else {}),
+        }
+
+
+# =================== INVALIDATION ===================
+
+def invalidate_on_commit(session, *tags):
+    """Pour les écritures Core (bulk) que le flush ne voit pas"""
+    session.info.setdefault("cache_tags", set()).update(tags)
+
+
+def _collect_tags(session, flush_context):
+    """
+    Mémorise les tags touchés par le flush (les ids sont alors connus), ils
+    sont invalidés au commit : un lecteur concurrent ne peut pas remettre en
+    cache l'ancienne version après l'invalidation.
+    """
+    from app.models import Place, PlaceImage, Review, Amenity
+
+    tags = session.info.setdefault("cache_tags", set())
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, Place):
+            tags.update({"place-list", f"place:{obj.id}"})
+        elif isinstance(obj, (PlaceImage, Review)):
+            tags.update({"place-list", f"place:{obj.place_id}"})
+        elif isinstance(obj, Amenity):
+            tags.update({"place-list", "amenities"})
+
+
+def _invalidate_after_commit(session):
+    tags = session.info.pop("cache_tags", None)
+    if tags:
+        from app.extensions import cache
+        cache.invalidate(tags)
+
+
+def _discard_after_rollback(session, previous_transaction):
+    session.info.pop("cache_tags", None)
+
+
+event.listen(Session, "after_flush", _collect_tags)
+event.listen(Session, "after_commit", _invalidate_after_commit)
+event.listen(Session, "after_soft_rollback", _discard_after_rollback)
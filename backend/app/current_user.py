@@ -0,0 +1,72 @@
+# app/current_user.py
+"""
+Utilisateur authentifié, chargé par le hook user_lookup_loader de
+Flask-JWT-Extended : les routes lisent `current_user` (id, is_admin,
+username) au lieu de recharger la ligne users à chaque appel.
+
+- par requête : Flask-JWT-Extended ne charge l'utilisateur qu'une fois et le
+  garde dans `g` jusqu'à la fin de la requête ;
+- entre requêtes : petit cache LRU à durée de vie courte (CURRENT_USER_TTL)
+  propre au processus, vidé pour un utilisateur par UserFacade.update_user /
+  delete_user. Sur les autres workers, une modification est visible au plus
+  tard à l'expiration du TTL.
+
+Les routes qui renvoient l'utilisateur complet chargent toujours la ligne.
+"""
+from collections import namedtuple
+
+from flask import current_app
+
+from app.cache import MemoryBackend
+
+CurrentUser = namedtuple("CurrentUser", "id is_admin username")
+
+
+class UserCache:
+    """Extension Flask : init_app(app, jwt) enregistre les hooks de chargement"""
+
+    def __init__(self):
+        self.backend = MemoryBackend(1024)
+        self.ttl = 30
+        self.hits = 0
+        self.misses = 0
+
+    def init_app(self, app, jwt):
+        self.ttl = app.config.get("CURRENT_USER_TTL", 30)
+        self.backend = MemoryBackend(app.config.get("CURRENT_USER_CACHE_SIZE", 1024))
+        jwt.user_lookup_loader(self._lookup)
+        jwt.user_lookup_error_loader(self._not_found)
+        app.extensions["user_cache"] = self
+
+    def get(self, user_id):
+        """CurrentUser de user_id, ou None si l'utilisateur n'existe plus"""
+        from app.extensions import db
+        from app.models import User
+
+        user_id = int(user_id)
+        cached = self.backend.get(user_id)
+        if cached is not None:
+            self.hits += 1
+            return cached
+        self.misses += 1
+        row = db.session.query(User.id, User.is_admin, User.username) \
+            .filter(User.id == user_id).first()
+        if row is None:
+            return None
+        user = CurrentUser(row.id, row.is_admin, row.username)
+        self.backend.set(user_id, user, self.ttl)
+        return user
+
+    def invalidate(self, user_id):
+        self.backend.delete(int(user_id))
+
+    def clear(self):
+        self.backend.clear()
+
+    def _lookup(self, _jwt_header, jwt_data):
+        return self.get(jwt_data[current_app.config["JWT_IDENTITY_CLAIM"]])
+
+    @staticmethod
+    def _not_found(_jwt_header, _jwt_data):
+        # Jeton valide d'un utilisateur supprimé
+        return {"message": "User not found"}, 401
@@ -1,5 +1,16 @@
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 
+from app.cache import ResponseCache
+from app.two_factor import TwoFactorStore
+from app.mailer import MailQueue
+from app.hashing import PasswordHasher
+from app.current_user import UserCache
+
 db = SQLAlchemy()
-migrate = Migrate()
\ No newline at end of file
+migrate = Migrate()
+cache = ResponseCache()
+two_factor_store = TwoFactorStore()
+mail_queue = MailQueue()
+password_hasher = PasswordHasher()
+user_cache = UserCache()
@@ -1,8 +1,50 @@
+from sqlalchemy.dialects import postgresql, sqlite
+
 from app.models import Amenity, Place
+from app.models.generation import bump_generation
 from app.extensions import db
+from app.amenity_catalog import GENERATION, amenity_catalog
 
 
 class AmenityFacade:
+    @staticmethod
+    def normalize_name(name):
+        return name.strip().capitalize()
+
+    @staticmethod
+    def _insert_missing(names):
+        """INSERT des noms absents, sans erreur si un autre processus les crée en même temps"""
+        table = Amenity.__table__
+        rows = [{"name": name} for name in sorted(names)]
+        dialect = db.session.get_bind().dialect.name
+        if dialect == "sqlite":
+            statement = sqlite.insert(table).on_conflict_do_nothing(index_elements=["name"])
+        elif dialect == "postgresql":
+            statement = postgresql.insert(table).on_conflict_do_nothing(index_elements=["name"])
+        else:
+            statement = table.insert()
+        db.session.execute(statement, rows)
+        # Écriture Core : les événements ORM du modèle ne sont pas appelés
+        bump_generation(db.session.connection(), GENERATION)
+        amenity_catalog.invalidate(db.session())
+
+    @staticmethod
+    def resolve_amenity_ids(names, create=True):
+        """
+        Résout des noms d'équipements (normalisés) en ids via le catalogue en
+        mémoire ; si `create`, les manquants sont créés par un INSERT groupé
+        puis relus. Retourne {nom normalisé: id}. Ne fait pas de commit.
+        """
+        wanted = {AmenityFacade.normalize_name(name) for name in names if name and name.strip()}
+        if not wanted:
+            return {}
+        found = amenity_catalog.ids_for(wanted)
+        missing = wanted - found.keys()
+        if missing and create:
+            AmenityFacade._insert_missing(missing)
+            found.update(db.session.query(Amenity.name, Amenity.id).filter(Amenity.name.in_(missing)))
+        return found
+
     @staticmethod
     def create_amenity(name, owner_id):
         if not name:
@@ -35,35 +77,37 @@ class AmenityFacade:
 
     @staticmethod
     def link_amenity_to_place(amenity_id, place_id, owner_id):
+        from app.facades.place_facade import PlaceFacade
+
         place = Place.query.filter_by(id=place_id, owner_id=owner_id).first()
         if not place:
             return None, "Place not found or not owned by you"
 
-        amenity = Amenity.query.filter_by(id=amenity_id, owner_id=owner_id).first()
+        amenity = amenity_catalog.get(amenity_id)
         if not amenity:
-            return None, "Amenity not found or not owned by you"
+            return None, "Amenity not found"
 
-        if amenity in place.amenities:
+        if not PlaceFacade.link_amenities(place, [amenity.id]):
             return None, "Amenity already linked to this place"
 
-        place.amenities.append(amenity)
         db.session.commit()
         return amenity, None
 
     @staticmethod
     def unlink_amenity_from_place(amenity_id, place_id, owner_id):
+        from app.facades.place_facade import PlaceFacade
+
         place = Place.query.filter_by(id=place_id, owner_id=owner_id).first()
         if not place:
             return None, "Place not found or not owned by you"
 
-        amenity = Amenity.query.filter_by(id=amenity_id, owner_id=owner_id).first()
+        amenity = amenity_catalog.get(amenity_id)
         if not amenity:
-            return None, "Amenity not found or not owned by you"
+            return None, "Amenity not found"
 
-        if amenity not in place.amenities:
+        if not PlaceFacade.unlink_amenities(place, [amenity.id]):
             return None, "Amenity not linked to this place"
 
-        place.amenities.remove(amenity)
         db.session.commit()
         return amenity, None
 
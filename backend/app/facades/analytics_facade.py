@@ -0,0 +1,152 @@
+from calendar import monthrange
+from datetime import date, datetime
+
+from sqlalchemy import func, select
+
+from app.models import Place, Reservation, ArchivedReservation
+from app.models.analytics import PlaceDailyStat, SECONDS_PER_DAY, apply_stays
+from app.extensions import db
+
+MONTH_FORMAT = "%Y-%m"
+DEFAULT_MONTHS = 12
+MAX_MONTHS = 36
+
+
+def _add_months(day, months):
+    index = day.year * 12 + day.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+class AnalyticsFacade:
+    @staticmethod
+    def parse_months(start, end):
+        """
+        Fenêtre de mois 'YYYY-MM' (fin incluse), par défaut les 12 derniers
+        mois. Retourne (premier jour, premier jour après la fenêtre).
+        """
+        try:
+            if end:
+                last = datetime.strptime(end, MONTH_FORMAT).date()
+            else:
+                last = date.today().replace(day=1)
+            if start:
+                first = datetime.strptime(start, MONTH_FORMAT).date()
+            else:
+                first = _add_months(last, 1 - DEFAULT_MONTHS)
+        except ValueError:
+            raise ValueError("Months must be formatted as YYYY-MM")
+        if first > last:
+            raise ValueError("'from' must not be after 'to'")
+        stop = _add_months(last, 1)
+        if (stop.year - first.year) * 12 + stop.month - first.month > MAX_MONTHS:
+            raise ValueError(f"At most {MAX_MONTHS} months")
+        return first, stop
+
+    @staticmethod
+    def _month(column):
+        """Expression 'YYYY-MM' d'une colonne date selon la base"""
+        if db.session.get_bind().dialect.name == "postgresql":
+            return func.to_char(column, "YYYY-MM")
+        return func.strftime("%Y-%m", column)
+
+    @staticmethod
+    def owner_monthly(owner_id, first, stop, place_id=None):
+        """
+        Occupation et revenu par place et par mois des places de
+        l'utilisateur, sur [first, stop[. Une requête groupée sur
+        place_daily_stats (clé place_id, day) : le coût dépend du nombre de
+        places et de jours, pas du nombre de réservations.
+        """
+        places_query = db.session.query(Place.id, Place.name).filter(Place.owner_id == owner_id)
+        if place_id is not None:
+            places_query = places_query.filter(Place.id == place_id)
+        places = places_query.order_by(Place.id).all()
+
+        month = AnalyticsFacade._month(PlaceDailyStat.day).label("month")
+        rows = db.session.query(
+            PlaceDailyStat.place_id, month,
+            func.sum(PlaceDailyStat.booked_seconds), func.sum(PlaceDailyStat.revenue)
+        ).filter(
+            PlaceDailyStat.place_id.in_([place.id for place in places]),
+            PlaceDailyStat.day >= first,
+            PlaceDailyStat.day < stop,
+        ).group_by(PlaceDailyStat.place_id, month).all()
+        stats = {(row[0], row[1]): (row[2] or 0, row[3] or 0.0) for row in rows}
+
+        months = []
+        current = first
+        while current < stop:
+            months.append((current.strftime(MONTH_FORMAT), monthrange(current.year, current.month)[1]))
+            current = _add_months(current, 1)
+
+        result, total_seconds, total_revenue = [], 0, 0.0
+        capacity = sum(days for _, days in months) * SECONDS_PER_DAY
+        for place in places:
+            place_months, place_seconds, place_revenue = [], 0, 0.0
+            for label, days in months:
+                seconds, revenue = stats.get((place.id, label), (0, 0.0))
+                place_months.append({
+                    "month": label,
+                    "booked_nights": round(seconds / SECONDS_PER_DAY, 2),
+                    "occupancy_rate": round(seconds / (days * SECONDS_PER_DAY), 4),
+                    "revenue": round(revenue, 2),
+                })
+                place_seconds += seconds
+                place_revenue += revenue
+            result.append({
+                "place_id": place.id,
+                "name": place.name,
+                "months": place_months,
+                "booked_nights": round(place_seconds / SECONDS_PER_DAY, 2),
+                "occupancy_rate": round(place_seconds / capacity, 4),
+                "revenue": round(place_revenue, 2),
+            })
+            total_seconds += place_seconds
+            total_revenue += place_revenue
+
+        return {
+            "from": first.strftime(MONTH_FORMAT),
+            "to": _add_months(stop, -1).strftime(MONTH_FORMAT),
+            "places": result,
+            "booked_nights": round(total_seconds / SECONDS_PER_DAY, 2),
+            "occupancy_rate": round(total_seconds / (capacity * len(places)), 4) if places else 0.0,
+            "revenue": round(total_revenue, 2),
+        }
+
+    @staticmethod
+    def backfill(batch_size=5000):
+        """
+        Recalcule place_daily_stats depuis les réservations (table chaude et
+        archive), par lots de `batch_size` parcourus par id, un commit par
+        lot. Retourne le nombre de réservations prises en compte.
+
+        Les réservations antérieures au prix enregistré (price_by_night NULL)
+        reçoivent d'abord le prix actuel de leur place, seul prix connu.
+        """
+        for entity in (Reservation, ArchivedReservation):
+            table = entity.__table__
+            current_price = (select(Place.price_by_night)
+                             .where(Place.id == table.c.place_id).scalar_subquery())
+            db.session.execute(table.update().where(table.c.price_by_night.is_(None))
+                               .values(price_by_night=current_price))
+        db.session.execute(PlaceDailyStat.__table__.delete())
+        db.session.commit()
+
+        count = 0
+        for entity in (Reservation, ArchivedReservation):
+            last_id = 0
+            while True:
+                rows = db.session.execute(
+                    select(entity.id, entity.place_id, entity.start_datetime, entity.end_datetime,
+                           entity.price_by_night)
+                    .where(entity.id > last_id).order_by(entity.id).limit(batch_size)
+                ).all()
+                if not rows:
+                    break
+                apply_stays(db.session.connection(),
+                            [(row.place_id, row.start_datetime, row.end_datetime, row.price_by_night, 1)
+                             for row in rows])
+                db.session.commit()
+                count += len(rows)
+                last_id = rows[-1].id
+        return count
@@ -1,18 +1,704 @@
 # facades/place_facade.py
-from app.models.place import Place
+import csv
+import io
+import json
+
+from sqlalchemy import and_, case, or_, false, func, insert
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.orm import load_only, selectinload
+
+from app import fulltext, geo
+from app.models.place import Place, PlaceImage, RATING_STARS, FACETS_GENERATION, bump_place_version
+from app.models.facet import PlaceFacet
+from app.models.generation import bump_generation, read_generation
+from app.models.review import Review
 from app.models.amenity import Amenity
+from app.models.associations import place_amenities
+from app.models.reservation import Reservation
+from app.facades.reservation_facade import ReservationFacade
+from app.facades.amenity_facade import AmenityFacade
+from app.amenity_catalog import amenity_catalog
+from app.cache import invalidate_on_commit
 from app.extensions import db
 
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+PAGE_SORTS = ("id", "price_by_night", "rating")
+PLACE_RELATIONS = ("amenities", "reviews", "images")
+EXPORT_FORMATS = ("ndjson", "csv")
+IMPORT_CHUNK_SIZE = 500
+EXPORT_COLUMNS = ("id", "name", "description", "price_by_night", "location", "country",
+                  "town", "latitude", "longitude", "owner_id", "rating_avg", "rating_count")
+FACETS = ("amenities", "town", "country", "price")
+# Bornes basses des tranches de prix par nuit (la dernière est ouverte)
+PRICE_BUCKETS = (0, 50, 100, 150, 200, 300, 500)
+_SORT_COLUMNS = {"id": (), "price_by_night": ("price_by_night",), "rating": ("rating_avg",)}
+
 class PlaceFacade:
 
     @staticmethod
     def get_all_places():
         return Place.query.all()
 
+    @staticmethod
+    def load_options(columns=None, relations=PLACE_RELATIONS):
+        """
+        Options de chargement : relations demandées chargées en lot, les
+        autres jamais chargées ; `columns` (None = toutes) restreint les
+        colonnes lues dans `places`.
+        """
+        options = [selectinload(getattr(Place, relation)) for relation in relations]
+        if columns is not None:
+            options.append(load_only(*[getattr(Place, column) for column in columns]))
+        return options
+
+    @staticmethod
+    def _parse_cursor(after, sort):
+        """Décode un curseur 'id', 'prix:id' ou 'note:id' selon le tri demandé"""
+        try:
+            if sort == "price_by_night":
+                price, place_id = after.split(":", 1)
+                return int(price), int(place_id)
+            if sort == "rating":
+                rating, place_id = after.split(":", 1)
+                return float(rating), int(place_id)
+            return (int(after),)
+        except (AttributeError, ValueError):
+            raise ValueError("Invalid cursor")
+
+    @staticmethod
+    def get_places_page(limit=DEFAULT_PAGE_SIZE, after=None, sort="id", query=None,
+                        columns=None, relations=PLACE_RELATIONS):
+        """
+        Page de places en pagination par curseur (keyset) sur `id`,
+        `(price_by_night, id)` ou `(rating_avg desc, id desc)`. Les relations
+        sont chargées en lot (selectin), donc une page coûte un nombre
+        constant de requêtes.
+        `query` permet de paginer une requête déjà filtrée (recherche) ;
+        `columns` / `relations` limitent ce qui est chargé (voir load_options).
+        Retourne (places, next_cursor) ; next_cursor vaut None en fin de liste.
+        """
+        if sort not in PAGE_SORTS:
+            raise ValueError(f"sort must be one of: {', '.join(PAGE_SORTS)}")
+        if limit is None or limit < 1:
+            raise ValueError("limit must be a positive integer")
+        limit = min(limit, MAX_PAGE_SIZE)
+
+        if query is None:
+            query = Place.query
+        if columns is not None:
+            # La clé de tri sert à construire le curseur suivant
+            columns = list(dict.fromkeys([*columns, *_SORT_COLUMNS[sort]]))
+        query = query.options(*PlaceFacade.load_options(columns, relations))
+
+        if sort == "price_by_night":
+            if after:
+                price, place_id = PlaceFacade._parse_cursor(after, sort)
+                query = query.filter(or_(
+                    Place.price_by_night > price,
+                    and_(Place.price_by_night == price, Place.id > place_id)
+                ))
+            query = query.order_by(Place.price_by_night, Place.id)
+        elif sort == "rating":
+            # Mieux notées d'abord, servi par l'index (rating_avg, id)
+            if after:
+                rating, place_id = PlaceFacade._parse_cursor(after, sort)
+                query = query.filter(or_(
+                    Place.rating_avg < rating,
+                    and_(Place.rating_avg == rating, Place.id < place_id)
+                ))
+            query = query.order_by(Place.rating_avg.desc(), Place.id.desc())
+        else:
+            if after:
+                (place_id,) = PlaceFacade._parse_cursor(after, sort)
+                query = query.filter(Place.id > place_id)
+            query = query.order_by(Place.id)
+
+        # Une ligne de plus pour savoir s'il existe une page suivante
+        places = query.limit(limit + 1).all()
+        next_cursor = None
+        if len(places) > limit:
+            places = places[:limit]
+            last = places[-1]
+            if sort == "price_by_night":
+                next_cursor = f"{last.price_by_night}:{last.id}"
+            elif sort == "rating":
+                next_cursor = f"{last.rating_avg!r}:{last.id}"
+            else:
+                next_cursor = str(last.id)
+        return places, next_cursor
+
+    @staticmethod
+    def filter_places(filters, query=None):
+        """
+        Applique les filtres de recherche à une requête sur Place.
+        Filtres reconnus : min_price, max_price, town, country,
+        amenities (liste de noms, la place doit les avoir tous),
+        bbox (min_lat, min_lng, max_lat, max_lng) et available
+        (start, end : aucune réservation ne chevauche la période).
+        """
+        if query is None:
+            query = Place.query
+
+        if filters.get("min_price") is not None:
+            query = query.filter(Place.price_by_night >= filters["min_price"])
+        if filters.get("max_price") is not None:
+            query = query.filter(Place.price_by_night <= filters["max_price"])
+        if filters.get("town"):
+            query = query.filter(Place.town == filters["town"])
+        if filters.get("country"):
+            query = query.filter(Place.country == filters["country"])
+
+        if filters.get("bbox"):
+            query = PlaceFacade._filter_bbox(query, *filters["bbox"])
+
+        if filters.get("available"):
+            start_dt, end_dt = filters["available"]
+            if start_dt >= end_dt:
+                raise ValueError("End datetime must be after start datetime")
+            # Anti-jointure unique, servie par l'index (place_id, start, end)
+            booked = db.session.query(Reservation.id).filter(
+                Reservation.place_id == Place.id,
+                *ReservationFacade.overlaps(start_dt, end_dt)
+            )
+            query = query.filter(~booked.exists())
+
+        names = {AmenityFacade.normalize_name(n) for n in filters.get("amenities") or [] if n.strip()}
+        if names:
+            amenity_ids = [row.id for row in
+                           db.session.query(Amenity.id).filter(Amenity.name.in_(names))]
+            if len(amenity_ids) < len(names):
+                # Un équipement inconnu : aucune place ne peut tous les avoir
+                return query.filter(false())
+
+            # Un seul passage sur l'index (amenity_id, place_id) de la table
+            # d'association, groupé par place, au lieu d'un EXISTS par ligne
+            having_all = (
+                db.session.query(place_amenities.c.place_id)
+                .filter(place_amenities.c.amenity_id.in_(amenity_ids))
+                .group_by(place_amenities.c.place_id)
+                .having(func.count() == len(amenity_ids))
+            )
+            query = query.filter(Place.id.in_(having_all))
+
+        return query
+
+    @staticmethod
+    def _filter_bbox(query, min_lat, min_lng, max_lat, max_lng):
+        """Restreint la requête à un rectangle via l'index de cellules"""
+        if not (-90 <= min_lat <= max_lat <= 90) or not (-180 <= min_lng <= 180 and -180 <= max_lng <= 180):
+            raise ValueError("Invalid bounding box")
+
+        ranges = geo.cell_ranges(min_lat, min_lng, max_lat, max_lng)
+        if ranges is not None:
+            query = query.filter(or_(*[Place.geo_cell.between(lo, hi) for lo, hi in ranges]))
+
+        # Filtre exact : les cellules du bord débordent du rectangle
+        query = query.filter(Place.latitude.between(min_lat, max_lat))
+        if min_lng <= max_lng:
+            query = query.filter(Place.longitude.between(min_lng, max_lng))
+        else:
+            query = query.filter(or_(Place.longitude >= min_lng, Place.longitude <= max_lng))
+        return query
+
+    @staticmethod
+    def get_nearby_places(latitude, longitude, radius_km, limit=DEFAULT_PAGE_SIZE):
+        """
+        Les `limit` places les plus proches dans un rayon donné, triées par
+        distance. Les candidats viennent du rectangle englobant (index de
+        cellules), seule la distance exacte est calculée en Python.
+        Retourne une liste de (place, distance_km).
+        """
+        if not (-90 <= latitude <= 90) or not (-180 <= longitude <= 180):
+            raise ValueError("Invalid coordinates")
+        if radius_km is None or radius_km <= 0:
+            raise ValueError("radius_km must be a positive value")
+        if limit is None or limit < 1:
+            raise ValueError("limit must be a positive integer")
+        limit = min(limit, MAX_PAGE_SIZE)
+
+        bbox = geo.radius_bbox(latitude, longitude, radius_km)
+        candidates = PlaceFacade._filter_bbox(
+            db.session.query(Place.id, Place.latitude, Place.longitude), *bbox
+        ).all()
+
+        nearest = []
+        for place_id, lat, lng in candidates:
+            distance = geo.haversine_km(latitude, longitude, lat, lng)
+            if distance <= radius_km:
+                nearest.append((distance, place_id))
+        nearest = sorted(nearest)[:limit]
+        if not nearest:
+            return []
+
+        places = Place.query.options(*PlaceFacade.load_options()).filter(Place.id.in_([place_id for _, place_id in nearest])).all()
+        by_id = {place.id: place for place in places}
+        return [(by_id[place_id], distance) for distance, place_id in nearest]
+
+    @staticmethod
+    def text_search(query, limit=DEFAULT_PAGE_SIZE):
+        """
+        Recherche plein texte classée sur nom, description, ville et pays.
+        Retourne une liste de (place, score, extrait surligné).
+        """
+        if not query or not query.strip():
+            raise ValueError("Search query must not be empty")
+        if limit is None or limit < 1:
+            raise ValueError("limit must be a positive integer")
+        limit = min(limit, MAX_PAGE_SIZE)
+
+        hits = fulltext.search(db.session, query, limit)
+        if not hits:
+            return []
+
+        places = Place.query.options(*PlaceFacade.load_options()).filter(Place.id.in_([place_id for place_id, _, _ in hits])).all()
+        by_id = {place.id: place for place in places}
+        return [(by_id[place_id], score, snippet)
+                for place_id, score, snippet in hits if place_id in by_id]
+
+    @staticmethod
+    def reconcile_ratings(batch_size=1000):
+        """
+        Recalcule les agrégats de notes (somme, nombre, moyenne, histogramme)
+        de toutes les places depuis la table reviews. Retourne le nombre de
+        places dont les agrégats étaient faux.
+        """
+        buckets = [func.sum(case((Review.rating == star, 1), else_=0)) for star in RATING_STARS]
+        stats = {
+            row[0]: row[1:]
+            for row in db.session.query(
+                Review.place_id, func.sum(Review.rating), func.count(Review.id), *buckets
+            ).group_by(Review.place_id)
+        }
+
+        fixed = 0
+        last_id = 0
+        while True:
+            places = (Place.query.filter(Place.id > last_id)
+                      .order_by(Place.id).limit(batch_size).all())
+            if not places:
+                break
+            for place in places:
+                total, count, *histogram = stats.get(place.id, (0, 0) + (0,) * len(RATING_STARS))
+                expected = {
+                    "rating_sum": total,
+                    "rating_count": count,
+                    "rating_avg": total / count if count else 0.0,
+                    **{f"rating_{star}": n for star, n in zip(RATING_STARS, histogram)},
+                }
+                if any(getattr(place, key) != value for key, value in expected.items()):
+                    for key, value in expected.items():
+                        setattr(place, key, value)
+                    fixed += 1
+            db.session.commit()
+            last_id = places[-1].id
+        return fixed
+
+    @staticmethod
+    def iter_export_rows(batch_size=1000):
+        """
+        Parcourt tout le catalogue par lots (curseur sur id, lignes Core sans
+        objets ORM) : la mémoire utilisée ne dépend que de batch_size.
+        Chaque ligne est un dict avec les colonnes d'EXPORT_COLUMNS plus
+        `amenities` (noms) et `images` (URLs).
+        """
+        columns = [getattr(Place, column) for column in EXPORT_COLUMNS]
+        last_id = 0
+        while True:
+            rows = (db.session.query(*columns).filter(Place.id > last_id)
+                    .order_by(Place.id).limit(batch_size).all())
+            if not rows:
+                break
+            place_ids = [row.id for row in rows]
+
+            amenities = {}
+            for place_id, name in (db.session.query(place_amenities.c.place_id, Amenity.name)
+                                   .join(Amenity, Amenity.id == place_amenities.c.amenity_id)
+                                   .filter(place_amenities.c.place_id.in_(place_ids))
+                                   .order_by(Amenity.name)):
+                amenities.setdefault(place_id, []).append(name)
+            images = {}
+            for place_id, url in (db.session.query(PlaceImage.place_id, PlaceImage.url)
+                                  .filter(PlaceImage.place_id.in_(place_ids))
+                                  .order_by(PlaceImage.id)):
+                images.setdefault(place_id, []).append(url)
+
+            for row in rows:
+                item = row._asdict()
+                item["amenities"] = amenities.get(row.id, [])
+                item["images"] = images.get(row.id, [])
+                yield item
+
+            last_id = place_ids[-1]
+            # Ne garde pas d'état entre deux lots
+            db.session.expunge_all()
+
+    @staticmethod
+    def export_places(fmt="ndjson", batch_size=1000):
+        """Générateur de lignes de texte NDJSON ou CSV pour tout le catalogue"""
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f"format must be one of: {', '.join(EXPORT_FORMATS)}")
+        rows = PlaceFacade.iter_export_rows(batch_size)
+
+        if fmt == "ndjson":
+            for row in rows:
+                yield json.dumps(row, ensure_ascii=False) + "\n"
+            return
+
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+
+        def flush():
+            line = buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            return line
+
+        writer.writerow([*EXPORT_COLUMNS, "amenities", "images"])
+        yield flush()
+        for row in rows:
+            writer.writerow([*(row[column] for column in EXPORT_COLUMNS),
+                             "|".join(row["amenities"]), "|".join(row["images"])])
+            yield flush()
+
+    @staticmethod
+    def iter_import_rows(lines, fmt="ndjson"):
+        """
+        Lit des lignes NDJSON ou CSV (mêmes colonnes que l'export, listes
+        séparées par '|') et produit (numéro de ligne, dict ou message d'erreur)
+        """
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f"format must be one of: {', '.join(EXPORT_FORMATS)}")
+
+        if fmt == "ndjson":
+            for number, line in enumerate(lines, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                except ValueError as e:
+                    yield number, f"Invalid JSON: {e}"
+                    continue
+                yield number, row if isinstance(row, dict) else "Expected a JSON object"
+            return
+
+        # Ligne 1 = en-tête
+        for number, row in enumerate(csv.DictReader(lines), start=2):
+            for key in ("amenities", "images"):
+                value = row.get(key)
+                row[key] = [item for item in value.split("|") if item] if value else []
+            yield number, {key: value for key, value in row.items() if value not in ("", None)}
+
+    @staticmethod
+    def _validate_import_row(row):
+        """Place prête pour l'INSERT à partir d'une ligne d'import, ou ValueError"""
+        name = (row.get("name") or "").strip()
+        if not name:
+            raise ValueError("Place name must not be empty")
+        try:
+            price = int(row.get("price_by_night"))
+        except (TypeError, ValueError):
+            raise ValueError("Price by night must be a positive value")
+        if price <= 0:
+            raise ValueError("Price by night must be a positive value")
+
+        coordinates = []
+        for key, bound in (("latitude", 90), ("longitude", 180)):
+            value = row.get(key)
+            if value is None:
+                coordinates.append(None)
+                continue
+            try:
+                value = float(value)
+            except (TypeError, ValueError):
+                raise ValueError(f"{key} must be a number")
+            if not -bound <= value <= bound:
+                raise ValueError(f"{key} out of range")
+            coordinates.append(value)
+        latitude, longitude = coordinates
+
+        amenities, images = row.get("amenities") or [], row.get("images") or []
+        if not isinstance(amenities, list) or not isinstance(images, list):
+            raise ValueError("amenities and images must be lists")
+
+        return {
+            "name": name,
+            "description": row.get("description", ""),
+            "price_by_night": price,
+            "location": row.get("location", ""),
+            "country": row.get("country", ""),
+            "town": row.get("town", ""),
+            "latitude": latitude,
+            "longitude": longitude,
+            # Insertion Core : les événements ORM ne calculent pas la cellule
+            "geo_cell": geo.cell_for(latitude, longitude),
+        }, [str(a) for a in amenities], [str(i) for i in images]
+
+    @staticmethod
+    def _insert_import_chunk(chunk, owner_id):
+        """
+        Insère un lot validé : places, liens place_amenities et images en
+        executemany. Retourne le nombre de places créées.
+        """
+        amenity_ids = AmenityFacade.resolve_amenity_ids(
+            name for _, _, amenities, _ in chunk for name in amenities
+        )
+        rows = [{**values, "owner_id": owner_id} for _, values, _, _ in chunk]
+        place_ids = db.session.execute(
+            insert(Place).returning(Place.id, sort_by_parameter_order=True), rows
+        ).scalars().all()
+
+        links, images = [], []
+        for place_id, (_, _, amenities, urls) in zip(place_ids, chunk):
+            for amenity_id in {amenity_ids[AmenityFacade.normalize_name(n)] for n in amenities if n.strip()}:
+                links.append({"place_id": place_id, "amenity_id": amenity_id})
+            images.extend({"place_id": place_id, "url": url} for url in urls)
+        if links:
+            db.session.execute(place_amenities.insert(), links)
+        if images:
+            db.session.execute(insert(PlaceImage), images)
+        # Insertion Core : les événements de Place ne sont pas appelés
+        bump_generation(db.session.connection(), FACETS_GENERATION)
+        return len(place_ids)
+
+    @staticmethod
+    def bulk_import(rows, owner_id, chunk_size=IMPORT_CHUNK_SIZE):
+        """
+        Import en masse de places pour un propriétaire.
+
+        `rows` produit (numéro de ligne, dict ou message d'erreur), voir
+        iter_import_rows. Les lignes invalides ou en doublon sont rapportées
+        sans interrompre l'import ; chaque lot est une transaction. Si un lot
+        échoue en base, ses lignes sont rejouées une à une (savepoints) pour
+        isoler les fautives.
+        Retourne {"created": n, "errors": [{"line": n, "error": msg}, ...]}.
+        """
+        created, errors = 0, []
+        pending = []
+        seen = set()
+
+        def flush_chunk():
+            nonlocal created
+            if not pending:
+                return
+            # Doublons avec les places existantes du propriétaire : une requête
+            keys = [(values["name"], values["latitude"], values["longitude"])
+                    for _, values, _, _ in pending]
+            existing = set(db.session.query(Place.name, Place.latitude, Place.longitude).filter(
+                Place.owner_id == owner_id,
+                Place.name.in_({name for name, _, _ in keys}),
+            ))
+            chunk = []
+            for item, key in zip(pending, keys):
+                if key in existing:
+                    errors.append({"line": item[0], "error": "You already have a place with this name at this location."})
+                else:
+                    chunk.append(item)
+            pending.clear()
+            if not chunk:
+                return
+
+            try:
+                created += PlaceFacade._insert_import_chunk(chunk, owner_id)
+                invalidate_on_commit(db.session, "place-list", "amenities")
+                db.session.commit()
+                return
+            except SQLAlchemyError:
+                db.session.rollback()
+
+            for item in chunk:
+                try:
+                    with db.session.begin_nested():
+                        created += PlaceFacade._insert_import_chunk([item], owner_id)
+                except SQLAlchemyError as e:
+                    errors.append({"line": item[0], "error": str(e.orig if hasattr(e, "orig") else e)})
+            invalidate_on_commit(db.session, "place-list", "amenities")
+            db.session.commit()
+
+        for number, row in rows:
+            if isinstance(row, str):
+                errors.append({"line": number, "error": row})
+                continue
+            try:
+                values, amenities, images = PlaceFacade._validate_import_row(row)
+            except ValueError as e:
+                errors.append({"line": number, "error": str(e)})
+                continue
+
+            key = (values["name"], values["latitude"], values["longitude"])
+            if key in seen:
+                errors.append({"line": number, "error": "Duplicate place in this import."})
+                continue
+            seen.add(key)
+
+            pending.append((number, values, amenities, images))
+            if len(pending) >= chunk_size:
+                flush_chunk()
+        flush_chunk()
+
+        return {"created": created, "errors": errors}
+
+    @staticmethod
+    def backfill_geo_cells(batch_size=1000):
+        """Recalcule geo_cell pour les places existantes (après migration)"""
+        updated = 0
+        last_id = 0
+        while True:
+            rows = (db.session.query(Place.id, Place.latitude, Place.longitude)
+                    .filter(Place.id > last_id).order_by(Place.id).limit(batch_size).all())
+            if not rows:
+                break
+            db.session.execute(
+                Place.__table__.update()
+                .where(Place.__table__.c.id == db.bindparam("place_id"))
+                .values(geo_cell=db.bindparam("cell")),
+                [{"place_id": pid, "cell": geo.cell_for(lat, lng)} for pid, lat, lng in rows]
+            )
+            db.session.commit()
+            updated += len(rows)
+            last_id = rows[-1][0]
+        return updated
+
+    @staticmethod
+    def search_places(filters, limit=DEFAULT_PAGE_SIZE, after=None, sort="id",
+                      columns=None, relations=PLACE_RELATIONS):
+        """Recherche paginée : filtres de filter_places + pagination par curseur"""
+        min_price, max_price = filters.get("min_price"), filters.get("max_price")
+        if min_price is not None and max_price is not None and min_price > max_price:
+            raise ValueError("min_price must be lower than or equal to max_price")
+        return PlaceFacade.get_places_page(
+            limit=limit, after=after, sort=sort,
+            query=PlaceFacade.filter_places(filters),
+            columns=columns, relations=relations
+        )
+
+    @staticmethod
+    def _facet_rows(query, facets=FACETS):
+        """
+        Compte les facettes de l'ensemble filtré `query` en requêtes
+        groupées (pays + ville, tranche de prix, équipement). Retourne des
+        lignes (facette, valeur, nombre), au format de place_facets.
+        """
+        query = query.order_by(None)
+        rows = []
+        total = None
+
+        if "town" in facets or "country" in facets:
+            location = (query.with_entities(Place.country, Place.town, func.count())
+                        .group_by(Place.country, Place.town).all())
+            countries, towns = {}, {}
+            for country, town, count in location:
+                if country is not None:
+                    countries[country] = countries.get(country, 0) + count
+                if town is not None:
+                    towns[town] = towns.get(town, 0) + count
+            rows += [("country", value, count) for value, count in countries.items()]
+            rows += [("town", value, count) for value, count in towns.items()]
+            total = sum(count for _, _, count in location)
+
+        if "price" in facets:
+            bucket = case(
+                *[(Place.price_by_night < high, low) for low, high in zip(PRICE_BUCKETS, PRICE_BUCKETS[1:])],
+                else_=PRICE_BUCKETS[-1]
+            ).label("bucket")
+            prices = query.with_entities(bucket, func.count()).group_by(bucket).all()
+            rows += [("price", str(low), count) for low, count in prices]
+            total = sum(count for _, count in prices)
+
+        if "amenities" in facets:
+            amenities = (query.join(place_amenities, place_amenities.c.place_id == Place.id)
+                         .with_entities(place_amenities.c.amenity_id, func.count())
+                         .group_by(place_amenities.c.amenity_id).all())
+            rows += [("amenity", str(amenity_id), count) for amenity_id, count in amenities]
+
+        if total is None:
+            total = query.count()
+        rows.append(("total", "", total))
+        return rows
+
+    @staticmethod
+    def facet_rollup():
+        """
+        Facettes du catalogue complet, lues dans place_facets. La table est
+        recalculée quand sa génération ne correspond plus à la génération
+        "place-facets", incrémentée par toute écriture qui les change.
+        """
+        generation = read_generation(db.session.connection(), FACETS_GENERATION)
+        rows = [(row.facet, row.value, row.count) for row in
+                PlaceFacet.query.filter_by(generation=generation)]
+        if any(facet == "total" for facet, _, _ in rows):
+            return rows
+
+        rows = PlaceFacade._facet_rows(Place.query)
+        try:
+            db.session.execute(PlaceFacet.__table__.delete())
+            db.session.execute(insert(PlaceFacet), [
+                {"facet": facet, "value": value, "count": count, "generation": generation}
+                for facet, value, count in rows
+            ])
+            db.session.commit()
+        except IntegrityError:
+            # Un autre worker vient de recalculer la table
+            db.session.rollback()
+        return rows
+
+    @staticmethod
+    def facet_counts(filters, facets=FACETS):
+        """
+        Compteurs de facettes pour la recherche : sur l'ensemble filtré,
+        ou via l'agrégat précalculé quand aucun filtre n'est actif.
+        """
+        unknown = set(facets) - set(FACETS)
+        if unknown:
+            raise ValueError(f"Unknown facets: {', '.join(sorted(unknown))}")
+
+        if any(value not in (None, "", []) for value in filters.values()):
+            rows = PlaceFacade._facet_rows(PlaceFacade.filter_places(filters), facets)
+        else:
+            rows = PlaceFacade.facet_rollup()
+
+        counts = {"total": 0}
+        buckets = {}
+        for facet, value, count in rows:
+            if facet == "total":
+                counts["total"] = count
+            elif facet == "country" and "country" in facets:
+                counts.setdefault("countries", {})[value] = count
+            elif facet == "town" and "town" in facets:
+                counts.setdefault("towns", {})[value] = count
+            elif facet == "price":
+                buckets[int(value)] = count
+            elif facet == "amenity" and "amenities" in facets:
+                amenity = amenity_catalog.get(int(value))
+                if amenity:
+                    counts.setdefault("amenities", {})[amenity.name] = count
+        if "price" in facets:
+            bounds = list(PRICE_BUCKETS) + [None]
+            counts["price"] = [{"min": low, "max": high, "count": buckets.get(low, 0)}
+                               for low, high in zip(bounds, bounds[1:])]
+        for facet, key in (("country", "countries"), ("town", "towns"), ("amenities", "amenities")):
+            if facet in facets:
+                counts.setdefault(key, {})
+        return counts
+
     @staticmethod
     def get_place_by_id(place_id):
         return Place.query.get(place_id)
 
+    @staticmethod
+    def get_place_versions(place_id):
+        """Versions de la place (GET conditionnels), sans charger la ligne entière"""
+        return db.session.query(
+            Place.version, Place.updated_at,
+            Place.reservations_version, Place.reservations_updated_at
+        ).filter(Place.id == place_id).first()
+
+    @staticmethod
+    def get_place(place_id, columns=None, relations=PLACE_RELATIONS):
+        """Une place avec ses relations chargées en lot (voir load_options)"""
+        return (Place.query.options(*PlaceFacade.load_options(columns, relations))
+                .filter(Place.id == place_id).first())
+
     @staticmethod
     def _get_place(identifier, owner_id):
         """Helper pour chercher une place par ID ou par nom"""
@@ -20,6 +706,77 @@ class PlaceFacade:
             return Place.query.filter_by(id=identifier, owner_id=owner_id).first()
         return Place.query.filter_by(name=identifier, owner_id=owner_id).first()
 
+    @staticmethod
+    def _sync_amenities(place, names):
+        """
+        Aligne les équipements de la place sur `names` par différence avec
+        les lignes existantes de place_amenities : un DELETE et un INSERT
+        groupés au plus, rien si la liste n'a pas changé. Les noms inconnus
+        sont créés par AmenityFacade.resolve_amenity_ids (sans conflit entre
+        créateurs concurrents). Pas de commit.
+        """
+        wanted = set(AmenityFacade.resolve_amenity_ids(names).values())
+        current = {amenity_id for (amenity_id,) in db.session.query(place_amenities.c.amenity_id)
+                   .filter(place_amenities.c.place_id == place.id)}
+        to_remove, to_add = current - wanted, wanted - current
+        if not to_remove and not to_add:
+            return False
+
+        if to_remove:
+            db.session.execute(place_amenities.delete().where(
+                place_amenities.c.place_id == place.id,
+                place_amenities.c.amenity_id.in_(to_remove)
+            ))
+        if to_add:
+            db.session.execute(place_amenities.insert(), [
+                {"place_id": place.id, "amenity_id": amenity_id} for amenity_id in sorted(to_add)
+            ])
+
+        # Écriture Core : la collection ORM, la version, les facettes et le
+        # cache ne la voient pas
+        db.session.expire(place, ["amenities"])
+        bump_place_version(db.session.connection(), [place.id])
+        bump_generation(db.session.connection(), FACETS_GENERATION)
+        invalidate_on_commit(db.session, "place-list", f"place:{place.id}")
+        return True
+
+    @staticmethod
+    def link_amenities(place, amenity_ids):
+        """
+        Ajoute des équipements (ids) à la place sans toucher aux autres liens.
+        Retourne True si au moins un lien a été créé. Pas de commit.
+        """
+        current = {amenity_id for (amenity_id,) in db.session.query(place_amenities.c.amenity_id)
+                   .filter(place_amenities.c.place_id == place.id)}
+        to_add = set(amenity_ids) - current
+        if not to_add:
+            return False
+        db.session.execute(place_amenities.insert(), [
+            {"place_id": place.id, "amenity_id": amenity_id} for amenity_id in sorted(to_add)
+        ])
+        db.session.expire(place, ["amenities"])
+        bump_place_version(db.session.connection(), [place.id])
+        bump_generation(db.session.connection(), FACETS_GENERATION)
+        invalidate_on_commit(db.session, "place-list", f"place:{place.id}")
+        return True
+
+    @staticmethod
+    def unlink_amenities(place, amenity_ids):
+        """
+        Retire des équipements (ids) de la place sans toucher aux autres liens.
+        Retourne True si au moins un lien a été supprimé. Pas de commit.
+        """
+        result = db.session.execute(place_amenities.delete().where(
+            place_amenities.c.place_id == place.id,
+            place_amenities.c.amenity_id.in_(list(amenity_ids))))
+        if not result.rowcount:
+            return False
+        db.session.expire(place, ["amenities"])
+        bump_place_version(db.session.connection(), [place.id])
+        bump_generation(db.session.connection(), FACETS_GENERATION)
+        invalidate_on_commit(db.session, "place-list", f"place:{place.id}")
+        return True
+
     @staticmethod
     def create_place(data, owner_id):
         try:
@@ -55,19 +812,10 @@ class PlaceFacade:
                 owner_id=owner_id
             )
             db.session.add(place)
-            db.session.commit()  # commit pour avoir l'id
+            db.session.flush()  # pour avoir l'id, dans la même transaction
 
             # --- GESTION DES AMENITIES ---
-            amenities_data = data.get('amenities', [])
-            for amenity_name in amenities_data:
-                capitalized_name = amenity_name.strip().capitalize()
-                amenity = Amenity.query.filter_by(name=capitalized_name).first()
-                if not amenity:
-                    amenity = Amenity(name=capitalized_name)
-                    db.session.add(amenity)
-                    db.session.commit()
-                if amenity not in place.amenities:
-                    place.amenities.append(amenity)
+            PlaceFacade._sync_amenities(place, data.get('amenities', []))
 
             db.session.commit()
             return place
@@ -92,15 +840,7 @@ class PlaceFacade:
 
             # Mise à jour des amenities si fournis
             if "amenities" in data:
-                place.amenities.clear()
-                for amenity_name in data["amenities"]:
-                    capitalized_name = amenity_name.strip().capitalize()
-                    amenity = Amenity.query.filter_by(name=capitalized_name).first()
-                    if not amenity:
-                        amenity = Amenity(name=capitalized_name)
-                        db.session.add(amenity)
-                        db.session.commit()
-                    place.amenities.append(amenity)
+                PlaceFacade._sync_amenities(place, data["amenities"])
 
             db.session.commit()
             return place
@@ -1,29 +1,171 @@
-from datetime import datetime
+import csv
+import io
+import json
+import time
+from datetime import datetime, timedelta
 
-from app.models import Reservation
+from flask import current_app
+from sqlalchemy import and_, or_, select, union_all
+
+from app.models import Place, Reservation, ArchivedReservation
+from app.models.place import bump_place_version
 from app.extensions import db
 
+DATETIME_FORMAT = "%Y-%m-%dT%H:%M:%S"
+DATE_FORMAT = "%Y-%m-%d"
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+EXPORT_FORMATS = ("ndjson", "csv")
+EXPORT_COLUMNS = ("id", "place_id", "user_id", "start_datetime", "end_datetime", "created_at")
+AVAILABILITY_STEPS = {"day": timedelta(days=1), "hour": timedelta(hours=1)}
+DEFAULT_AVAILABILITY_DAYS = 31
+# Taille maximale d'un calendrier (≈ 3 mois à l'heure, 6 ans au jour)
+MAX_AVAILABILITY_SLOTS = 24 * 92
+ARCHIVE_BATCH_SIZE = 1000
+
 
 class ReservationFacade:
     @staticmethod
-    def create_reservation(user_id, place_id, start_datetime, end_datetime):
+    def parse_datetime(value):
         try:
-            start_dt = datetime.strptime(start_datetime, "%Y-%m-%dT%H:%M:%S")
-            end_dt = datetime.strptime(end_datetime, "%Y-%m-%dT%H:%M:%S")
-        except ValueError:
+            return datetime.strptime(value, DATETIME_FORMAT)
+        except (TypeError, ValueError):
             raise ValueError("Datetime format must be YYYY-MM-DDTHH:MM:SS")
 
+    @staticmethod
+    def parse_bound(value):
+        """Borne de fenêtre : YYYY-MM-DD ou YYYY-MM-DDTHH:MM:SS"""
+        try:
+            return datetime.strptime(value, DATE_FORMAT)
+        except (TypeError, ValueError):
+            return ReservationFacade.parse_datetime(value)
+
+    @staticmethod
+    def parse_window(start, end, granularity="day"):
+        """
+        Fenêtre d'un calendrier de disponibilité : dates YYYY-MM-DD ou
+        YYYY-MM-DDTHH:MM:SS, par défaut aujourd'hui (UTC) + 31 jours. Retourne
+        (début, fin, pas), la fin arrondie au pas supérieur.
+        """
+        step = AVAILABILITY_STEPS.get(granularity)
+        if step is None:
+            raise ValueError(f"granularity must be one of: {', '.join(AVAILABILITY_STEPS)}")
+
+        parse = ReservationFacade.parse_bound
+        # Jour courant en UTC, comme les dates stockées
+        today = datetime.combine(datetime.utcnow().date(), datetime.min.time())
+        start_dt = parse(start) if start else today
+        end_dt = parse(end) if end else start_dt + timedelta(days=DEFAULT_AVAILABILITY_DAYS)
+        if start_dt >= end_dt:
+            raise ValueError("'to' must be after 'from'")
+        slots = -((start_dt - end_dt) // step)
+        if slots > MAX_AVAILABILITY_SLOTS:
+            raise ValueError(f"Window too large: at most {MAX_AVAILABILITY_SLOTS} {granularity}s")
+        return start_dt, start_dt + slots * step, step
+
+    @staticmethod
+    def availability(place_ids, start_dt, end_dt, step):
+        """
+        Occupation des places sur [start_dt, end_dt[ découpé en créneaux de
+        `step` : {place_id: "0110..."}, le caractère i valant 1 si une
+        réservation touche le créneau i.
+
+        Une seule requête pour toutes les places, limitée aux réservations
+        qui chevauchent la fenêtre (index place_id, start, end). Chaque
+        séjour est converti en un masque d'entier couvrant ses créneaux et
+        combiné par OU : aucun parcours jour par jour en Python. L'archive
+        n'est lue que si la fenêtre commence dans le passé.
+        """
+        slots = (end_dt - start_dt) // step
+        masks = dict.fromkeys(place_ids, 0)
+        # Les séjours archivés sont terminés : seulement pour une fenêtre passée
+        entities = ReservationFacade._entities(history=start_dt < datetime.utcnow())
+        rows = db.session.execute(union_all(*[
+            select(entity.place_id, entity.start_datetime, entity.end_datetime).where(
+                entity.place_id.in_(masks),
+                *ReservationFacade.overlaps(start_dt, end_dt, entity)
+            ) for entity in entities
+        ]))
+        for place_id, start, end in rows:
+            first = max(0, (start - start_dt) // step)
+            last = min(slots, -((start_dt - end) // step))
+            masks[place_id] |= ((1 << (last - first)) - 1) << first
+        # Bit i = créneau i : on inverse l'écriture binaire (poids fort à gauche)
+        return {place_id: format(mask, f"0{slots}b")[::-1] for place_id, mask in masks.items()}
+
+    @staticmethod
+    def overlaps(start_dt, end_dt, entity=Reservation):
+        """Conditions SQL d'une réservation qui chevauche [start_dt, end_dt["""
+        return (
+            entity.start_datetime < end_dt,
+            entity.end_datetime > start_dt
+        )
+
+    @staticmethod
+    def _entities(history):
+        """Table chaude, plus l'archive si l'historique est demandé"""
+        return (Reservation, ArchivedReservation) if history else (Reservation,)
+
+    @staticmethod
+    def find_overlap(place_id, start_dt, end_dt, exclude_id=None):
+        """
+        Id d'une réservation de la place qui chevauche [start_dt, end_dt[,
+        ou None. Une réservation archivée est terminée : l'archive n'est
+        consultée que pour un séjour qui commence dans le passé.
+        """
+        for entity in ReservationFacade._entities(history=start_dt < datetime.utcnow()):
+            query = db.session.query(entity.id).filter(
+                entity.place_id == place_id,
+                *ReservationFacade.overlaps(start_dt, end_dt, entity)
+            )
+            if exclude_id is not None:
+                query = query.filter(entity.id != exclude_id)
+            found = query.first()
+            if found:
+                return found.id
+        return None
+
+    @staticmethod
+    def lock_places(*place_ids):
+        """
+        Sérialise les réservations des places données jusqu'à la fin de la
+        transaction, pour que la vérification de chevauchement et l'écriture
+        qui suit ne puissent pas être doublées par une requête concurrente.
+
+        - PostgreSQL : verrou de ligne (SELECT ... FOR UPDATE) sur chaque
+          place, pris dans l'ordre des ids pour éviter les interblocages ;
+        - SQLite : pas de verrou de ligne, une écriture prend le verrou
+          d'écriture de la base (comme BEGIN IMMEDIATE).
+
+        Retourne l'ensemble des ids de places existantes.
+        """
+        place_ids = sorted({place_id for place_id in place_ids if place_id is not None})
+        places = Place.__table__
+        if db.session.get_bind().dialect.name == "sqlite":
+            db.session.execute(
+                places.update().where(places.c.id.in_(place_ids)).values(id=places.c.id)
+            )
+            statement = select(places.c.id).where(places.c.id.in_(place_ids))
+        else:
+            statement = (select(places.c.id).where(places.c.id.in_(place_ids))
+                         .order_by(places.c.id).with_for_update())
+        return set(db.session.execute(statement).scalars())
+
+    @staticmethod
+    def create_reservation(user_id, place_id, start_datetime, end_datetime):
+        start_dt = ReservationFacade.parse_datetime(start_datetime)
+        end_dt = ReservationFacade.parse_datetime(end_datetime)
+
         if start_dt >= end_dt:
             raise ValueError("End datetime must be after start datetime")
 
-        # Vérifie les réservations qui se chevauchent
-        overlapping = Reservation.query.filter(
-            Reservation.place_id == place_id,
-            Reservation.start_datetime < end_dt,
-            Reservation.end_datetime > start_dt
-        ).first()
+        if not ReservationFacade.lock_places(place_id):
+            db.session.rollback()
+            raise ValueError("Place not found")
 
-        if overlapping:
+        # Vérifie les réservations qui se chevauchent (sous le verrou de la place)
+        if ReservationFacade.find_overlap(place_id, start_dt, end_dt):
+            db.session.rollback()
             raise ValueError("This place is already reserved during the selected period.")
 
         reservation = Reservation(
@@ -37,20 +179,188 @@ class ReservationFacade:
         return reservation
 
     @staticmethod
-    def get_reservations_by_user(user_id):
-        return Reservation.query.filter_by(user_id=user_id).all()
+    def _parse_cursor(after):
+        """Décode un curseur 'début:id' (début au format ISO)"""
+        try:
+            start, reservation_id = after.rsplit(":", 1)
+            return datetime.fromisoformat(start), int(reservation_id)
+        except (AttributeError, ValueError):
+            raise ValueError("Invalid cursor")
+
+    @staticmethod
+    def _page_select(entity, limit, after=None, start_dt=None, end_dt=None,
+                     place_id=None, user_id=None):
+        """
+        SELECT des colonnes d'export de `entity` (table chaude ou archive) :
+        séjours qui chevauchent [start_dt, end_dt[ (bornes facultatives),
+        triés par (start_datetime, id) à partir du curseur `after`.
+        """
+        if start_dt is not None and end_dt is not None and start_dt >= end_dt:
+            raise ValueError("'to' must be after 'from'")
+        statement = select(*[getattr(entity, column) for column in EXPORT_COLUMNS])
+        if place_id is not None:
+            statement = statement.where(entity.place_id == place_id)
+        if user_id is not None:
+            statement = statement.where(entity.user_id == user_id)
+        if end_dt is not None:
+            statement = statement.where(entity.start_datetime < end_dt)
+        if start_dt is not None:
+            statement = statement.where(entity.end_datetime > start_dt)
+        if after:
+            start, reservation_id = ReservationFacade._parse_cursor(after)
+            statement = statement.where(or_(
+                entity.start_datetime > start,
+                and_(entity.start_datetime == start, entity.id > reservation_id)
+            ))
+        return statement.order_by(entity.start_datetime, entity.id).limit(limit)
+
+    @staticmethod
+    def _select_rows(limit, history=False, **criteria):
+        """
+        Lignes (colonnes d'export) de la table chaude, ou de la table chaude
+        et de l'archive fusionnées quand `history` : chaque branche est
+        triée et limitée par son index avant l'union.
+        """
+        selects = [ReservationFacade._page_select(entity, limit, **criteria)
+                   for entity in ReservationFacade._entities(history)]
+        if len(selects) == 1:
+            return db.session.execute(selects[0]).all()
+        merged = union_all(*[select(branch.subquery()) for branch in selects]).subquery()
+        return db.session.execute(
+            select(merged).order_by(merged.c.start_datetime, merged.c.id).limit(limit)
+        ).all()
+
+    @staticmethod
+    def get_reservations_page(limit=DEFAULT_PAGE_SIZE, after=None, start_dt=None, end_dt=None,
+                              place_id=None, user_id=None, history=False):
+        """
+        Page de réservations triées par début, en pagination par curseur
+        (start_datetime, id), servie par les index (place_id, start_datetime)
+        et (user_id, start_datetime). `start_dt` / `end_dt` restreignent aux
+        séjours qui chevauchent la fenêtre ; `history` ajoute les séjours
+        archivés. Retourne (lignes, next_cursor) ; next_cursor vaut None en
+        fin de liste.
+        """
+        if limit is None or limit < 1:
+            raise ValueError("limit must be a positive integer")
+        limit = min(limit, MAX_PAGE_SIZE)
+
+        # Une ligne de plus pour savoir s'il existe une page suivante
+        reservations = ReservationFacade._select_rows(
+            limit + 1, history, after=after, start_dt=start_dt, end_dt=end_dt,
+            place_id=place_id, user_id=user_id
+        )
+        next_cursor = None
+        if len(reservations) > limit:
+            reservations = reservations[:limit]
+            last = reservations[-1]
+            next_cursor = f"{last.start_datetime.isoformat()}:{last.id}"
+        return reservations, next_cursor
+
+    @staticmethod
+    def get_reservations_by_user(user_id, **page):
+        return ReservationFacade.get_reservations_page(user_id=user_id, **page)
+
+    @staticmethod
+    def get_reservations_by_place(place_id, **page):
+        return ReservationFacade.get_reservations_page(place_id=place_id, **page)
+
+    @staticmethod
+    def get_all_reservations(**page):
+        return ReservationFacade.get_reservations_page(**page)
 
     @staticmethod
-    def get_reservations_by_place(place_id):
-        return Reservation.query.filter_by(place_id=place_id).all()
+    def iter_export_rows(start_dt=None, end_dt=None, history=False, batch_size=1000):
+        """
+        Parcourt les réservations (fenêtre facultative) par lots de
+        `batch_size` en colonnes simples, sans garder d'objets ORM : la
+        mémoire reste constante quelle que soit la taille de la table.
+        """
+        after = None
+        while True:
+            rows = ReservationFacade._select_rows(
+                batch_size, history, after=after, start_dt=start_dt, end_dt=end_dt
+            )
+            for row in rows:
+                yield {column: (value.isoformat() if isinstance(value, datetime) else value)
+                       for column, value in zip(EXPORT_COLUMNS, row)}
+            if len(rows) < batch_size:
+                return
+            after = f"{rows[-1].start_datetime.isoformat()}:{rows[-1].id}"
 
     @staticmethod
-    def get_all_reservations():
-        return Reservation.query.all()
+    def export_reservations(fmt="ndjson", start_dt=None, end_dt=None, history=False, batch_size=1000):
+        """Générateur de lignes de texte NDJSON ou CSV (export administrateur)"""
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f"format must be one of: {', '.join(EXPORT_FORMATS)}")
+        rows = ReservationFacade.iter_export_rows(start_dt, end_dt, history, batch_size)
+
+        if fmt == "ndjson":
+            for row in rows:
+                yield json.dumps(row) + "\n"
+            return
+
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+
+        def flush():
+            line = buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            return line
+
+        writer.writerow(EXPORT_COLUMNS)
+        yield flush()
+        for row in rows:
+            writer.writerow([row[column] for column in EXPORT_COLUMNS])
+            yield flush()
 
     @staticmethod
     def get_reservation_by_id(reservation_id):
-        return Reservation.query.get(reservation_id)
+        # Lecture seule : une réservation archivée reste consultable
+        return (db.session.get(Reservation, reservation_id)
+                or db.session.get(ArchivedReservation, reservation_id))
+
+    @staticmethod
+    def archive_reservations(older_than_days=None, batch_size=ARCHIVE_BATCH_SIZE, pause=0):
+        """
+        Déplace vers reservations_archive les réservations terminées depuis
+        plus de `older_than_days` jours (RESERVATION_ARCHIVE_DAYS par
+        défaut), par lots de `batch_size` : INSERT ... SELECT puis DELETE
+        des mêmes ids, un commit par lot pour ne jamais verrouiller la
+        table longtemps. `pause` (secondes) espace les lots. Retourne le
+        nombre de réservations archivées.
+        """
+        if older_than_days is None:
+            older_than_days = current_app.config.get("RESERVATION_ARCHIVE_DAYS", 30)
+        cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+        hot, cold = Reservation.__table__, ArchivedReservation.__table__
+        columns = [*EXPORT_COLUMNS, "price_by_night"]
+
+        archived = 0
+        while True:
+            ids = db.session.execute(
+                select(hot.c.id).where(hot.c.end_datetime < cutoff).order_by(hot.c.id).limit(batch_size)
+            ).scalars().all()
+            if not ids:
+                break
+            db.session.execute(cold.insert().from_select(
+                [*columns, "archived_at"],
+                select(*[hot.c[column] for column in columns], db.literal(datetime.utcnow()))
+                .where(hot.c.id.in_(ids))
+            ))
+            # Les listes par place changent : nouvelles versions (ETag)
+            bump_place_version(
+                db.session.connection(),
+                select(hot.c.place_id).where(hot.c.id.in_(ids)).distinct(),
+                reservations=True
+            )
+            db.session.execute(hot.delete().where(hot.c.id.in_(ids)))
+            db.session.commit()
+            archived += len(ids)
+            if pause:
+                time.sleep(pause)
+        return archived
 
     @staticmethod
     def update_reservation(reservation_id, **kwargs):
@@ -58,30 +368,35 @@ class ReservationFacade:
         if not reservation:
             return None
 
+        changes = {}
         for key, value in kwargs.items():
             if hasattr(reservation, key):
                 if key in ['start_datetime', 'end_datetime']:
                     # Parse date if passed as string
                     if isinstance(value, str):
-                        try:
-                            value = datetime.strptime(value, "%Y-%m-%dT%H:%M:%S")
-                        except ValueError:
-                            raise ValueError("Datetime format must be YYYY-MM-DDTHH:MM:SS")
-                setattr(reservation, key, value)
+                        value = ReservationFacade.parse_datetime(value)
+                changes[key] = value
+
+        # Verrouille l'ancienne et la nouvelle place, puis relit la
+        # réservation : elle a pu changer avant l'obtention du verrou
+        new_place_id = changes.get("place_id", reservation.place_id)
+        if new_place_id not in ReservationFacade.lock_places(reservation.place_id, new_place_id):
+            db.session.rollback()
+            raise ValueError("Place not found")
+        db.session.refresh(reservation)
+
+        for key, value in changes.items():
+            setattr(reservation, key, value)
 
         # Revalidation possible des dates pour éviter incohérences après modif
         if reservation.start_datetime >= reservation.end_datetime:
+            db.session.rollback()
             raise ValueError("End datetime must be after start datetime")
 
         # Vérifie que la modification ne crée pas de chevauchement
-        overlapping = Reservation.query.filter(
-            Reservation.place_id == reservation.place_id,
-            Reservation.id != reservation_id,
-            Reservation.start_datetime < reservation.end_datetime,
-            Reservation.end_datetime > reservation.start_datetime
-        ).first()
-
-        if overlapping:
+        if ReservationFacade.find_overlap(reservation.place_id, reservation.start_datetime,
+                                          reservation.end_datetime, exclude_id=reservation_id):
+            db.session.rollback()
             raise ValueError("Updated reservation conflicts with an existing reservation.")
 
         db.session.commit()
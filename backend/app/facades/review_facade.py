@@ -1,8 +1,31 @@
 from datetime import datetime
 
-from app.models import Review
+from sqlalchemy import and_, func, or_, select, union_all
+from sqlalchemy.exc import IntegrityError
+
+from app.models import Review, User, Reservation, ArchivedReservation, ReviewEligibility
+from app.models.reservation import REVIEW_DELAY
 from app.extensions import db
 
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+DEFAULT_USER_NAME = "Anonyme"
+DEFAULT_USER_PHOTO = "/uploads/default-avatar.png"
+UNIQUE_REVIEW_CONSTRAINT = "uq_reviews_user_place"
+
+
+def _is_duplicate_review(error):
+    """
+    L'IntegrityError vient-elle de la contrainte unique (user_id, place_id) ?
+    PostgreSQL donne le nom de la contrainte, SQLite seulement les colonnes.
+    """
+    constraint = getattr(getattr(error.orig, "diag", None), "constraint_name", None)
+    if constraint is not None:
+        return constraint == UNIQUE_REVIEW_CONSTRAINT
+    message = str(error.orig)
+    return (UNIQUE_REVIEW_CONSTRAINT in message
+            or "UNIQUE constraint failed: reviews.user_id, reviews.place_id" in message)
+
 
 class ReviewFacade:
     @staticmethod
@@ -18,9 +41,128 @@ class ReviewFacade:
             created_at=datetime.utcnow()
         )
         db.session.add(review)
-        db.session.commit()
+        try:
+            db.session.commit()
+        except IntegrityError as e:
+            db.session.rollback()
+            # Contrainte unique (user_id, place_id) : pas de lecture préalable ;
+            # les autres violations (clé étrangère, NOT NULL...) remontent
+            if not _is_duplicate_review(e):
+                raise
+            raise ValueError("You have already reviewed this place.")
         return review
 
+    @staticmethod
+    def is_eligible(user_id, place_id, now=None):
+        """
+        L'utilisateur a-t-il terminé un séjour sur la place depuis au moins
+        REVIEW_DELAY ? Lecture par clé primaire de review_eligibility.
+        """
+        eligible_from = db.session.query(ReviewEligibility.eligible_from).filter(
+            ReviewEligibility.user_id == user_id,
+            ReviewEligibility.place_id == place_id,
+        ).scalar()
+        return eligible_from is not None and eligible_from <= (now or datetime.utcnow())
+
+    @staticmethod
+    def backfill_eligibility(batch_size=5000):
+        """
+        Recalcule review_eligibility depuis les réservations (table chaude
+        et archive) : un GROUP BY (user_id, place_id), inséré par lots.
+        Retourne le nombre de couples éligibles.
+        """
+        stays = union_all(*[
+            select(entity.user_id, entity.place_id, entity.end_datetime)
+            for entity in (Reservation, ArchivedReservation)
+        ]).subquery()
+        grouped = (select(stays.c.user_id, stays.c.place_id, func.min(stays.c.end_datetime))
+                   .group_by(stays.c.user_id, stays.c.place_id))
+
+        db.session.execute(ReviewEligibility.__table__.delete())
+        count, batch = 0, []
+        connection = db.session.connection()
+        for user_id, place_id, first_end in connection.execute(grouped).all():
+            batch.append({"user_id": user_id, "place_id": place_id,
+                          "eligible_from": first_end + REVIEW_DELAY})
+            if len(batch) == batch_size:
+                connection.execute(ReviewEligibility.__table__.insert(), batch)
+                count += len(batch)
+                batch = []
+        if batch:
+            connection.execute(ReviewEligibility.__table__.insert(), batch)
+            count += len(batch)
+        db.session.commit()
+        return count
+
+    @staticmethod
+    def serialize(review, username=None, avatar=None):
+        """Avis + auteur (nom, photo) au format des réponses de l'API"""
+        return {
+            "id": review.id,
+            "comment": review.comment,
+            "rating": review.rating,
+            "user_id": review.user_id,
+            "user_name": username or DEFAULT_USER_NAME,
+            "user_photo": avatar or DEFAULT_USER_PHOTO,
+            "place_id": review.place_id,
+            "created_at": review.created_at.isoformat() if review.created_at else None,
+        }
+
+    @staticmethod
+    def get_review(review_id, place_id=None):
+        """Un avis sérialisé avec son auteur (une requête), ou None"""
+        statement = (select(Review, User.username, User.avatar)
+                     .outerjoin(User, User.id == Review.user_id)
+                     .where(Review.id == review_id))
+        if place_id is not None:
+            statement = statement.where(Review.place_id == place_id)
+        row = db.session.execute(statement).first()
+        return ReviewFacade.serialize(*row) if row else None
+
+    @staticmethod
+    def _parse_cursor(after):
+        """Décode un curseur 'created_at:id' (date au format ISO)"""
+        try:
+            created_at, review_id = after.rsplit(":", 1)
+            return datetime.fromisoformat(created_at), int(review_id)
+        except (AttributeError, ValueError):
+            raise ValueError("Invalid cursor")
+
+    @staticmethod
+    def get_reviews_page(place_id=None, user_id=None, limit=DEFAULT_PAGE_SIZE, after=None):
+        """
+        Page d'avis, les plus récents d'abord, en pagination par curseur
+        (created_at, id) servie par les index (place_id, created_at) et
+        (user_id, created_at). Les auteurs viennent de la même requête
+        (jointure sur users) : une requête par page quel que soit le nombre
+        d'avis. Retourne (avis sérialisés, next_cursor).
+        """
+        if limit is None or limit < 1:
+            raise ValueError("limit must be a positive integer")
+        limit = min(limit, MAX_PAGE_SIZE)
+
+        statement = select(Review, User.username, User.avatar).outerjoin(User, User.id == Review.user_id)
+        if place_id is not None:
+            statement = statement.where(Review.place_id == place_id)
+        if user_id is not None:
+            statement = statement.where(Review.user_id == user_id)
+        if after:
+            created_at, review_id = ReviewFacade._parse_cursor(after)
+            statement = statement.where(or_(
+                Review.created_at < created_at,
+                and_(Review.created_at == created_at, Review.id < review_id)
+            ))
+        statement = statement.order_by(Review.created_at.desc(), Review.id.desc())
+
+        # Une ligne de plus pour savoir s'il existe une page suivante
+        rows = db.session.execute(statement.limit(limit + 1)).all()
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1].Review
+            next_cursor = f"{last.created_at.isoformat()}:{last.id}"
+        return [ReviewFacade.serialize(*row) for row in rows], next_cursor
+
     @staticmethod
     def get_reviews_by_place(place_id):
         return Review.query.filter_by(place_id=place_id).order_by(Review.created_at.desc()).all()
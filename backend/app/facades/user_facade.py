@@ -1,7 +1,6 @@
 # facades/user_facade.py
 from flask import abort
-from werkzeug.security import generate_password_hash
-from app.extensions import db
+from app.extensions import db, password_hasher, user_cache
 from app.models import User
 from sqlalchemy import or_
 
@@ -31,7 +30,7 @@ class UserFacade:
         if not password or len(password) < 6:
             raise ValueError("Password must be at least 6 characters long.")
 
-        hashed_password = generate_password_hash(password)
+        hashed_password = password_hasher.hash(password)
         new_user = User(
             username=username,
             email=email,
@@ -86,6 +85,7 @@ class UserFacade:
             user.is_admin = kwargs['is_admin']
 
         db.session.commit()
+        user_cache.invalidate(user.id)
         return user
 
     @staticmethod
@@ -95,6 +95,7 @@ class UserFacade:
             abort(404, "User not found")
         db.session.delete(user)
         db.session.commit()
+        user_cache.invalidate(user_id)
         return True
 
     @staticmethod
@@ -0,0 +1,131 @@
+# app/fulltext.py
+"""
+Recherche plein texte sur les places (nom, description, ville, pays).
+
+- SQLite : table virtuelle FTS5 `places_fts` à contenu externe, tenue à jour
+  par des triggers sur `places` (insert / update / delete), donc de façon
+  incrémentale, sans réindexation périodique.
+- PostgreSQL : index GIN sur l'expression tsvector, que Postgres maintient
+  lui-même à chaque écriture.
+
+install_fulltext() est idempotente : elle est appelée à la création de la
+table `places` et par create_tables.py pour les bases existantes.
+"""
+import re
+
+from sqlalchemy import event, text
+
+SNIPPET_START = "<mark>"
+SNIPPET_END = "</mark>"
+PG_TS_CONFIG = "simple"
+
+_PG_DOCUMENT = (
+    f"setweight(to_tsvector('{PG_TS_CONFIG}', coalesce(name, '')), 'A') || "
+    f"setweight(to_tsvector('{PG_TS_CONFIG}', coalesce(town, '') || ' ' || coalesce(country, '')), 'B') || "
+    f"setweight(to_tsvector('{PG_TS_CONFIG}', coalesce(description, '')), 'C')"
+)
+
+_SQLITE_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS places_fts USING fts5(
+        name, description, town, country,
+        content='places', content_rowid='id'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS places_fts_ai AFTER INSERT ON places BEGIN
+        INSERT INTO places_fts(rowid, name, description, town, country)
+        VALUES (new.id, new.name, new.description, new.town, new.country);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS places_fts_ad AFTER DELETE ON places BEGIN
+        INSERT INTO places_fts(places_fts, rowid, name, description, town, country)
+        VALUES ('delete', old.id, old.name, old.description, old.town, old.country);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS places_fts_au AFTER UPDATE OF name, description, town, country ON places BEGIN
+        INSERT INTO places_fts(places_fts, rowid, name, description, town, country)
+        VALUES ('delete', old.id, old.name, old.description, old.town, old.country);
+        INSERT INTO places_fts(rowid, name, description, town, country)
+        VALUES (new.id, new.name, new.description, new.town, new.country);
+    END
+    """,
+]
+
+_PG_DDL = [
+    f"CREATE INDEX IF NOT EXISTS ix_places_fulltext ON places USING GIN (({_PG_DOCUMENT}))",
+]
+
+
+def install_fulltext(connection):
+    """Crée l'index plein texte adapté au dialecte s'il n'existe pas"""
+    dialect = connection.dialect.name
+    if dialect == "sqlite":
+        existed = connection.execute(text(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'places_fts'"
+        )).first()
+        for statement in _SQLITE_DDL:
+            connection.execute(text(statement))
+        if not existed:
+            # Indexe une seule fois les places déjà présentes
+            connection.execute(text("INSERT INTO places_fts(places_fts) VALUES ('rebuild')"))
+    elif dialect == "postgresql":
+        for statement in _PG_DDL:
+            connection.execute(text(statement))
+
+
+def _after_places_create(target, connection, **kw):
+    install_fulltext(connection)
+
+
+def register(places_table):
+    event.listen(places_table, "after_create", _after_places_create)
+
+
+def _terms(query):
+    return re.findall(r"\w+", query or "")
+
+
+def search(session, query, limit):
+    """
+    Recherche classée : liste de (place_id, score, extrait surligné), du plus
+    pertinent au moins pertinent. Sur les autres dialectes, repli sur un
+    LIKE non classé.
+    """
+    terms = _terms(query)
+    if not terms:
+        return []
+    dialect = session.get_bind().dialect.name
+
+    if dialect == "sqlite":
+        # Chaque mot est cité (pas de syntaxe FTS5 côté client), le dernier
+        # sert de préfixe pour la saisie en cours
+        match = " ".join(f'"{term}"' for term in terms) + "*"
+        rows = session.execute(text(
+            "SELECT rowid, bm25(places_fts, 10.0, 1.0, 4.0, 4.0) AS score, "
+            "snippet(places_fts, -1, :start, :end, '…', 16) AS snippet "
+            "FROM places_fts WHERE places_fts MATCH :match "
+            "ORDER BY score LIMIT :limit"
+        ), {"match": match, "start": SNIPPET_START, "end": SNIPPET_END, "limit": limit})
+        # bm25 est négatif : plus petit = plus pertinent
+        return [(row.rowid, -row.score, row.snippet) for row in rows]
+
+    if dialect == "postgresql":
+        tsquery = " & ".join(terms) + ":*"
+        rows = session.execute(text(
+            f"SELECT id, ts_rank({_PG_DOCUMENT}, q) AS score, "
+            f"ts_headline('{PG_TS_CONFIG}', coalesce(description, name), q, "
+            f"'StartSel={SNIPPET_START}, StopSel={SNIPPET_END}, MaxWords=20, MinWords=8') AS snippet "
+            f"FROM places, to_tsquery('{PG_TS_CONFIG}', :tsquery) AS q "
+            f"WHERE {_PG_DOCUMENT} @@ q ORDER BY score DESC, id LIMIT :limit"
+        ), {"tsquery": tsquery, "limit": limit})
+        return [(row.id, row.score, row.snippet) for row in rows]
+
+    pattern = f"%{' '.join(terms)}%"
+    rows = session.execute(text(
+        "SELECT id, description FROM places WHERE name LIKE :p OR description LIKE :p "
+        "OR town LIKE :p OR country LIKE :p ORDER BY id LIMIT :limit"
+    ), {"p": pattern, "limit": limit})
+    return [(row.id, 0.0, row.description) for row in rows]
@@ -0,0 +1,89 @@
+# app/geo.py
+"""
+Index géographique en grille pour SQLite sans extension.
+
+La surface du globe est découpée en cellules de GEO_CELL_DEG degrés ; chaque
+place stocke le numéro de sa cellule (`Place.geo_cell`, indexé). Une zone
+rectangulaire se traduit alors en quelques intervalles contigus de cellules
+(un par rangée de latitude), interrogés avec des BETWEEN sur l'index.
+"""
+import math
+
+GEO_CELL_DEG = 0.1  # ~11 km en latitude
+_COLUMNS = int(round(360 / GEO_CELL_DEG))
+_ROWS = int(round(180 / GEO_CELL_DEG))
+EARTH_RADIUS_KM = 6371.0088
+
+# Au-delà, la zone est trop grande pour énumérer les rangées : on se contente
+# d'un filtre sur latitude/longitude
+MAX_CELL_ROWS = 200
+
+
+def _row(latitude):
+    return min(_ROWS - 1, max(0, int(math.floor((latitude + 90) / GEO_CELL_DEG))))
+
+
+def _column(longitude):
+    return min(_COLUMNS - 1, max(0, int(math.floor((longitude + 180) / GEO_CELL_DEG))))
+
+
+def cell_for(latitude, longitude):
+    """Numéro de cellule d'un point, None si les coordonnées sont absentes"""
+    if latitude is None or longitude is None:
+        return None
+    return _row(latitude) * _COLUMNS + _column(longitude)
+
+
+def cell_ranges(min_lat, min_lng, max_lat, max_lng):
+    """
+    Intervalles [début, fin] de cellules couvrant le rectangle, ou None si la
+    zone couvre trop de rangées. Une zone qui traverse l'antiméridien
+    (min_lng > max_lng) donne deux intervalles par rangée.
+    """
+    first_row, last_row = _row(min_lat), _row(max_lat)
+    if last_row - first_row + 1 > MAX_CELL_ROWS:
+        return None
+
+    if min_lng <= max_lng:
+        column_spans = [(_column(min_lng), _column(max_lng))]
+    else:
+        column_spans = [(_column(min_lng), _COLUMNS - 1), (0, _column(max_lng))]
+
+    return [
+        (row * _COLUMNS + first, row * _COLUMNS + last)
+        for row in range(first_row, last_row + 1)
+        for first, last in column_spans
+    ]
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    """Distance orthodromique en kilomètres"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lng2 - lng1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def radius_bbox(latitude, longitude, radius_km):
+    """
+    Rectangle (min_lat, min_lng, max_lat, max_lng) englobant un cercle.
+    L'écart en longitude est celui du point le plus large du cercle (côté
+    pôle, pas à la latitude du centre) : asin(sin(r / R) / cos(lat)).
+    """
+    angle = radius_km / EARTH_RADIUS_KM
+    dlat = math.degrees(angle)
+    min_lat, max_lat = max(-90.0, latitude - dlat), min(90.0, latitude + dlat)
+    sin_lng = math.sin(angle) / max(math.cos(math.radians(latitude)), 1e-12)
+    # Le cercle contient un pôle : toutes les longitudes
+    if min_lat <= -90 or max_lat >= 90 or angle >= math.pi / 2 or sin_lng >= 1:
+        return min_lat, -180.0, max_lat, 180.0
+
+    dlng = math.degrees(math.asin(sin_lng))
+    min_lng, max_lng = longitude - dlng, longitude + dlng
+    # Repli autour de l'antiméridien
+    if min_lng < -180:
+        min_lng += 360
+    if max_lng > 180:
+        max_lng -= 360
+    return min_lat, min_lng, max_lat, max_lng
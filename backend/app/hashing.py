@@ -0,0 +1,119 @@
+# app/hashing.py
+"""
+Hachage des mots de passe hors du thread de la requête.
+
+Le calcul (scrypt / pbkdf2 de Werkzeug) est confié à un pool de processus
+borné (PASSWORD_HASH_WORKERS) : une rafale de connexions occupe le pool, pas
+les workers web. Au-delà de PASSWORD_HASH_MAX_PENDING calculs en cours, un
+appel attend au plus PASSWORD_HASH_WAIT secondes une place puis est refusé
+en 503 (HashingBusy, avec Retry-After) au lieu d'allonger la file.
+
+PASSWORD_HASH_METHOD fixe l'algorithme et son coût, au format des empreintes
+Werkzeug (ex. "scrypt:32768:8:1", "pbkdf2:sha256:600000") ; une forme
+courte ("scrypt", "pbkdf2") est complétée avec les paramètres par défaut de
+Werkzeug. Une empreinte d'un autre format est recalculée lors de la
+connexion réussie suivante.
+"""
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from werkzeug.exceptions import ServiceUnavailable
+from werkzeug.security import generate_password_hash, check_password_hash
+
+
+class HashingBusy(ServiceUnavailable):
+    description = "Password hashing is busy, please retry shortly."
+
+
+def normalize_method(method):
+    """
+    Méthode complète, telle que préfixée aux empreintes ("scrypt" ->
+    "scrypt:32768:8:1") : c'est elle que _verify compare au préfixe stocké
+    """
+    return generate_password_hash("", method=method).split("$", 1)[0]
+
+
+def _hash(password, method):
+    return generate_password_hash(password, method=method)
+
+
+def _verify(pwhash, password, method):
+    """(valide, nouvelle empreinte si `pwhash` n'utilise pas `method`)"""
+    if not check_password_hash(pwhash, password):
+        return False, None
+    if pwhash.split("$", 1)[0] != method:
+        return True, generate_password_hash(password, method=method)
+    return True, None
+
+
+class PasswordHasher:
+    """Extension Flask ; PASSWORD_HASH_WORKERS = 0 calcule dans le thread appelant"""
+
+    def __init__(self):
+        self.method = "scrypt:32768:8:1"
+        self.workers = 0
+        self.max_pending = 0
+        self.wait = 0.5
+        self._pool = None
+        self._pid = None
+        self._slots = None
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.shed = 0
+        self.upgraded = 0
+
+    def init_app(self, app):
+        self.method = normalize_method(app.config.get("PASSWORD_HASH_METHOD", self.method))
+        workers = app.config.get("PASSWORD_HASH_WORKERS")
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        self.max_pending = app.config.get("PASSWORD_HASH_MAX_PENDING") or self.workers * 4
+        self.wait = app.config.get("PASSWORD_HASH_WAIT", 0.5)
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        app.extensions["password_hasher"] = self
+
+    def _executor(self):
+        # Créé au premier calcul, et à nouveau dans un processus forké.
+        # "spawn" : les processus du pool ne copient pas les threads du serveur
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._pool = ProcessPoolExecutor(
+                        self.workers, mp_context=multiprocessing.get_context("spawn"))
+                    self._pid = os.getpid()
+        return self._pool
+
+    def _run(self, fn, *args):
+        if not self.workers:
+            return fn(*args)
+        if not self._slots.acquire(timeout=self.wait):
+            with self._lock:
+                self.shed += 1
+            raise HashingBusy(retry_after=1)
+        with self._lock:
+            self.in_flight += 1
+        try:
+            return self._executor().submit(fn, *args).result()
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+            self._slots.release()
+
+    def hash(self, password):
+        return self._run(_hash, password, self.method)
+
+    def verify(self, pwhash, password):
+        """
+        (valide, nouvelle empreinte) ; la nouvelle empreinte n'est renseignée
+        que si l'ancienne utilise un autre algorithme ou un autre coût
+        """
+        valid, upgraded = self._run(_verify, pwhash, password, self.method)
+        if upgraded:
+            with self._lock:
+                self.upgraded += 1
+        return valid, upgraded
+
+    def stats(self):
+        return {"method": self.method, "workers": self.workers, "max_pending": self.max_pending,
+                "in_flight": self.in_flight, "shed": self.shed, "upgraded": self.upgraded}
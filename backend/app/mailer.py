@@ -0,0 +1,213 @@
+# app/mailer.py
+"""
+File d'envoi des e-mails sortants (codes 2FA).
+
+Les routes mettent le message en file et répondent aussitôt ; des threads
+d'envoi (MAIL_QUEUE_WORKERS) le remettent au serveur SMTP. Chaque thread
+garde sa connexion authentifiée ouverte entre deux messages (fermée après
+MAIL_IDLE_TIMEOUT secondes d'inactivité) : STARTTLS et AUTH ne sont payés
+qu'une fois par connexion et non plus à chaque connexion utilisateur.
+
+Un échec temporaire (réseau, code 4xx) est réessayé MAIL_MAX_RETRIES fois
+avec un délai exponentiel (MAIL_RETRY_BACKOFF * 2**essai) ; un refus
+définitif (5xx) ne l'est pas.
+"""
+import os
+import queue
+import smtplib
+import threading
+import time
+from collections import deque
+from email.message import EmailMessage
+
+LATENCY_SAMPLES = 1000
+
+
+class MailQueue:
+    """Extension Flask : file bornée + threads d'envoi démarrés au premier message"""
+
+    def __init__(self):
+        self.server = None
+        self.port = 587
+        self.use_tls = True
+        self.use_ssl = False
+        self.username = None
+        self.password = None
+        self.sender = None
+        self.workers = 2
+        self.max_retries = 3
+        self.backoff = 1.0
+        self.idle_timeout = 30
+        self.timeout = 10
+        self._queue = queue.Queue()
+        self._threads = []
+        self._pid = None
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._pending = 0
+        self.sent = 0
+        self.failed = 0
+        self.retried = 0
+        self.rejected = 0
+        self.connections = 0
+        self._latencies = deque(maxlen=LATENCY_SAMPLES)
+
+    def init_app(self, app):
+        config = app.config
+        self.server = config.get("MAIL_SERVER")
+        self.port = config.get("MAIL_PORT", 587)
+        self.use_tls = config.get("MAIL_USE_TLS", True)
+        self.use_ssl = config.get("MAIL_USE_SSL", False)
+        self.username = config.get("MAIL_USERNAME")
+        self.password = config.get("MAIL_PASSWORD")
+        self.sender = config.get("MAIL_DEFAULT_SENDER") or self.username
+        self.workers = config.get("MAIL_QUEUE_WORKERS", 2)
+        self.max_retries = config.get("MAIL_MAX_RETRIES", 3)
+        self.backoff = config.get("MAIL_RETRY_BACKOFF", 1.0)
+        self.idle_timeout = config.get("MAIL_IDLE_TIMEOUT", 30)
+        self._queue = queue.Queue(maxsize=config.get("MAIL_QUEUE_MAXSIZE", 1000))
+        app.extensions["mail_queue"] = self
+
+    # =================== PRODUCTEUR ===================
+
+    def send(self, to, subject, body):
+        """Met un message en file ; False si la file est pleine"""
+        msg = EmailMessage()
+        msg["Subject"] = subject
+        msg["From"] = f"HBNB <{self.sender}>"
+        msg["To"] = to
+        msg.set_content(body)
+
+        self._ensure_workers()
+        with self._lock:
+            self._pending += 1
+        try:
+            self._queue.put_nowait((msg, 0, time.monotonic()))
+        except queue.Full:
+            self._done(rejected=True)
+            return False
+        return True
+
+    def flush(self, timeout=None):
+        """Attend que tous les messages soient envoyés ou abandonnés"""
+        with self._idle:
+            return self._idle.wait_for(lambda: self._pending == 0, timeout)
+
+    def _ensure_workers(self):
+        # Démarrage paresseux, et à nouveau dans un processus forké
+        # (les threads du parent n'y existent pas)
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._threads = [threading.Thread(target=self._run, name=f"mail-{i}", daemon=True)
+                             for i in range(self.workers)]
+            for thread in self._threads:
+                thread.start()
+            self._pid = os.getpid()
+
+    def _done(self, sent=False, rejected=False, latency=None):
+        with self._idle:
+            self._pending -= 1
+            if sent:
+                self.sent += 1
+                self._latencies.append(latency)
+            elif rejected:
+                self.rejected += 1
+            else:
+                self.failed += 1
+            self._idle.notify_all()
+
+    # =================== THREADS D'ENVOI ===================
+
+    def _connect(self):
+        factory = smtplib.SMTP_SSL if self.use_ssl else smtplib.SMTP
+        connection = factory(self.server, self.port, timeout=self.timeout)
+        try:
+            if self.use_tls and not self.use_ssl:
+                connection.starttls()
+            if self.username and self.password:
+                connection.login(self.username, self.password)
+        except Exception:
+            connection.close()
+            raise
+        with self._lock:
+            self.connections += 1
+        return connection
+
+    @staticmethod
+    def _close(connection):
+        try:
+            connection.quit()
+        except (smtplib.SMTPException, OSError):
+            connection.close()
+
+    def _retry_later(self, msg, attempt, enqueued_at):
+        with self._lock:
+            self.retried += 1
+        delay = self.backoff * 2 ** attempt
+        timer = threading.Timer(delay, self._queue.put, args=((msg, attempt + 1, enqueued_at),))
+        timer.daemon = True
+        timer.start()
+
+    def _run(self):
+        connection = None
+        while True:
+            try:
+                msg, attempt, enqueued_at = self._queue.get(timeout=self.idle_timeout)
+            except queue.Empty:
+                if connection is not None:
+                    self._close(connection)
+                    connection = None
+                continue
+
+            try:
+                if connection is None:
+                    connection = self._connect()
+                try:
+                    connection.send_message(msg)
+                except smtplib.SMTPServerDisconnected:
+                    # Connexion du pool fermée par le serveur : on rouvre sans compter d'essai
+                    connection = None
+                    connection = self._connect()
+                    connection.send_message(msg)
+            except (smtplib.SMTPException, OSError) as error:
+                answered = isinstance(error, (smtplib.SMTPResponseException, smtplib.SMTPRecipientsRefused))
+                if not answered and connection is not None:
+                    # Sans réponse du serveur, l'état de la connexion est inconnu
+                    self._close(connection)
+                    connection = None
+                permanent = isinstance(error, smtplib.SMTPRecipientsRefused) \
+                    or getattr(error, "smtp_code", 0) >= 500
+                if not permanent and attempt < self.max_retries:
+                    self._retry_later(msg, attempt, enqueued_at)
+                else:
+                    self._done()
+            else:
+                self._done(sent=True, latency=(time.monotonic() - enqueued_at) * 1000)
+            finally:
+                self._queue.task_done()
+
+    # =================== MÉTRIQUES ===================
+
+    def stats(self):
+        with self._lock:
+            latencies = sorted(self._latencies)
+
+        def pct(p):
+            return round(latencies[min(len(latencies) - 1, int(p / 100 * len(latencies)))], 2) \
+                if latencies else None
+
+        return {
+            "depth": self._queue.qsize(),
+            "pending": self._pending,
+            "workers": self.workers,
+            "sent": self.sent,
+            "failed": self.failed,
+            "retried": self.retried,
+            "rejected": self.rejected,
+            "connections": self.connections,
+            "latency_ms_p50": pct(50),
+            "latency_ms_p95": pct(95),
+        }
@@ -4,9 +4,13 @@ from app.extensions import db  # ⚡ utiliser l'unique instance de SQLAlchemy
 from .user import User
 from .place import Place, PlaceImage
 from .amenity import Amenity
-from .reservation import Reservation
+from .reservation import Reservation, ArchivedReservation, ReviewEligibility
 from .review import Review
 from .associations import place_amenities
+from .generation import Generation
+from .facet import PlaceFacet
+from .analytics import PlaceDailyStat
+from .two_factor import TwoFactorCode
 
 __all__ = [
     "db",
@@ -15,6 +19,12 @@ __all__ = [
     "PlaceImage",
     "Amenity",
     "Reservation",
+    "ArchivedReservation",
+    "ReviewEligibility",
     "Review",
-    "place_amenities"
+    "place_amenities",
+    "Generation",
+    "PlaceFacet",
+    "PlaceDailyStat",
+    "TwoFactorCode"
 ]
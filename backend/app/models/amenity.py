@@ -1,5 +1,11 @@
 # models/amenity.py
+from sqlalchemy import event, select
+from sqlalchemy.orm import object_session
+
 from app.extensions import db
+from .associations import place_amenities
+from .place import FACETS_GENERATION, bump_place_version
+from .generation import bump_generation
 
 class Amenity(db.Model):
     """Équipements disponibles pour les lieux (Wi-Fi, piscine, etc.)"""
@@ -17,3 +23,31 @@ class Amenity(db.Model):
 
     def __repr__(self):
         return f"<Amenity id={self.id} name={self.name}>"
+
+
+def _linked_place_ids(amenity):
+    return select(place_amenities.c.place_id).where(place_amenities.c.amenity_id == amenity.id)
+
+
+@event.listens_for(Amenity, "after_update")
+def _amenity_renamed(mapper, connection, amenity):
+    bump_place_version(connection, _linked_place_ids(amenity))
+
+
+@event.listens_for(Amenity, "before_delete")
+def _amenity_deleted(mapper, connection, amenity):
+    # Les liens de place_amenities sont déjà supprimés à ce stade : on
+    # utilise la collection que le flush a chargée pour les effacer
+    place_ids = [place.id for place in amenity.places]
+    bump_place_version(connection, place_ids)
+    if place_ids:
+        bump_generation(connection, FACETS_GENERATION)
+
+
+@event.listens_for(Amenity, "after_insert")
+@event.listens_for(Amenity, "after_update")
+@event.listens_for(Amenity, "after_delete")
+def _amenity_catalog_changed(mapper, connection, amenity):
+    from app.amenity_catalog import GENERATION, amenity_catalog
+    bump_generation(connection, GENERATION)
+    amenity_catalog.invalidate(object_session(amenity))
@@ -0,0 +1,87 @@
+# models/analytics.py
+from datetime import datetime, time, timedelta
+
+from sqlalchemy.dialects import postgresql, sqlite
+
+from app.extensions import db
+
+SECONDS_PER_DAY = 86400
+
+class PlaceDailyStat(db.Model):
+    """
+    Occupation et revenu d'une place pour un jour : secondes réservées ce
+    jour-là et part du prix des séjours correspondante. Tenu à jour à chaque
+    écriture de Reservation (voir models/reservation.py) ;
+    backfill_analytics.py le recalcule depuis les réservations.
+    """
+    __tablename__ = "place_daily_stats"
+
+    place_id = db.Column(db.Integer, db.ForeignKey("places.id"), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    booked_seconds = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Float, nullable=False, default=0.0)
+
+    def __repr__(self):
+        return f"<PlaceDailyStat place={self.place_id} day={self.day} booked={self.booked_seconds}s>"
+
+
+def split_stay(start, end):
+    """Découpe [start, end[ par jour : [(jour, secondes)]"""
+    parts = []
+    day = start.date()
+    while start < end:
+        next_day = datetime.combine(day + timedelta(days=1), time.min)
+        stop = min(end, next_day)
+        parts.append((day, int((stop - start).total_seconds())))
+        start, day = stop, day + timedelta(days=1)
+    return parts
+
+
+def apply_stays(connection, stays):
+    """
+    Ajoute (sign=1) ou retire (sign=-1) des séjours des statistiques
+    journalières. `stays` : [(place_id, start, end, price_by_night, sign)].
+    Les deltas sont regroupés par (place, jour) puis appliqués par un upsert
+    relatif en executemany, dans la transaction de l'écriture : pas de
+    lecture préalable, donc pas de mise à jour perdue. Le revenu utilise le
+    prix enregistré sur la réservation : retirer un séjour retire exactement
+    ce que son ajout avait compté.
+    """
+    stays = [stay for stay in stays if stay[0] is not None and stay[1] and stay[2]]
+    if not stays:
+        return
+
+    deltas = {}
+    for place_id, start, end, price, sign in stays:
+        price = price or 0
+        for day, seconds in split_stay(start, end):
+            booked, revenue = deltas.get((place_id, day), (0, 0.0))
+            deltas[(place_id, day)] = (booked + sign * seconds,
+                                       revenue + sign * seconds * price / SECONDS_PER_DAY)
+    rows = [{"place_id": place_id, "day": day, "booked_seconds": booked, "revenue": revenue}
+            for (place_id, day), (booked, revenue) in deltas.items() if booked or revenue]
+    if not rows:
+        return
+
+    table = PlaceDailyStat.__table__
+    dialect = connection.dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        insert = sqlite.insert if dialect == "sqlite" else postgresql.insert
+        statement = insert(table)
+        statement = statement.on_conflict_do_update(
+            index_elements=["place_id", "day"],
+            set_={"booked_seconds": table.c.booked_seconds + statement.excluded.booked_seconds,
+                  "revenue": table.c.revenue + statement.excluded.revenue},
+        )
+        connection.execute(statement, rows)
+        return
+    # Autres bases : mise à jour relative, insertion si la ligne n'existe pas
+    for row in rows:
+        result = connection.execute(
+            table.update()
+            .where(table.c.place_id == row["place_id"], table.c.day == row["day"])
+            .values(booked_seconds=table.c.booked_seconds + row["booked_seconds"],
+                    revenue=table.c.revenue + row["revenue"])
+        )
+        if not result.rowcount:
+            connection.execute(table.insert(), row)
@@ -5,5 +5,7 @@ from app.extensions import db
 place_amenities = db.Table(
     "place_amenities",
     db.Column("place_id", db.Integer, db.ForeignKey("places.id"), primary_key=True),
-    db.Column("amenity_id", db.Integer, db.ForeignKey("amenities.id"), primary_key=True)
+    db.Column("amenity_id", db.Integer, db.ForeignKey("amenities.id"), primary_key=True),
+    # Index inverse pour la recherche "places ayant tous ces équipements"
+    db.Index("ix_place_amenities_amenity_id_place_id", "amenity_id", "place_id")
 )
@@ -0,0 +1,18 @@
+# models/facet.py
+from app.extensions import db
+
+class PlaceFacet(db.Model):
+    """
+    Agrégat précalculé des facettes du catalogue complet (sans filtre) :
+    une ligne par valeur de facette. `generation` est la génération
+    "place-facets" au moment du calcul (voir PlaceFacade.facet_rollup).
+    """
+    __tablename__ = "place_facets"
+
+    facet = db.Column(db.String(32), primary_key=True)  # total, country, town, price, amenity
+    value = db.Column(db.String(128), primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+    generation = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<PlaceFacet {self.facet}:{self.value}={self.count}>"
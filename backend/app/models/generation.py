@@ -0,0 +1,42 @@
+# models/generation.py
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql, sqlite
+
+from app.extensions import db
+
+class Generation(db.Model):
+    """Compteur de génération partagé entre workers (ex. catalogue des équipements)"""
+    __tablename__ = "generations"
+
+    name = db.Column(db.String(64), primary_key=True)
+    value = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<Generation {self.name}={self.value}>"
+
+
+def read_generation(connection, name):
+    """Valeur courante du compteur (0 s'il n'existe pas encore)"""
+    table = Generation.__table__
+    value = connection.execute(select(table.c.value).where(table.c.name == name)).scalar()
+    return value or 0
+
+
+def bump_generation(connection, name):
+    """Incrémente le compteur dans la transaction courante (le crée au besoin)"""
+    table = Generation.__table__
+    result = connection.execute(
+        table.update().where(table.c.name == name).values(value=table.c.value + 1)
+    )
+    if result.rowcount:
+        return
+    dialect = connection.dialect.name
+    if dialect == "sqlite":
+        statement = sqlite.insert(table).on_conflict_do_update(
+            index_elements=["name"], set_={"value": table.c.value + 1})
+    elif dialect == "postgresql":
+        statement = postgresql.insert(table).on_conflict_do_update(
+            index_elements=["name"], set_={"value": table.c.value + 1})
+    else:
+        statement = table.insert()
+    connection.execute(statement, {"name": name, "value": 1})
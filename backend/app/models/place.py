@@ -1,10 +1,32 @@
 # models/place.py
+from datetime import datetime
+
+from sqlalchemy import event, inspect
+
+from app import fulltext
 from app.extensions import db
+from app.geo import cell_for
 from .associations import place_amenities
+from .generation import bump_generation
+
+RATING_STARS = (1, 2, 3, 4, 5)
+# Génération incrémentée à chaque écriture qui change les facettes du
+# catalogue (prix, ville, pays, équipements) : invalide place_facets
+FACETS_GENERATION = "place-facets"
+FACET_ATTRIBUTES = ("price_by_night", "town", "country", "amenities")
 
 class Place(db.Model):
     """Lieu proposé à la location (maison, appartement, etc.)"""
     __tablename__ = "places"
+    __table_args__ = (
+        # Pagination par curseur triée par prix (prix, id)
+        db.Index("ix_places_price_by_night_id", "price_by_night", "id"),
+        # Recherche par ville / pays avec fourchette de prix
+        db.Index("ix_places_town_price_by_night", "town", "price_by_night"),
+        db.Index("ix_places_country_price_by_night", "country", "price_by_night"),
+        # Tri par note moyenne (pagination par curseur)
+        db.Index("ix_places_rating_avg_id", "rating_avg", "id"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(128), nullable=False)
@@ -15,6 +37,30 @@ class Place(db.Model):
     town = db.Column(db.String(128))
     latitude = db.Column(db.Float)
     longitude = db.Column(db.Float)
+    # Cellule de la grille géographique (voir app/geo.py), tenue à jour à
+    # chaque insertion / modification
+    geo_cell = db.Column(db.Integer, index=True)
+
+    # Agrégats des avis, tenus à jour à chaque écriture de Review (voir
+    # models/review.py) ; reconcile_ratings.py les recalcule au besoin
+    rating_sum = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    rating_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    rating_avg = db.Column(db.Float, nullable=False, default=0.0, server_default="0")
+    rating_1 = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    rating_2 = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    rating_3 = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    rating_4 = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    rating_5 = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+
+    # Versions pour les GET conditionnels (ETag / Last-Modified) :
+    # `version` change avec la place, ses équipements, images et avis,
+    # `reservations_version` avec ses réservations (voir bump_place_version)
+    version = db.Column(db.Integer, nullable=False, default=1, server_default="1")
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow,
+                           server_default=db.func.current_timestamp())
+    reservations_version = db.Column(db.Integer, nullable=False, default=1, server_default="1")
+    reservations_updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow,
+                                        server_default=db.func.current_timestamp())
 
     owner_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
 
@@ -30,6 +76,50 @@ class Place(db.Model):
     def __repr__(self):
         return f"<Place id={self.id} name={self.name}>"
 
+@event.listens_for(Place, "before_insert")
+@event.listens_for(Place, "before_update")
+def _sync_geo_cell(mapper, connection, place):
+    place.geo_cell = cell_for(place.latitude, place.longitude)
+
+@event.listens_for(Place, "before_update")
+def _bump_own_version(mapper, connection, place):
+    # Aussi appelé quand seule la collection amenities a changé
+    place.version = Place.version + 1
+    place.updated_at = datetime.utcnow()
+
+@event.listens_for(Place, "after_insert")
+@event.listens_for(Place, "after_delete")
+def _place_facets_changed(mapper, connection, place):
+    bump_generation(connection, FACETS_GENERATION)
+
+@event.listens_for(Place, "after_update")
+def _place_facets_updated(mapper, connection, place):
+    state = inspect(place)
+    if any(state.attrs[name].history.has_changes() for name in FACET_ATTRIBUTES):
+        bump_generation(connection, FACETS_GENERATION)
+
+def bump_place_version(connection, place_ids, reservations=False):
+    """
+    Incrémente la version (ou reservations_version) des places données,
+    dans la transaction de l'écriture qui les modifie. `place_ids` peut
+    être une liste d'ids ou une sous-requête.
+    """
+    if isinstance(place_ids, (list, tuple, set)):
+        place_ids = [place_id for place_id in place_ids if place_id is not None]
+        if not place_ids:
+            return
+    places = Place.__table__
+    if reservations:
+        values = {places.c.reservations_version: places.c.reservations_version + 1,
+                  places.c.reservations_updated_at: datetime.utcnow()}
+    else:
+        values = {places.c.version: places.c.version + 1,
+                  places.c.updated_at: datetime.utcnow()}
+    connection.execute(places.update().where(places.c.id.in_(place_ids)).values(values))
+
+# Index plein texte (FTS5 / tsvector) créé avec la table
+fulltext.register(Place.__table__)
+
 class PlaceImage(db.Model):
     """Images liées à une place"""
     __tablename__ = "place_images"
@@ -40,3 +130,10 @@ class PlaceImage(db.Model):
 
     def __repr__(self):
         return f"<PlaceImage id={self.id} url={self.url}>"
+
+
+@event.listens_for(PlaceImage, "after_insert")
+@event.listens_for(PlaceImage, "after_update")
+@event.listens_for(PlaceImage, "after_delete")
+def _image_changed(mapper, connection, image):
+    bump_place_version(connection, [image.place_id])
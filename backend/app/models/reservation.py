@@ -1,18 +1,45 @@
 # models/reservation.py
-from datetime import datetime
+from datetime import datetime, timedelta
+
+from sqlalchemy import event, func, inspect, select, union_all
+from sqlalchemy.orm import column_property
+
 from app.extensions import db
+from .place import bump_place_version
+from .analytics import apply_stays
 
 class Reservation(db.Model):
     """Réservation d’un utilisateur pour un lieu sur une période donnée"""
     __tablename__ = "reservations"
+    __table_args__ = (
+        # Test de chevauchement par place (réservation, disponibilités)
+        # Sert aussi les listes par place triées par début (préfixe place_id, start)
+        db.Index("ix_reservations_place_start_end", "place_id", "start_datetime", "end_datetime"),
+        # Listes par utilisateur triées par début (pagination par curseur)
+        db.Index("ix_reservations_user_start", "user_id", "start_datetime"),
+        # Les ids archivés ne doivent jamais être réattribués (SQLite
+        # reprend sinon max(id) + 1)
+        {"sqlite_autoincrement": True},
+    )
 
     id = db.Column(db.Integer, primary_key=True)
-    place_id = db.Column(db.Integer, db.ForeignKey("places.id"), nullable=False)
+    # active_history : l'ancienne valeur est connue même si l'objet a été
+    # expiré, pour corriger les statistiques journalières à la mise à jour
+    place_id = column_property(
+        db.Column(db.Integer, db.ForeignKey("places.id"), nullable=False), active_history=True
+    )
     user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
 
-    start_datetime = db.Column(db.DateTime, nullable=False, index=True)
-    end_datetime = db.Column(db.DateTime, nullable=False, index=True)
+    start_datetime = column_property(db.Column(db.DateTime, nullable=False, index=True),
+                                     active_history=True)
+    end_datetime = column_property(db.Column(db.DateTime, nullable=False, index=True),
+                                   active_history=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    # Prix par nuit de la place au moment de la réservation (rempli à
+    # l'insertion, et quand la réservation change de place) : le revenu
+    # retiré à l'annulation ou à la modification est exactement celui ajouté,
+    # même si le propriétaire a changé son prix entre-temps
+    price_by_night = column_property(db.Column(db.Integer, nullable=True), active_history=True)
 
     # Relations
     user = db.relationship("User", backref="reservations")
@@ -20,3 +47,142 @@ class Reservation(db.Model):
 
     def __repr__(self):
         return f"<Reservation id={self.id} from={self.start_datetime} to={self.end_datetime}>"
+
+
+class ArchivedReservation(db.Model):
+    """
+    Réservation terminée depuis plus de RESERVATION_ARCHIVE_DAYS jours,
+    déplacée hors de la table chaude par ReservationFacade.archive_reservations
+    (même id, mêmes colonnes). Lue seulement quand l'historique est demandé.
+    """
+    __tablename__ = "reservations_archive"
+    __table_args__ = (
+        db.Index("ix_reservations_archive_place_start", "place_id", "start_datetime"),
+        db.Index("ix_reservations_archive_user_start", "user_id", "start_datetime"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    place_id = db.Column(db.Integer, db.ForeignKey("places.id"), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
+
+    start_datetime = db.Column(db.DateTime, nullable=False)
+    end_datetime = db.Column(db.DateTime, nullable=False)
+    created_at = db.Column(db.DateTime)
+    price_by_night = db.Column(db.Integer, nullable=True)
+    archived_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<ArchivedReservation id={self.id} from={self.start_datetime} to={self.end_datetime}>"
+
+
+# Délai entre la fin d'un séjour et la possibilité de laisser un avis
+REVIEW_DELAY = timedelta(minutes=15)
+
+
+class ReviewEligibility(db.Model):
+    """
+    Séjours terminés, matérialisés : un utilisateur peut laisser un avis sur
+    la place à partir de `eligible_from` (fin de son premier séjour +
+    REVIEW_DELAY). Tenu à jour à chaque écriture de Reservation ; la
+    vérification avant un avis est une lecture par clé primaire.
+    """
+    __tablename__ = "review_eligibility"
+
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), primary_key=True)
+    place_id = db.Column(db.Integer, db.ForeignKey("places.id"), primary_key=True)
+    eligible_from = db.Column(db.DateTime, nullable=False)
+
+    def __repr__(self):
+        return f"<ReviewEligibility user={self.user_id} place={self.place_id} from={self.eligible_from}>"
+
+
+def refresh_review_eligibility(connection, pairs):
+    """
+    Recalcule l'éligibilité des couples (user_id, place_id) depuis les
+    réservations, archive comprise : premier séjour terminé + REVIEW_DELAY,
+    ligne supprimée s'il n'en reste aucun. Les écritures de réservations
+    d'une place sont sérialisées (ReservationFacade.lock_places) : pas
+    d'insertion concurrente du même couple.
+    """
+    table = ReviewEligibility.__table__
+    for user_id, place_id in {pair for pair in pairs if None not in pair}:
+        ends = union_all(*[
+            select(entity.end_datetime.label("end_datetime"))
+            .where(entity.user_id == user_id, entity.place_id == place_id)
+            for entity in (Reservation, ArchivedReservation)
+        ]).subquery()
+        first_end = connection.execute(select(func.min(ends.c.end_datetime))).scalar()
+        key = (table.c.user_id == user_id, table.c.place_id == place_id)
+        if first_end is None:
+            connection.execute(table.delete().where(*key))
+            continue
+        eligible_from = first_end + REVIEW_DELAY
+        if not connection.execute(table.update().where(*key).values(eligible_from=eligible_from)).rowcount:
+            connection.execute(table.insert(), {"user_id": user_id, "place_id": place_id,
+                                                "eligible_from": eligible_from})
+
+
+@event.listens_for(Reservation, "after_insert")
+@event.listens_for(Reservation, "after_update")
+@event.listens_for(Reservation, "after_delete")
+def _reservation_eligibility(mapper, connection, reservation):
+    state = inspect(reservation)
+    user_ids = [reservation.user_id, *state.attrs.user_id.history.deleted]
+    place_ids = [reservation.place_id, *state.attrs.place_id.history.deleted]
+    refresh_review_eligibility(connection, [(user_id, place_id)
+                                            for user_id in user_ids for place_id in place_ids])
+
+
+@event.listens_for(Reservation, "after_insert")
+@event.listens_for(Reservation, "after_update")
+@event.listens_for(Reservation, "after_delete")
+def _reservation_changed(mapper, connection, reservation):
+    place_ids = [reservation.place_id, *inspect(reservation).attrs.place_id.history.deleted]
+    bump_place_version(connection, place_ids, reservations=True)
+
+
+def _current_price(connection, place_id):
+    from .place import Place
+
+    places = Place.__table__
+    return connection.execute(
+        select(places.c.price_by_night).where(places.c.id == place_id)).scalar()
+
+
+@event.listens_for(Reservation, "before_insert")
+def _reservation_price(mapper, connection, reservation):
+    if reservation.price_by_night is None:
+        reservation.price_by_night = _current_price(connection, reservation.place_id)
+
+
+@event.listens_for(Reservation, "before_update")
+def _reservation_price_on_move(mapper, connection, reservation):
+    # Nouvelle place : son prix du moment ; sinon le prix réservé est conservé
+    if inspect(reservation).attrs.place_id.history.deleted:
+        reservation.price_by_night = _current_price(connection, reservation.place_id)
+
+
+STAY_ATTRIBUTES = ("place_id", "start_datetime", "end_datetime", "price_by_night")
+
+
+@event.listens_for(Reservation, "after_insert")
+def _reservation_inserted(mapper, connection, reservation):
+    apply_stays(connection, [(*[getattr(reservation, name) for name in STAY_ATTRIBUTES], 1)])
+
+
+@event.listens_for(Reservation, "after_delete")
+def _reservation_deleted(mapper, connection, reservation):
+    apply_stays(connection, [(*[getattr(reservation, name) for name in STAY_ATTRIBUTES], -1)])
+
+
+@event.listens_for(Reservation, "after_update")
+def _reservation_updated(mapper, connection, reservation):
+    state = inspect(reservation)
+    old = []
+    for name in STAY_ATTRIBUTES:
+        history = state.attrs[name].history
+        old.append(history.deleted[0] if history.deleted else getattr(reservation, name))
+    new = [getattr(reservation, name) for name in STAY_ATTRIBUTES]
+    if old == new:
+        return
+    apply_stays(connection, [(*old, -1), (*new, 1)])
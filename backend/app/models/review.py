@@ -1,7 +1,9 @@
 # models/review.py
 from datetime import datetime
 from app.extensions import db
-from sqlalchemy import CheckConstraint
+from sqlalchemy import CheckConstraint, Float, UniqueConstraint, case, cast, event, inspect
+from sqlalchemy.orm import column_property
+from .place import Place, bump_place_version
 
 class Review(db.Model):
     """Avis et note laissés par un utilisateur sur un lieu"""
@@ -9,14 +11,23 @@ class Review(db.Model):
 
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
-    place_id = db.Column(db.Integer, db.ForeignKey("places.id"), nullable=False)
+    # active_history : l'ancienne valeur est connue même si l'objet a été
+    # expiré, pour corriger les agrégats de la place à la mise à jour
+    place_id = column_property(
+        db.Column(db.Integer, db.ForeignKey("places.id"), nullable=False), active_history=True
+    )
 
-    rating = db.Column(db.Integer, nullable=False)
+    rating = column_property(db.Column(db.Integer, nullable=False), active_history=True)
     comment = db.Column(db.Text)
     created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
 
     __table_args__ = (
         CheckConstraint("rating >= 1 AND rating <= 5", name="check_rating_range"),
+        # Un seul avis par utilisateur et par place, garanti par la base
+        UniqueConstraint("user_id", "place_id", name="uq_reviews_user_place"),
+        # Listes d'avis d'une place / d'un auteur, plus récents d'abord
+        db.Index("ix_reviews_place_created_at", "place_id", "created_at"),
+        db.Index("ix_reviews_user_created_at", "user_id", "created_at"),
     )
 
     # Relations
@@ -25,3 +36,55 @@ class Review(db.Model):
 
     def __repr__(self):
         return f"<Review id={self.id} rating={self.rating} place_id={self.place_id}>"
+
+
+def _apply_rating(connection, place_id, rating, sign):
+    """
+    Ajoute (sign=1) ou retire (sign=-1) une note des agrégats de la place.
+    Un seul UPDATE relatif, dans la transaction de l'écriture de l'avis :
+    pas de lecture préalable, donc pas de mise à jour perdue.
+    """
+    if place_id is None or rating is None:
+        return
+    places = Place.__table__
+    bucket = places.c[f"rating_{int(rating)}"]
+    new_sum = places.c.rating_sum + sign * int(rating)
+    new_count = places.c.rating_count + sign
+    connection.execute(
+        places.update()
+        .where(places.c.id == place_id)
+        .values({
+            places.c.rating_sum: new_sum,
+            places.c.rating_count: new_count,
+            bucket: bucket + sign,
+            places.c.rating_avg: case(
+                (new_count > 0, cast(new_sum, Float) / new_count), else_=0.0
+            ),
+        })
+    )
+
+
+@event.listens_for(Review, "after_insert")
+def _review_inserted(mapper, connection, review):
+    _apply_rating(connection, review.place_id, review.rating, 1)
+    bump_place_version(connection, [review.place_id])
+
+
+@event.listens_for(Review, "after_delete")
+def _review_deleted(mapper, connection, review):
+    _apply_rating(connection, review.place_id, review.rating, -1)
+    bump_place_version(connection, [review.place_id])
+
+
+@event.listens_for(Review, "after_update")
+def _review_updated(mapper, connection, review):
+    state = inspect(review)
+    rating_history = state.attrs.rating.history
+    place_history = state.attrs.place_id.history
+    bump_place_version(connection, [review.place_id, *place_history.deleted])
+    if not rating_history.deleted and not place_history.deleted:
+        return
+    old_rating = rating_history.deleted[0] if rating_history.deleted else review.rating
+    old_place_id = place_history.deleted[0] if place_history.deleted else review.place_id
+    _apply_rating(connection, old_place_id, old_rating, -1)
+    _apply_rating(connection, review.place_id, review.rating, 1)
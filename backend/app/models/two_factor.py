@@ -0,0 +1,16 @@
+# models/two_factor.py
+from app.extensions import db
+
+class TwoFactorCode(db.Model):
+    """Code 2FA en attente, partagé entre workers (TWO_FACTOR_BACKEND='database')"""
+    __tablename__ = "two_factor_codes"
+
+    email = db.Column(db.String(256), primary_key=True)
+    code_hash = db.Column(db.String(64), nullable=False)
+    user_id = db.Column(db.Integer, nullable=False)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    # Indexé pour le balayage des codes expirés
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+
+    def __repr__(self):
+        return f"<TwoFactorCode {self.email} expires={self.expires_at}>"
@@ -1,8 +1,7 @@
 # models/user.py
 from datetime import datetime, timedelta
 import secrets
-from werkzeug.security import generate_password_hash, check_password_hash
-from app.extensions import db
+from app.extensions import db, password_hasher
 
 class User(db.Model):
     """Modèle utilisateur du projet HBnB"""
@@ -21,12 +20,15 @@ class User(db.Model):
     is_admin = db.Column(db.Boolean, default=False, nullable=False)
 
     def set_password(self, password):
-        """Hash et définit le mot de passe"""
-        self.password_hash = generate_password_hash(password)
+        """Hash et définit le mot de passe (pool de hachage, voir app/hashing.py)"""
+        self.password_hash = password_hasher.hash(password)
 
     def check_password(self, password):
-        """Vérifie le mot de passe"""
-        return check_password_hash(self.password_hash, password)
+        """Vérifie le mot de passe et remplace une empreinte d'un ancien format"""
+        valid, upgraded = password_hasher.verify(self.password_hash, password)
+        if upgraded:
+            self.password_hash = upgraded
+        return valid
 
     def generate_reset_token(self, expires_in=3600):
         """Génère un token de réinitialisation avec expiration"""
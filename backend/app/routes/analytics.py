@@ -0,0 +1,27 @@
+# app/routes/analytics.py
+from flask import request
+from flask_restx import Namespace, Resource
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from app.facades.analytics_facade import AnalyticsFacade
+
+api = Namespace('analytics', description='Occupancy and revenue analytics for hosts')
+
+
+@api.route('/owner')
+class OwnerAnalytics(Resource):
+    @api.doc(params={
+        'from': "First month, YYYY-MM (default: 11 months before 'to')",
+        'to': "Last month, YYYY-MM, included (default: current month)",
+        'place_id': "Restrict to one of your places",
+    })
+    @jwt_required()
+    def get(self):
+        """Monthly occupancy rate and revenue of each of your places"""
+        owner_id = int(get_jwt_identity())
+        try:
+            first, stop = AnalyticsFacade.parse_months(request.args.get('from'), request.args.get('to'))
+        except ValueError as e:
+            api.abort(400, str(e))
+        return AnalyticsFacade.owner_monthly(
+            owner_id, first, stop, place_id=request.args.get('place_id', type=int)
+        ), 200
@@ -1,40 +1,19 @@
-import random
-import smtplib
-from email.message import EmailMessage
-from datetime import datetime, timedelta
-
 from flask import request, jsonify
 from app.facades.user_facade import UserFacade
 from flask_restx import Namespace, Resource, fields
 from flask_jwt_extended import create_access_token
-from werkzeug.security import check_password_hash
 from app.models.user import User
 from app import db
+from app.extensions import two_factor_store, mail_queue
+from app.two_factor import OK, MISSING, EXPIRED, LOCKED
+from app.hashing import HashingBusy
 
 api = Namespace('auth', description='Authentication operations')
 
-# Temp store (à remplacer par Redis ou DB pour prod)
-two_factor_store = {}
-
-# Configuration d’envoi email (ajuste selon ton fournisseur)
-SMTP_SERVER = 'smtp.gmail.com'
-SMTP_PORT = 587
-SMTP_USER = 'teckivoire@gmail.com'
-SMTP_PASSWORD = 'qzhsromouugmappf'
-
-
 # === UTILITY ===
 def send_2fa_code(email, code):
-    msg = EmailMessage()
-    msg['Subject'] = 'Your 2FA Code'
-    msg['From'] = f"HBNB <{SMTP_USER}>"
-    msg['To'] = email
-    msg.set_content(f'Votre code de vérification 2FA est : {code}')
-
-    with smtplib.SMTP(SMTP_SERVER, SMTP_PORT) as server:
-        server.starttls()
-        server.login(SMTP_USER, SMTP_PASSWORD)
-        server.send_message(msg)
+    """Met le code en file d'envoi (app/mailer.py) ; False si la file est pleine"""
+    return mail_queue.send(email, 'Your 2FA Code', f'Votre code de vérification 2FA est : {code}')
 
 # === MODELS ===
 register_model = api.model('Register', {
@@ -108,25 +87,30 @@ class Login(Resource):
         password = data.get('password')
 
         user = User.query.filter_by(email=email).first()
+        # Le hachage peut attendre une place dans le pool : la connexion à la
+        # base est rendue d'ici là (user reste lisible, détaché)
+        db.session.close()
+        previous_hash = user.password_hash if user else None
 
-        if not user or not check_password_hash(user.password_hash, password):
+        try:
+            valid = user is not None and user.check_password(password)
+        except HashingBusy as e:
+            # Pool de hachage saturé : refus immédiat, sans trace d'erreur
+            return {'message': e.description}, 503, {'Retry-After': '1'}
+        if not valid:
             return {'message': 'Invalid credentials'}, 401
 
-        # Générer un code 2FA
-        code = str(random.randint(100000, 999999))
-        expires = datetime.utcnow() + timedelta(minutes=10)
+        # check_password a recalculé une empreinte d'un ancien format
+        if user.password_hash != previous_hash:
+            db.session.add(user)
+            db.session.commit()
 
-        # Stocker en mémoire
-        two_factor_store[email] = {
-            'code': code,
-            'expires': expires,
-            'user_id': user.id
-        }
+        # Générer un code 2FA (TWO_FACTOR_BACKEND, voir app/two_factor.py)
+        code = two_factor_store.issue(email, user.id)
 
-        try:
-            send_2fa_code(email, code)
-        except Exception as e:
-            return {'message': f'Failed to send code: {str(e)}'}, 500
+        # Envoi en arrière-plan : la réponse n'attend pas le serveur SMTP
+        if not send_2fa_code(email, code):
+            return {'message': 'Mail queue is full, please retry later.'}, 503
 
         return {'message': '2FA code sent to your email'}, 200
 
@@ -138,19 +122,21 @@ class Verify2FA(Resource):
         email = data.get('email')
         code = data.get('code')
 
-        record = two_factor_store.get(email)
-        if not record:
+        status, user_id = two_factor_store.verify(email, str(code))
+        if status == MISSING:
             return {'message': 'No code found. Please login again.'}, 404
 
-        if datetime.utcnow() > record['expires']:
+        if status == EXPIRED:
             return {'message': 'Code expired. Please login again.'}, 400
 
-        if code != record['code']:
+        if status == LOCKED:
+            return {'message': 'Too many attempts. Please login again.'}, 429
+
+        if status != OK:
             return {'message': 'Invalid code'}, 401
 
-        # Tout est OK, générer le token
-        access_token = create_access_token(identity=str(record['user_id']))
-        del two_factor_store[email]  # Nettoyage
+        # Tout est OK (le code est déjà consommé), générer le token
+        access_token = create_access_token(identity=str(user_id))
 
         return {'access_token': access_token}, 200
 
@@ -0,0 +1,24 @@
+# routes/cache.py
+from flask_restx import Namespace, Resource
+from flask_jwt_extended import jwt_required, current_user
+from app.extensions import cache
+
+api = Namespace('cache', description='Response cache monitoring (admin)')
+
+
+@api.route('/stats')
+class CacheStats(Resource):
+    @jwt_required()
+    def get(self):
+        """Hit / miss / eviction counters of the response cache"""
+        if not current_user.is_admin:
+            return {"message": "Admins only"}, 403
+        return cache.stats(), 200
+
+    @jwt_required()
+    def delete(self):
+        """Empty the response cache"""
+        if not current_user.is_admin:
+            return {"message": "Admins only"}, 403
+        cache.clear()
+        return {"message": "Cache cleared"}, 200
@@ -0,0 +1,16 @@
+# routes/mail.py
+from flask_restx import Namespace, Resource
+from flask_jwt_extended import jwt_required, current_user
+from app.extensions import mail_queue
+
+api = Namespace('mail', description='Outbound mail queue monitoring (admin)')
+
+
+@api.route('/stats')
+class MailStats(Resource):
+    @jwt_required()
+    def get(self):
+        """Queue depth, delivery counters and enqueue-to-delivery latency"""
+        if not current_user.is_admin:
+            return {"message": "Admins only"}, 403
+        return mail_queue.stats(), 200
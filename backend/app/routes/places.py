@@ -1,12 +1,20 @@
-from flask import request,jsonify
-from flask_restx import Namespace, Resource, fields
+import io
+
+from flask import request, jsonify, Response, stream_with_context
+from flask_restx import Namespace, Resource, fields, marshal
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from app.utils import save_file
+from app.utils import save_file, conditional_get, chunked_lines
+from app.extensions import cache
 from datetime import datetime, timedelta
 
 from app.models import Place, Amenity, Review, PlaceImage, db,Reservation
 from app.routes.reviews import review_model as review_input
-from app.facades.place_facade import PlaceFacade
+from app.facades.place_facade import (
+    PlaceFacade, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, PLACE_RELATIONS, EXPORT_FORMATS
+)
+from app.facades.reservation_facade import ReservationFacade
+from app.facades.amenity_facade import AmenityFacade
+from app.facades.review_facade import ReviewFacade, DEFAULT_PAGE_SIZE as REVIEW_PAGE_SIZE
 
 api = Namespace("places", description="Endpoints pour la gestion des lieux")
 
@@ -25,6 +33,13 @@ review_model = api.model("Review", {
     "place_id": fields.Integer(readOnly=True),
 })
 
+# Avis avec leur auteur (listes et détail d'un avis)
+review_output_model = api.inherit("ReviewOutput", review_model, {
+    "user_name": fields.String(readOnly=True),
+    "user_photo": fields.String(readOnly=True),
+    "created_at": fields.String(readOnly=True),
+})
+
 image_output_model = api.model("Image", {
     "id": fields.Integer(readOnly=True),
     "url": fields.String(required=True)
@@ -45,11 +60,30 @@ place_model = api.model("Place", {
     "latitude": fields.Float,
     "longitude": fields.Float,
     "owner_id": fields.Integer,
+    "rating_avg": fields.Float(readOnly=True, description="Note moyenne (0 sans avis)"),
+    "rating_count": fields.Integer(readOnly=True, description="Nombre d'avis"),
     "amenities": fields.List(fields.Nested(amenity_model)),
     "reviews": fields.List(fields.Nested(review_model)),
     "images": fields.List(fields.Nested(image_output_model))
 })
 
+nearby_place_model = api.inherit("NearbyPlace", place_model, {
+    "distance_km": fields.Float(readOnly=True)
+})
+
+text_search_place_model = api.inherit("TextSearchPlace", place_model, {
+    "score": fields.Float(readOnly=True, description="Pertinence (plus grand = meilleur)"),
+    "snippet": fields.String(readOnly=True, description="Extrait avec les termes entre <mark>")
+})
+
+availability_model = api.model("Availability", {
+    "place_id": fields.Integer,
+    "from": fields.String(description="Début du premier créneau"),
+    "to": fields.String(description="Fin du dernier créneau (exclue)"),
+    "granularity": fields.String(description="day ou hour"),
+    "bitmap": fields.String(description="Un caractère par créneau : 1 = réservé, 0 = libre"),
+})
+
 place_input_model = api.model("PlaceInput", {
     "name": fields.String(required=True),
     "description": fields.String,
@@ -62,15 +96,175 @@ place_input_model = api.model("PlaceInput", {
     "amenity_ids": fields.List(fields.Integer)
 })
 
+projection_params = {
+    "fields": "Champs à renvoyer, séparés par des virgules (défaut : tous)",
+    "expand": "Relations à inclure : amenities, reviews, images (défaut : toutes)",
+}
+
+page_params = {
+    **projection_params,
+    "limit": f"Taille de la page (défaut {DEFAULT_PAGE_SIZE})",
+    "after": "Curseur renvoyé dans l'en-tête X-Next-Cursor",
+    "sort": "id (défaut), price_by_night ou rating (mieux notées d'abord)",
+}
+
+search_params = {
+    **page_params,
+    "min_price": "Prix minimum par nuit",
+    "max_price": "Prix maximum par nuit",
+    "town": "Ville exacte",
+    "country": "Pays exact",
+    "amenities": "Noms d'équipements séparés par des virgules (tous requis)",
+    "bbox": "Zone de carte : min_lat,min_lng,max_lat,max_lng",
+    "available_from": "Libre à partir de (YYYY-MM-DDTHH:MM:SS)",
+    "available_to": "Libre jusqu'à (YYYY-MM-DDTHH:MM:SS)",
+    "facets": "Facettes à compter, séparées par des virgules : amenities, town, country, price "
+              "(réponse {results, facets})",
+}
+
+nearby_params = {
+    "lat": "Latitude du point de référence",
+    "lng": "Longitude du point de référence",
+    "radius_km": "Rayon de recherche en kilomètres (défaut 10)",
+    "limit": f"Nombre maximum de places (défaut {DEFAULT_PAGE_SIZE})",
+}
+
+availability_params = {
+    "from": "Début de la fenêtre (YYYY-MM-DD ou YYYY-MM-DDTHH:MM:SS, défaut aujourd'hui)",
+    "to": "Fin de la fenêtre, exclue (défaut from + 31 jours)",
+    "granularity": "day (défaut) ou hour",
+}
+
+# =================== HELPERS ===================
+
+def _page_args():
+    """Paramètres de pagination communs (limit, after, sort)"""
+    return {
+        "limit": request.args.get("limit", DEFAULT_PAGE_SIZE, type=int),
+        "after": request.args.get("after"),
+        "sort": request.args.get("sort", "id"),
+    }
+
+def _search_filters():
+    """Lit les filtres de recherche dans la query string"""
+    amenities = request.args.get("amenities")
+    bbox = request.args.get("bbox")
+    if bbox:
+        try:
+            bbox = tuple(float(v) for v in bbox.split(","))
+        except ValueError:
+            raise ValueError("bbox must be min_lat,min_lng,max_lat,max_lng")
+        if len(bbox) != 4:
+            raise ValueError("bbox must be min_lat,min_lng,max_lat,max_lng")
+    available = None
+    if request.args.get("available_from") or request.args.get("available_to"):
+        available = (
+            ReservationFacade.parse_datetime(request.args.get("available_from")),
+            ReservationFacade.parse_datetime(request.args.get("available_to")),
+        )
+    return {
+        "min_price": request.args.get("min_price", type=int),
+        "max_price": request.args.get("max_price", type=int),
+        "town": request.args.get("town"),
+        "country": request.args.get("country"),
+        "amenities": amenities.split(",") if amenities else [],
+        "bbox": bbox,
+        "available": available,
+    }
+
+def _csv_arg(name):
+    value = request.args.get(name)
+    if value is None:
+        return None
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+def _projection():
+    """
+    Lit ?fields= et ?expand= et retourne (colonnes, relations, champs) :
+    colonnes / relations à charger côté SQL et champs du place_model à
+    sérialiser. Sans paramètre, la réponse reste le place_model complet.
+    """
+    requested = _csv_arg("fields")
+    expand = _csv_arg("expand")
+
+    unknown = set(requested or []) - set(place_model)
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+    unknown = set(expand or []) - set(PLACE_RELATIONS)
+    if unknown:
+        raise ValueError(f"Unknown relations: {', '.join(sorted(unknown))}")
+
+    if requested is None:
+        columns = None
+        relations = list(PLACE_RELATIONS) if expand is None else expand
+        selected = [name for name in place_model if name not in PLACE_RELATIONS] + relations
+    else:
+        columns = ["id"] + [name for name in requested if name not in PLACE_RELATIONS]
+        relations = [name for name in PLACE_RELATIONS if name in requested or name in (expand or [])]
+        selected = columns + relations
+
+    output = {name: field for name, field in place_model.items() if name in selected}
+    return columns, relations, output
+
+def _place_validators(kind):
+    """Validateurs ETag / Last-Modified d'une ressource liée à une place"""
+    def validators(identifier=None, place_id=None, **kwargs):
+        try:
+            place_id = int(identifier if identifier is not None else place_id)
+        except (TypeError, ValueError):
+            return None
+        versions = PlaceFacade.get_place_versions(place_id)
+        if versions is None:
+            return None
+        suffix = "".join(f"-{value}" for value in kwargs.values())
+        return f"place-{place_id}-{kind}{suffix}-v{versions.version}", versions.updated_at
+    return validators
+
+def _availability_window():
+    """Lit ?from=, ?to= et ?granularity= : (début, fin, pas, granularité)"""
+    granularity = request.args.get("granularity", "day")
+    start_dt, end_dt, step = ReservationFacade.parse_window(
+        request.args.get("from"), request.args.get("to"), granularity
+    )
+    return start_dt, end_dt, step, granularity
+
+def _availability_validators(place_id):
+    """ETag du calendrier : version des réservations et jour courant (fenêtre par défaut)"""
+    versions = PlaceFacade.get_place_versions(place_id)
+    if versions is None:
+        return None
+    return (f"place-{place_id}-availability-v{versions.reservations_version}-{datetime.utcnow():%Y%m%d}",
+            versions.reservations_updated_at)
+
+def _list_tags(**kwargs):
+    return ["place-list"]
+
+def _place_tags(identifier=None, place_id=None, **kwargs):
+    """Tags de cache d'une ressource liée à une place (détail, amenities...)"""
+    return [f"place:{identifier if identifier is not None else place_id}", "amenities"]
+
+def _paged_response(places, next_cursor, output=place_model):
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else {}
+    return marshal(places, output), 200, headers
+
 # =================== ROUTES ===================
 
 # ---------- PLACES ----------
 @api.route("/", strict_slashes=False)
 class PlaceList(Resource):
-    @api.marshal_list_with(place_model)
+    @api.doc(params=page_params)
+    @api.response(200, "Success", [place_model])
+    @cache.cached(_list_tags)
     def get(self):
-        """Lister toutes les places (PUBLIC)"""
-        return Place.query.all(), 200
+        """Lister les places page par page (PUBLIC)"""
+        try:
+            columns, relations, output = _projection()
+            places, next_cursor = PlaceFacade.get_places_page(
+                **_page_args(), columns=columns, relations=relations
+            )
+        except ValueError as e:
+            api.abort(400, str(e))
+        return _paged_response(places, next_cursor, output)
 
     @api.expect(place_input_model, validate=True)
     @api.marshal_with(place_model, code=201)
@@ -101,9 +295,161 @@ class PlaceList(Resource):
         db.session.commit()
         return new_place, 201
 
+@api.route("/export", strict_slashes=False)
+class PlaceExport(Resource):
+    @api.doc(params={"format": "ndjson (défaut) ou csv"})
+    def get(self):
+        """Exporter tout le catalogue en flux NDJSON ou CSV (PUBLIC)"""
+        fmt = request.args.get("format", "ndjson")
+        if fmt not in EXPORT_FORMATS:
+            api.abort(400, f"format must be one of: {', '.join(EXPORT_FORMATS)}")
+
+        mimetype = "application/x-ndjson" if fmt == "ndjson" else "text/csv"
+        lines = PlaceFacade.export_places(fmt)
+        return Response(
+            stream_with_context(chunked_lines(lines)),
+            mimetype=mimetype,
+            headers={"Content-Disposition": f"attachment; filename=places.{fmt}"},
+        )
+
+@api.route("/import", strict_slashes=False)
+class PlaceImport(Resource):
+    @api.doc(params={"format": "ndjson (défaut) ou csv, mêmes colonnes que l'export"})
+    @jwt_required()
+    def post(self):
+        """Importer des places en masse pour l'utilisateur connecté (AUTH)"""
+        fmt = request.args.get("format", "ndjson")
+        if fmt not in EXPORT_FORMATS:
+            return {"message": f"format must be one of: {', '.join(EXPORT_FORMATS)}"}, 400
+
+        user_id = int(get_jwt_identity())
+        lines = io.TextIOWrapper(request.stream, encoding="utf-8", newline="")
+        result = PlaceFacade.bulk_import(PlaceFacade.iter_import_rows(lines, fmt), user_id)
+        return result, 201 if result["created"] else 200
+
+@api.route("/search", strict_slashes=False)
+class PlaceSearch(Resource):
+    @api.doc(params=search_params)
+    @api.response(200, "Success", [place_model])
+    def get(self):
+        """Rechercher des places par prix, ville, pays, équipements et zone, avec facettes (PUBLIC)"""
+        try:
+            columns, relations, output = _projection()
+            filters = _search_filters()
+            places, next_cursor = PlaceFacade.search_places(
+                filters, **_page_args(), columns=columns, relations=relations
+            )
+            facets = _csv_arg("facets")
+            counts = PlaceFacade.facet_counts(filters, facets) if facets else None
+        except ValueError as e:
+            api.abort(400, str(e))
+        if counts is None:
+            return _paged_response(places, next_cursor, output)
+        body, status, headers = _paged_response(places, next_cursor, output)
+        return {"results": body, "facets": counts}, status, headers
+
+@api.route("/search/text", strict_slashes=False)
+class PlaceTextSearch(Resource):
+    @api.doc(params={
+        "q": "Texte recherché (nom, description, ville, pays)",
+        "limit": f"Nombre maximum de places (défaut {DEFAULT_PAGE_SIZE})",
+    })
+    @api.marshal_list_with(text_search_place_model)
+    def get(self):
+        """Recherche plein texte classée avec extraits surlignés (PUBLIC)"""
+        try:
+            hits = PlaceFacade.text_search(
+                request.args.get("q"),
+                limit=request.args.get("limit", DEFAULT_PAGE_SIZE, type=int),
+            )
+        except ValueError as e:
+            api.abort(400, str(e))
+
+        places = []
+        for place, score, snippet in hits:
+            place.score = score
+            place.snippet = snippet
+            places.append(place)
+        return places, 200
+
+@api.route("/nearby", strict_slashes=False)
+class PlaceNearby(Resource):
+    @api.doc(params=nearby_params)
+    @api.marshal_list_with(nearby_place_model)
+    def get(self):
+        """Places les plus proches d'un point, triées par distance (PUBLIC)"""
+        latitude = request.args.get("lat", type=float)
+        longitude = request.args.get("lng", type=float)
+        if latitude is None or longitude is None:
+            api.abort(400, "lat and lng are required")
+        try:
+            nearby = PlaceFacade.get_nearby_places(
+                latitude, longitude,
+                radius_km=request.args.get("radius_km", 10.0, type=float),
+                limit=request.args.get("limit", DEFAULT_PAGE_SIZE, type=int),
+            )
+        except ValueError as e:
+            api.abort(400, str(e))
+
+        places = []
+        for place, distance in nearby:
+            place.distance_km = round(distance, 3)
+            places.append(place)
+        return places, 200
+
+@api.route("/availability", strict_slashes=False)
+class PlacesAvailability(Resource):
+    @api.doc(params={**availability_params, "ids": f"Ids des places, séparés par des virgules (max {MAX_PAGE_SIZE})"})
+    def get(self):
+        """Calendriers d'occupation de plusieurs places en une requête (PUBLIC)"""
+        try:
+            place_ids = [int(value) for value in _csv_arg("ids") or []]
+            start_dt, end_dt, step, granularity = _availability_window()
+        except ValueError as e:
+            api.abort(400, str(e))
+        if not place_ids:
+            api.abort(400, "ids is required")
+        if len(place_ids) > MAX_PAGE_SIZE:
+            api.abort(400, f"At most {MAX_PAGE_SIZE} ids")
+
+        bitmaps = ReservationFacade.availability(place_ids, start_dt, end_dt, step)
+        return {
+            "from": start_dt.isoformat(),
+            "to": end_dt.isoformat(),
+            "granularity": granularity,
+            "places": {str(place_id): bitmap for place_id, bitmap in bitmaps.items()},
+        }, 200
+
+@api.route("/<int:place_id>/availability", strict_slashes=False)
+class PlaceAvailability(Resource):
+    @api.doc(params=availability_params)
+    @api.response(404, "Place not found")
+    @conditional_get(_availability_validators)
+    @api.marshal_with(availability_model)
+    def get(self, place_id):
+        """Calendrier d'occupation d'une place, jour par jour ou heure par heure (PUBLIC)"""
+        if PlaceFacade.get_place_versions(place_id) is None:
+            api.abort(404, "Place not found")
+        try:
+            start_dt, end_dt, step, granularity = _availability_window()
+        except ValueError as e:
+            api.abort(400, str(e))
+
+        bitmaps = ReservationFacade.availability([place_id], start_dt, end_dt, step)
+        return {
+            "place_id": place_id,
+            "from": start_dt.isoformat(),
+            "to": end_dt.isoformat(),
+            "granularity": granularity,
+            "bitmap": bitmaps[place_id],
+        }, 200
+
 @api.route("/<string:identifier>", strict_slashes=False)
 class PlaceResource(Resource):
-    @api.marshal_with(place_model)
+    @conditional_get(_place_validators("detail"))
+    @api.doc(params=projection_params)
+    @api.response(200, "Success", place_model)
+    @cache.cached(_place_tags)
     def get(self, identifier):
         """Récupérer une place par ID (PUBLIC)"""
         try:
@@ -111,10 +457,15 @@ class PlaceResource(Resource):
         except ValueError:
             return {"message": "Invalid identifier (only ID supported)"}, 400
 
-        place = Place.query.get(place_id)
+        try:
+            columns, relations, output = _projection()
+        except ValueError as e:
+            return {"message": str(e)}, 400
+
+        place = PlaceFacade.get_place(place_id, columns=columns, relations=relations)
         if not place:
             return {"message": "Place not found"}, 404
-        return place, 200
+        return marshal(place, output), 200
 
     @api.expect(place_input_model)
     @api.marshal_with(place_model)
@@ -184,6 +535,8 @@ class PlaceResource(Resource):
 # ---------- AMENITIES ----------
 @api.route("/<int:place_id>/amenities", strict_slashes=False)
 class PlaceAmenities(Resource):
+    @conditional_get(_place_validators("amenities"))
+    @cache.cached(_place_tags)
     @api.marshal_list_with(amenity_model)
     def get(self, place_id):
         """Lister les amenities d'une place (PUBLIC)"""
@@ -209,21 +562,20 @@ class PlaceAmenities(Resource):
         if not isinstance(data, dict) or "name" not in data:
             return {"message": "Expected JSON object with a name"}, 400
 
-        amenity = Amenity.query.filter_by(name=data["name"]).first()
-        if not amenity:
-            amenity = Amenity(name=data["name"])
-            db.session.add(amenity)
-            db.session.commit()
+        if not data["name"].strip():
+            return {"message": "Amenity name must not be empty"}, 400
 
-        if amenity not in place.amenities:
-            place.amenities.append(amenity)
-            db.session.commit()
+        amenity_ids = AmenityFacade.resolve_amenity_ids([data["name"]])
+        PlaceFacade.link_amenities(place, amenity_ids.values())
+        db.session.commit()
 
         return place.amenities, 200
 
 # ---------- IMAGES ----------
 @api.route('/<int:place_id>/images', strict_slashes=False)
 class PlaceImages(Resource):
+    @conditional_get(_place_validators("images"))
+    @cache.cached(_place_tags)
     @api.marshal_list_with(image_output_model)
     def get(self, place_id):
         place = Place.query.get(place_id)
@@ -310,25 +662,27 @@ class PlaceImages(Resource):
 # ---------- REVIEWS ----------
 @api.route("/<int:place_id>/reviews")
 class PlaceReviews(Resource):
-    @api.marshal_list_with(review_model)
+    @api.doc(params={
+        "limit": f"Taille de la page (défaut {REVIEW_PAGE_SIZE})",
+        "after": "Curseur renvoyé dans l'en-tête X-Next-Cursor",
+    })
+    @conditional_get(_place_validators("reviews"))
+    @cache.cached(_place_tags)
+    @api.marshal_list_with(review_output_model)
     def get(self, place_id):
-        place = Place.query.get(place_id)
-        if not place:
+        """Avis d'une place avec leur auteur, plus récents d'abord, page par page (PUBLIC)"""
+        if PlaceFacade.get_place_versions(place_id) is None:
             return {"message": "Place not found"}, 404
-
-        reviews = []
-        for r in place.reviews:
-            reviews.append({
-                "id": r.id,
-                "comment": r.comment,
-                "rating": r.rating,
-                "user_id": r.user_id,
-                "user_name": getattr(r.user, "username", "Anonyme"),
-                "user_photo": getattr(r.user, "photo_url", "/uploads/default-avatar.png"),
-                "place_id": r.place_id,
-                "created_at": r.created_at.isoformat() if r.created_at else None
-            })
-        return reviews, 200
+        try:
+            reviews, next_cursor = ReviewFacade.get_reviews_page(
+                place_id=place_id,
+                limit=request.args.get("limit", REVIEW_PAGE_SIZE, type=int),
+                after=request.args.get("after"),
+            )
+        except ValueError as e:
+            api.abort(400, str(e))
+        headers = {"X-Next-Cursor": next_cursor} if next_cursor else {}
+        return reviews, 200, headers
 
     @api.expect(review_input)
     @jwt_required()
@@ -339,45 +693,25 @@ class PlaceReviews(Resource):
             return {"message": "Place not found"}, 404
 
         data = request.get_json()
-        review = Review(
-            comment=data["comment"],
-            rating=data["rating"],
-            user_id=user_id,
-            place_id=place_id
-        )
-        db.session.add(review)
-        db.session.commit()
+        try:
+            review = ReviewFacade.create_review(user_id, place_id, data["rating"], data["comment"])
+        except ValueError as e:
+            return {"message": str(e)}, 400
 
-        return {
-            "id": review.id,
-            "comment": review.comment,
-            "rating": review.rating,
-            "user_id": review.user_id,
-            "user_name": getattr(review.user, "username", "Anonyme"),
-            "user_photo": getattr(review.user, "photo_url", "/uploads/default-avatar.png"),
-            "place_id": review.place_id,
-            "created_at": review.created_at.isoformat() if review.created_at else None
-        }, 201
+        return ReviewFacade.serialize(review, review.user.username, review.user.avatar), 201
 
 
 @api.route("/<int:place_id>/reviews/<int:review_id>")
 class ReviewResource(Resource):
-    @api.marshal_with(review_model)
+    @conditional_get(_place_validators("review"))
+    @cache.cached(_place_tags)
+    @api.marshal_with(review_output_model)
     def get(self, place_id, review_id):
-        review = Review.query.filter_by(id=review_id, place_id=place_id).first()
+        review = ReviewFacade.get_review(review_id, place_id=place_id)
         if not review:
             return {"message": "Review not found"}, 404
 
-        return {
-            "id": review.id,
-            "comment": review.comment,
-            "rating": review.rating,
-            "user_id": review.user_id,
-            "user_name": getattr(review.user, "username", "Anonyme"),
-            "user_photo": getattr(review.user, "photo_url", "/uploads/default-avatar.png"),
-            "place_id": review.place_id,
-            "created_at": review.created_at.isoformat() if review.created_at else None
-        }, 200
+        return review, 200
 
     @api.expect(review_input)
     @jwt_required()
@@ -394,16 +728,7 @@ class ReviewResource(Resource):
         review.rating = data.get("rating", review.rating)
         db.session.commit()
 
-        return {
-            "id": review.id,
-            "comment": review.comment,
-            "rating": review.rating,
-            "user_id": review.user_id,
-            "user_name": getattr(review.user, "username", "Anonyme"),
-            "user_photo": getattr(review.user, "photo_url", "/uploads/default-avatar.png"),
-            "place_id": review.place_id,
-            "created_at": review.created_at.isoformat() if review.created_at else None
-        }, 200
+        return ReviewFacade.serialize(review, review.user.username, review.user.avatar), 200
 
     @jwt_required()
     def delete(self, place_id, review_id):
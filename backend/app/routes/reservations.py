@@ -1,8 +1,12 @@
 # app/routes/reservations.py
 from flask_restx import Namespace, Resource, fields
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from flask import request
-from app.facades.reservation_facade import ReservationFacade
+from flask_jwt_extended import jwt_required, get_jwt_identity, current_user
+from flask import request, Response, stream_with_context
+from app.facades.reservation_facade import (
+    ReservationFacade, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, EXPORT_FORMATS
+)
+from app.facades.place_facade import PlaceFacade
+from app.utils import conditional_get, chunked_lines
 
 api = Namespace('reservations', description='Endpoints related to reservations')
 
@@ -19,13 +23,57 @@ reservation_output = api.inherit('ReservationOutput', reservation_input, {
     'user_id': fields.Integer(readOnly=True),
 })
 
+window_params = {
+    'from': "Only stays ending after this date (YYYY-MM-DD or YYYY-MM-DDTHH:MM:SS)",
+    'to': "Only stays starting before this date",
+}
+
+page_params = {
+    **window_params,
+    'history': "true to include archived stays (ended long ago)",
+    'limit': f"Page size (default {DEFAULT_PAGE_SIZE}, max {MAX_PAGE_SIZE})",
+    'after': "Cursor returned in the X-Next-Cursor header",
+}
+
+
+def _window_args():
+    """?from= / ?to= as datetimes (None when absent)"""
+    start, end = request.args.get('from'), request.args.get('to')
+    return (ReservationFacade.parse_bound(start) if start else None,
+            ReservationFacade.parse_bound(end) if end else None)
+
+
+def _history_arg():
+    return request.args.get('history', 'false').lower() in ('1', 'true', 'yes')
+
+
+def _page_args():
+    """Pagination, window and history parameters shared by the listings"""
+    start_dt, end_dt = _window_args()
+    return {
+        'limit': request.args.get('limit', DEFAULT_PAGE_SIZE, type=int),
+        'after': request.args.get('after'),
+        'start_dt': start_dt,
+        'end_dt': end_dt,
+        'history': _history_arg(),
+    }
+
+
+def _paged(reservations, next_cursor):
+    headers = {'X-Next-Cursor': next_cursor} if next_cursor else {}
+    return reservations, 200, headers
+
 
 @api.route('/')
 class ReservationList(Resource):
+    @api.doc(params=page_params)
     @api.marshal_list_with(reservation_output)
     def get(self):
-        """List all reservations"""
-        return ReservationFacade.get_all_reservations()
+        """List reservations by start date, page by page"""
+        try:
+            return _paged(*ReservationFacade.get_all_reservations(**_page_args()))
+        except ValueError as e:
+            api.abort(400, str(e))
 
     @api.expect(reservation_input, validate=True)
     @api.marshal_with(reservation_output, code=201)
@@ -71,7 +119,10 @@ class ReservationDetail(Resource):
     def put(self, id):
         """Update a reservation"""
         data = request.get_json()
-        reservation = ReservationFacade.update_reservation(id, **data)
+        try:
+            reservation = ReservationFacade.update_reservation(id, **data)
+        except ValueError as e:
+            api.abort(400, str(e))
         if not reservation:
             api.abort(404, "Reservation not found or update failed")
 
@@ -82,21 +133,69 @@ class ReservationDetail(Resource):
         return reservation
 
 
+def _place_reservations_validators(place_id):
+    """ETag / Last-Modified des réservations d'une place"""
+    versions = PlaceFacade.get_place_versions(place_id)
+    if versions is None:
+        return None
+    return (f"place-{place_id}-reservations-v{versions.reservations_version}",
+            versions.reservations_updated_at)
+
+
 @api.route('/place/<int:place_id>')
 class ReservationByPlace(Resource):
+    @api.doc(params=page_params)
+    @conditional_get(_place_reservations_validators)
     @api.marshal_list_with(reservation_output)
     def get(self, place_id):
-        """Get reservations by place ID"""
-        reservations = ReservationFacade.get_reservations_by_place(place_id)
-        return reservations or []  # ✅ on renvoie [] au lieu de 404
+        """Get reservations by place ID, page by page"""
+        try:
+            # ✅ on renvoie [] au lieu de 404
+            return _paged(*ReservationFacade.get_reservations_by_place(place_id, **_page_args()))
+        except ValueError as e:
+            api.abort(400, str(e))
 
 
 @api.route('/user/<int:user_id>')
 class ReservationByUser(Resource):
+    @api.doc(params=page_params)
     @api.marshal_list_with(reservation_output)
     def get(self, user_id):
-        """Get reservations by user ID"""
-        reservations = ReservationFacade.get_reservations_by_user(user_id)
-        if not reservations:
+        """Get reservations by user ID, page by page"""
+        try:
+            page_args = _page_args()
+            reservations, next_cursor = ReservationFacade.get_reservations_by_user(user_id, **page_args)
+        except ValueError as e:
+            api.abort(400, str(e))
+        if not reservations and not page_args['after']:
             api.abort(404, "No reservations found for this user")
-        return reservations
+        return _paged(reservations, next_cursor)
+
+
+@api.route('/export')
+class ReservationExport(Resource):
+    @api.doc(params={**window_params, 'format': "ndjson (default) or csv",
+                     'history': "true to include archived stays"})
+    @jwt_required()
+    def get(self):
+        """Stream all reservations (optionally windowed) as NDJSON or CSV (admin)"""
+        if not current_user.is_admin:
+            return {"message": "Admins only"}, 403
+
+        fmt = request.args.get('format', 'ndjson')
+        if fmt not in EXPORT_FORMATS:
+            api.abort(400, f"format must be one of: {', '.join(EXPORT_FORMATS)}")
+        try:
+            start_dt, end_dt = _window_args()
+            if start_dt and end_dt and start_dt >= end_dt:
+                raise ValueError("'to' must be after 'from'")
+        except ValueError as e:
+            api.abort(400, str(e))
+
+        mimetype = "application/x-ndjson" if fmt == "ndjson" else "text/csv"
+        lines = ReservationFacade.export_reservations(fmt, start_dt, end_dt, _history_arg())
+        return Response(
+            stream_with_context(chunked_lines(lines)),
+            mimetype=mimetype,
+            headers={"Content-Disposition": f"attachment; filename=reservations.{fmt}"},
+        )
@@ -1,10 +1,9 @@
 from flask_restx import Namespace, Resource, fields
 from flask import request
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from datetime import datetime, timedelta
-
-from app.models import Review, Reservation
+from app.models import Review
 from app.extensions import db
+from app.facades.review_facade import ReviewFacade, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
 
 api = Namespace('reviews', description='Endpoints related to reviews')
 
@@ -17,23 +16,50 @@ review_model = api.model('Review', {
     'place_id': fields.Integer(readOnly=True),
 })
 
+# --- Review with its author (listings) ---
+review_output = api.inherit('ReviewOutput', review_model, {
+    'user_name': fields.String(readOnly=True),
+    'user_photo': fields.String(readOnly=True),
+    'created_at': fields.String(readOnly=True),
+})
+
+page_params = {
+    'limit': f"Page size (default {DEFAULT_PAGE_SIZE}, max {MAX_PAGE_SIZE})",
+    'after': "Cursor returned in the X-Next-Cursor header",
+}
+
+
+def _reviews_page(**criteria):
+    """Newest-first page of reviews with their authors, cursor in X-Next-Cursor"""
+    try:
+        reviews, next_cursor = ReviewFacade.get_reviews_page(
+            limit=request.args.get('limit', DEFAULT_PAGE_SIZE, type=int),
+            after=request.args.get('after'),
+            **criteria
+        )
+    except ValueError as e:
+        api.abort(400, str(e))
+    headers = {'X-Next-Cursor': next_cursor} if next_cursor else {}
+    return reviews, 200, headers
+
 # ========================
 # /api/places/<place_id>/reviews
 # ========================
 @api.route('/places/<int:place_id>/reviews', strict_slashes=False)
 @api.doc(params={'place_id': 'ID of the place'})
 class PlaceReviews(Resource):
-    @api.marshal_list_with(review_model)
+    @api.doc(params=page_params)
+    @api.marshal_list_with(review_output)
     def get(self, place_id):
-        """List all reviews for a given place"""
-        return Review.query.filter_by(place_id=place_id).all()
+        """List the reviews of a place with their authors, newest first"""
+        return _reviews_page(place_id=place_id)
 
     @jwt_required()
     @api.expect(review_model, validate=True)
     @api.marshal_with(review_model, code=201)
     def post(self, place_id):
         """Create a new review for a place"""
-        user_id = get_jwt_identity()
+        user_id = int(get_jwt_identity())
         data = request.get_json()
 
         rating = data.get('rating')
@@ -42,28 +68,15 @@ class PlaceReviews(Resource):
         if rating is None or not (1 <= rating <= 5):
             api.abort(400, "Rating must be between 1 and 5.")
 
-        # Un seul review par user & place
-        existing = Review.query.filter_by(user_id=user_id, place_id=place_id).first()
-        if existing:
-            api.abort(400, "You have already reviewed this place.")
-
-        # Vérif réservation terminée depuis 15 min
-        now = datetime.utcnow()
-        fifteen_minutes_ago = now - timedelta(minutes=15)
-        reservation = Reservation.query.filter_by(user_id=user_id, place_id=place_id) \
-            .filter(Reservation.end_datetime <= fifteen_minutes_ago).first()
-
-        if not reservation:
+        # Séjour terminé depuis 15 min : lecture par clé de review_eligibility
+        if not ReviewFacade.is_eligible(user_id, place_id):
             api.abort(403, "You must complete a reservation before reviewing.")
 
-        review = Review(
-            user_id=user_id,
-            place_id=place_id,
-            rating=rating,
-            comment=comment
-        )
-        db.session.add(review)
-        db.session.commit()
+        # Un seul review par user & place : contrainte unique, pas de lecture préalable
+        try:
+            review = ReviewFacade.create_review(user_id, place_id, rating, comment)
+        except ValueError as e:
+            api.abort(400, str(e))
         return review, 201
 
 # ========================
@@ -119,9 +132,9 @@ class ReviewDetail(Resource):
 # ========================
 @api.route('/user/<int:user_id>', strict_slashes=False)
 class ReviewsByUser(Resource):
-    @api.marshal_list_with(review_model)
+    @api.doc(params=page_params)
+    @api.marshal_list_with(review_output)
     def get(self, user_id):
-        """Get all reviews made by a specific user"""
-        reviews = Review.query.filter_by(user_id=user_id).all()
-        return reviews or []
+        """Get the reviews made by a specific user, newest first"""
+        return _reviews_page(user_id=user_id)
 
@@ -2,7 +2,7 @@
 from flask_restx import Namespace, Resource, fields
 from flask import request,current_app
 from app.facades.user_facade import UserFacade
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required, get_jwt_identity, current_user
 from werkzeug.utils import secure_filename
 from app.extensions import db
 from app.models import User
@@ -40,8 +40,6 @@ class UserList(Resource):
     @jwt_required()
     @api.marshal_list_with(user_model)
     def get(self):
-        current_user_id = get_jwt_identity()
-        current_user = UserFacade.get_user_or_404(current_user_id)
         if not current_user.is_admin:
             return {"message": "Admins only"}, 403
         return UserFacade.get_all_users()
@@ -64,8 +62,8 @@ class UserMe(Resource):
     @jwt_required()
     @api.marshal_with(user_model)
     def get(self):
-        user_id = get_jwt_identity()
-        return UserFacade.get_user_or_404(user_id)
+        # La route renvoie l'utilisateur complet : la ligne est chargée
+        return UserFacade.get_user_or_404(current_user.id)
 
     @jwt_required()
     @api.expect(user_post_model)
@@ -80,11 +78,9 @@ class UserDetail(Resource):
     @jwt_required()
     @api.marshal_with(user_model)
     def get(self, id):
-        current_user_id = get_jwt_identity()
-        current_user = UserFacade.get_user_or_404(current_user_id)
         if not current_user.is_admin:
             return {"message": "Admins only"}, 403
-        return UserFacade.get_user_or
+        return UserFacade.get_user_or_404(id)
 
 @api.route("/<int:user_id>/avatar")
 class UserAvatar(Resource):
@@ -0,0 +1,222 @@
+# app/two_factor.py
+"""
+Codes 2FA en attente entre /login et /verify-2fa.
+
+Deux backends interchangeables (TWO_FACTOR_BACKEND) :
+- "memory" : propre au processus, pour le développement à un seul worker ;
+- "database" : table two_factor_codes, partagée par tous les workers.
+
+Chaque code expire après TWO_FACTOR_TTL secondes et n'accepte que
+TWO_FACTOR_MAX_ATTEMPTS essais ; il est supprimé dès qu'il est utilisé,
+épuisé ou trouvé expiré. Les codes abandonnés sont balayés par petits lots
+(SWEEP_BATCH) à chaque émission de code : un coût constant par appel, sans
+tâche de fond (chaque code émis est retiré au plus une fois).
+"""
+import hashlib
+import hmac
+import secrets
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta
+
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql, sqlite
+
+SWEEP_BATCH = 16
+
+# Résultats de verify()
+OK = "ok"
+MISSING = "missing"
+EXPIRED = "expired"
+INVALID = "invalid"
+LOCKED = "locked"
+
+
+class MemoryBackend:
+    """
+    Dictionnaire + file des échéances dans l'ordre d'émission. Avec un TTL
+    fixe cet ordre est aussi celui d'expiration : le balayage ne regarde que
+    la tête de la file et chaque entrée n'y est retirée qu'une fois.
+    """
+
+    def __init__(self):
+        self._records = {}
+        self._deadlines = deque()
+        self._lock = threading.Lock()
+        self.expirations = 0
+
+    def _sweep(self, now):
+        for _ in range(SWEEP_BATCH):
+            if not self._deadlines or self._deadlines[0][0] > now:
+                return
+            expires, email = self._deadlines.popleft()
+            record = self._records.get(email)
+            # Entrée périmée si le code a été remplacé ou déjà consommé
+            if record is not None and record["expires"] == expires:
+                del self._records[email]
+                self.expirations += 1
+
+    def put(self, email, code_hash, user_id, ttl):
+        now = time.monotonic()
+        with self._lock:
+            self._sweep(now)
+            self._records[email] = {"code_hash": code_hash, "user_id": user_id,
+                                    "attempts": 0, "expires": now + ttl}
+            self._deadlines.append((now + ttl, email))
+
+    def verify(self, email, code_hash, max_attempts):
+        now = time.monotonic()
+        with self._lock:
+            record = self._records.get(email)
+            if record is None:
+                return MISSING, None
+            if record["expires"] <= now:
+                del self._records[email]
+                return EXPIRED, None
+            record["attempts"] += 1
+            if hmac.compare_digest(record["code_hash"], code_hash):
+                del self._records[email]
+                return OK, record["user_id"]
+            if record["attempts"] >= max_attempts:
+                del self._records[email]
+                return LOCKED, None
+            return INVALID, None
+
+    def clear(self):
+        with self._lock:
+            self._records.clear()
+            self._deadlines.clear()
+
+    def stats(self):
+        return {"size": len(self._records), "expirations": self.expirations}
+
+
+class DatabaseBackend:
+    """
+    Table two_factor_codes, une transaction courte par appel (indépendante
+    de la session de la requête). Le compteur d'essais est incrémenté par un
+    UPDATE conditionnel : des vérifications concurrentes sur plusieurs
+    workers ne peuvent pas dépasser la limite.
+    """
+
+    def __init__(self, db):
+        self.db = db
+
+    @property
+    def table(self):
+        from app.models import TwoFactorCode
+        return TwoFactorCode.__table__
+
+    def _sweep(self, connection, now):
+        table = self.table
+        expired = select(table.c.email).where(table.c.expires_at <= now).limit(SWEEP_BATCH)
+        connection.execute(table.delete().where(table.c.email.in_(expired)))
+
+    def put(self, email, code_hash, user_id, ttl):
+        table = self.table
+        now = datetime.utcnow()
+        with self.db.engine.begin() as connection:
+            self._sweep(connection, now)
+            fields = {"code_hash": code_hash, "user_id": user_id,
+                      "attempts": 0, "expires_at": now + timedelta(seconds=ttl)}
+            result = connection.execute(table.update().where(table.c.email == email).values(**fields))
+            if result.rowcount:
+                return
+            # Deux connexions simultanées pour le même e-mail : la seconde
+            # insertion remplace la première au lieu d'échouer sur la clé
+            dialect = connection.dialect.name
+            if dialect in ("sqlite", "postgresql"):
+                insert = (sqlite if dialect == "sqlite" else postgresql).insert(table)
+                statement = insert.on_conflict_do_update(
+                    index_elements=["email"], set_={name: insert.excluded[name] for name in fields})
+            else:
+                statement = table.insert()
+            connection.execute(statement, {"email": email, **fields})
+
+    def verify(self, email, code_hash, max_attempts):
+        table = self.table
+        now = datetime.utcnow()
+        with self.db.engine.begin() as connection:
+            counted = connection.execute(
+                table.update()
+                .where(table.c.email == email, table.c.expires_at > now,
+                       table.c.attempts < max_attempts)
+                .values(attempts=table.c.attempts + 1))
+            if not counted.rowcount:
+                row = connection.execute(
+                    select(table.c.expires_at).where(table.c.email == email)).first()
+                if row is None:
+                    return MISSING, None
+                connection.execute(table.delete().where(table.c.email == email))
+                return (EXPIRED if row.expires_at <= now else LOCKED), None
+
+            row = connection.execute(
+                select(table.c.code_hash, table.c.user_id, table.c.attempts)
+                .where(table.c.email == email)).first()
+            if hmac.compare_digest(row.code_hash, code_hash):
+                # Usage unique : seul le worker qui supprime la ligne gagne
+                consumed = connection.execute(
+                    table.delete().where(table.c.email == email, table.c.code_hash == code_hash))
+                return (OK, row.user_id) if consumed.rowcount else (MISSING, None)
+            if row.attempts >= max_attempts:
+                connection.execute(table.delete().where(table.c.email == email))
+                return LOCKED, None
+            return INVALID, None
+
+    def clear(self):
+        with self.db.engine.begin() as connection:
+            connection.execute(self.table.delete())
+
+    def stats(self):
+        from app.models import TwoFactorCode
+        with self.db.engine.connect() as connection:
+            size = connection.execute(
+                select(self.db.func.count()).select_from(TwoFactorCode.__table__)).scalar()
+        return {"size": size}
+
+
+class TwoFactorStore:
+    """Extension Flask : TWO_FACTOR_BACKEND = 'database' (défaut) ou 'memory'"""
+
+    def __init__(self):
+        self.backend = None
+        self.ttl = 600
+        self.max_attempts = 5
+        self._secret = b""
+
+    def init_app(self, app):
+        from app.extensions import db
+
+        kind = app.config.get("TWO_FACTOR_BACKEND", "database")
+        self.ttl = app.config.get("TWO_FACTOR_TTL", 600)
+        self.max_attempts = app.config.get("TWO_FACTOR_MAX_ATTEMPTS", 5)
+        self._secret = str(app.config.get("SECRET_KEY", "")).encode()
+        if kind == "memory":
+            self.backend = MemoryBackend()
+        elif kind == "database":
+            self.backend = DatabaseBackend(db)
+        else:
+            raise RuntimeError(f"Unknown TWO_FACTOR_BACKEND {kind!r}")
+        app.extensions["two_factor"] = self
+
+    def _hash(self, email, code):
+        # Seule l'empreinte du code est conservée (la table est partagée)
+        return hmac.new(self._secret, f"{email}:{code}".encode(), hashlib.sha256).hexdigest()
+
+    def issue(self, email, user_id):
+        """Génère un code à 6 chiffres pour email (remplace le précédent)"""
+        code = f"{secrets.randbelow(900000) + 100000}"
+        self.backend.put(email, self._hash(email, code), user_id, self.ttl)
+        return code
+
+    def verify(self, email, code):
+        """(statut, user_id) ; user_id n'est renseigné que si statut == OK"""
+        return self.backend.verify(email, self._hash(email, code), self.max_attempts)
+
+    def clear(self):
+        self.backend.clear()
+
+    def stats(self):
+        return {"backend": type(self.backend).__name__, "ttl": self.ttl,
+                "max_attempts": self.max_attempts, **self.backend.stats()}
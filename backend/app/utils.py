@@ -1,6 +1,25 @@
 import os
+import zlib
+from datetime import timezone
+from functools import wraps
+from urllib.parse import urlencode
+
+from werkzeug.http import http_date, quote_etag
 from werkzeug.utils import secure_filename
-from flask import url_for, current_app
+from flask import url_for, current_app, request, Response, g
+from flask_restx.utils import unpack
+
+def chunked_lines(lines, size=64 * 1024):
+    """Regroupe les lignes en blocs d'environ `size` octets avant envoi (flux)"""
+    chunk, length = [], 0
+    for line in lines:
+        chunk.append(line)
+        length += len(line)
+        if length >= size:
+            yield "".join(chunk)
+            chunk, length = [], 0
+    if chunk:
+        yield "".join(chunk)
 
 def save_file(file):
     """
@@ -19,3 +38,54 @@ def save_file(file):
 
     # Retourne URL publique
     return url_for("uploaded_file", filename=filename, _external=True)
+
+
+def conditional_get(validators):
+    """
+    Décorateur de GET conditionnel (à placer au-dessus de marshal_with).
+
+    `validators(**kwargs)` reçoit les paramètres de la route et retourne
+    (etag, last_modified) à partir d'une requête légère sur les versions, ou
+    None pour laisser la route répondre (404...). Si le client a déjà cette
+    version (If-None-Match / If-Modified-Since), on répond 304 sans appeler
+    la route, donc sans charger les relations.
+
+    L'ETag est aussi publié dans `g.etag` : placé au-dessus de cache.cached,
+    le cache ne sert une entrée que si elle a été produite pour cet ETag
+    (un worker dont le cache local n'a pas vu l'écriture recalcule le corps
+    au lieu de le servir sous la nouvelle version).
+    """
+    def decorator(f):
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            found = validators(**kwargs)
+            if found is None:
+                return f(*args, **kwargs)
+
+            etag, last_modified = found
+            if request.args:
+                # Une représentation par jeu de paramètres (?fields=, ?limit=...)
+                query = urlencode(sorted(request.args.items(multi=True)))
+                etag = f"{etag}-{zlib.crc32(query.encode()):08x}"
+
+            g.etag = etag
+            headers = {"ETag": quote_etag(etag), "Cache-Control": "no-cache"}
+            if last_modified is not None:
+                headers["Last-Modified"] = http_date(last_modified)
+
+            if request.if_none_match:
+                not_modified = request.if_none_match.contains(etag)
+            elif request.if_modified_since and last_modified is not None:
+                not_modified = (last_modified.replace(microsecond=0, tzinfo=timezone.utc)
+                                <= request.if_modified_since)
+            else:
+                not_modified = False
+            if not_modified:
+                return Response(status=304, headers=headers)
+
+            data, code, extra_headers = unpack(f(*args, **kwargs))
+            if code == 200:
+                extra_headers = {**headers, **dict(extra_headers or {})}
+            return data, code, extra_headers
+        return wrapper
+    return decorator
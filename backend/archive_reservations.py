@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+"""
+Script pour déplacer les réservations terminées depuis plus de N jours
+(RESERVATION_ARCHIVE_DAYS, 30 par défaut) vers reservations_archive, par
+lots. À lancer périodiquement (cron) ou en continu avec --every.
+
+    python archive_reservations.py [--days 30] [--batch-size 1000] [--pause 0.1] [--every 3600]
+"""
+import argparse
+import time
+
+from app import create_app
+from app.facades.reservation_facade import ReservationFacade, ARCHIVE_BATCH_SIZE
+
+parser = argparse.ArgumentParser(description="Archivage des réservations passées")
+parser.add_argument("--days", type=int, default=None, help="Ancienneté minimale (jours après la fin)")
+parser.add_argument("--batch-size", type=int, default=ARCHIVE_BATCH_SIZE)
+parser.add_argument("--pause", type=float, default=0.0, help="Pause entre deux lots (secondes)")
+parser.add_argument("--every", type=int, default=0, help="Relancer toutes les N secondes")
+args = parser.parse_args()
+
+app = create_app()
+
+with app.app_context():
+    while True:
+        archived = ReservationFacade.archive_reservations(args.days, args.batch_size, args.pause)
+        print(f"✅ {archived} réservations archivées !")
+        if not args.every:
+            break
+        time.sleep(args.every)
@@ -0,0 +1,15 @@
+#!/usr/bin/env python3
+"""
+Script pour recalculer les statistiques journalières d'occupation et de
+revenu des places (place_daily_stats) depuis les réservations, archive
+comprise
+"""
+
+from app import create_app
+from app.facades.analytics_facade import AnalyticsFacade
+
+app = create_app()
+
+with app.app_context():
+    count = AnalyticsFacade.backfill()
+    print(f"✅ Statistiques recalculées depuis {count} réservations !")
@@ -0,0 +1,14 @@
+#!/usr/bin/env python3
+"""
+Script pour calculer la cellule géographique (geo_cell) des places
+existantes, après l'ajout de la colonne
+"""
+
+from app import create_app
+from app.facades.place_facade import PlaceFacade
+
+app = create_app()
+
+with app.app_context():
+    count = PlaceFacade.backfill_geo_cells()
+    print(f"✅ {count} places mises à jour !")
@@ -0,0 +1,14 @@
+#!/usr/bin/env python3
+"""
+Script pour remplir review_eligibility (séjours terminés ouvrant droit à
+un avis) depuis les réservations existantes, archive comprise
+"""
+
+from app import create_app
+from app.facades.review_facade import ReviewFacade
+
+app = create_app()
+
+with app.app_context():
+    count = ReviewFacade.backfill_eligibility()
+    print(f"✅ {count} couples utilisateur / place éligibles !")
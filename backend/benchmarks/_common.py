@@ -0,0 +1,177 @@
+"""
+Outils partagés par les scripts de benchmark.
+
+Chaque script crée une base SQLite temporaire, la remplit avec un jeu de
+données synthétique puis mesure les requêtes dans un contexte d'application.
+
+Usage : depuis backend/, `python -m benchmarks.<script> [--places N]`
+"""
+import os
+import random
+import statistics
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from sqlalchemy import event
+
+# La base de benchmark doit être choisie avant l'import de la config
+_DB_DIR = tempfile.mkdtemp(prefix="hbnb-bench-")
+os.environ["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{os.path.join(_DB_DIR, 'bench.db')}"
+# On mesure la base, pas le cache de réponses (sauf si demandé explicitement)
+os.environ.setdefault("CACHE_BACKEND", "none")
+
+from app import create_app  # noqa: E402
+from app.geo import cell_for  # noqa: E402
+from app.extensions import db  # noqa: E402
+from app.models import User, Place, Amenity, PlaceImage, Reservation, Review, place_amenities  # noqa: E402
+
+TOWNS = [("Paris", "France"), ("Lyon", "France"), ("Abidjan", "Côte d'Ivoire"),
+         ("Dakar", "Sénégal"), ("Montréal", "Canada"), ("Bruxelles", "Belgique"),
+         ("Genève", "Suisse"), ("Casablanca", "Maroc")]
+AMENITIES = ["Wifi", "Piscine", "Parking", "Climatisation", "Cuisine",
+             "Lave-linge", "Jacuzzi", "Balcon", "Ascenseur", "Animaux"]
+CHUNK = 5000
+HISTORY_START = datetime(2022, 1, 1)
+
+
+@contextmanager
+def bench_app():
+    """Application Flask sur une base SQLite vierge"""
+    app = create_app()
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        yield app
+
+
+def seed_catalog(n_places, n_owners=100, seed=42):
+    """Insère n_places places (avec équipements et une image) en lots"""
+    rng = random.Random(seed)
+    conn = db.session.connection()
+
+    conn.execute(User.__table__.insert(), [
+        {"username": f"owner{i}", "email": f"owner{i}@bench.local",
+         "password_hash": "x", "country": "France", "town": "Paris", "is_admin": False}
+        for i in range(n_owners)
+    ])
+    conn.execute(Amenity.__table__.insert(), [{"name": name} for name in AMENITIES])
+    owner_ids = [row.id for row in conn.execute(db.select(User.id))]
+    amenity_ids = [row.id for row in conn.execute(db.select(Amenity.id))]
+
+    for start in range(0, n_places, CHUNK):
+        stop = min(start + CHUNK, n_places)
+        places, links, images = [], [], []
+        for place_id in range(start + 1, stop + 1):
+            town, country = rng.choice(TOWNS)
+            latitude, longitude = rng.uniform(-60, 60), rng.uniform(-150, 150)
+            places.append({
+                "id": place_id,
+                "name": f"Place {place_id}",
+                "description": f"Logement {place_id} à {town}",
+                "price_by_night": rng.randint(20, 500),
+                "location": f"{place_id} rue du Benchmark",
+                "country": country,
+                "town": town,
+                "latitude": latitude,
+                "longitude": longitude,
+                # Insertion Core : les événements ORM ne calculent pas la cellule
+                "geo_cell": cell_for(latitude, longitude),
+                "owner_id": rng.choice(owner_ids),
+            })
+            for amenity_id in rng.sample(amenity_ids, rng.randint(0, 5)):
+                links.append({"place_id": place_id, "amenity_id": amenity_id})
+            images.append({"place_id": place_id, "url": f"https://img.bench.local/{place_id}.jpg"})
+        conn.execute(Place.__table__.insert(), places)
+        if links:
+            conn.execute(place_amenities.insert(), links)
+        conn.execute(PlaceImage.__table__.insert(), images)
+    db.session.commit()
+
+
+def seed_reservations(n_reservations, seed=42):
+    """
+    Répartit n_reservations séjours sans chevauchement sur les places
+    existantes, bout à bout à partir de HISTORY_START (1 à 7 nuits,
+    0 à 10 jours d'écart).
+    """
+    rng = random.Random(seed)
+    conn = db.session.connection()
+    place_ids = [row.id for row in conn.execute(db.select(Place.id))]
+    user_ids = [row.id for row in conn.execute(db.select(User.id))]
+    cursor = {place_id: HISTORY_START for place_id in place_ids}
+
+    rows = []
+    for i in range(n_reservations):
+        place_id = place_ids[i % len(place_ids)]
+        start = cursor[place_id] + timedelta(days=rng.randint(0, 10))
+        end = start + timedelta(days=rng.randint(1, 7))
+        cursor[place_id] = end
+        rows.append({"place_id": place_id, "user_id": rng.choice(user_ids),
+                     "start_datetime": start, "end_datetime": end, "created_at": start})
+        if len(rows) == CHUNK:
+            conn.execute(Reservation.__table__.insert(), rows)
+            rows = []
+    if rows:
+        conn.execute(Reservation.__table__.insert(), rows)
+    db.session.commit()
+    return max(cursor.values())
+
+
+def seed_reviews(per_place, seed=42):
+    """
+    Ajoute per_place avis par place (insertion Core : les agrégats de notes
+    ne sont pas mis à jour, lancer reconcile_ratings si besoin)
+    """
+    rng = random.Random(seed)
+    conn = db.session.connection()
+    place_ids = [row.id for row in conn.execute(db.select(Place.id))]
+    user_ids = [row.id for row in conn.execute(db.select(User.id))]
+
+    rows = []
+    for place_id in place_ids:
+        for user_id in rng.sample(user_ids, min(per_place, len(user_ids))):
+            rows.append({"place_id": place_id, "user_id": user_id, "rating": rng.randint(1, 5),
+                         "comment": "Très bon séjour, logement propre et hôte réactif. " * 3,
+                         "created_at": HISTORY_START + timedelta(minutes=rng.randint(0, 10**6))})
+            if len(rows) == CHUNK:
+                conn.execute(Review.__table__.insert(), rows)
+                rows = []
+    if rows:
+        conn.execute(Review.__table__.insert(), rows)
+    db.session.commit()
+
+
+class QueryCounter:
+    """Compte les requêtes SQL envoyées par le moteur"""
+
+    def __init__(self, engine):
+        self.count = 0
+        event.listen(engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, *args):
+        self.count += 1
+
+
+def measure(fn, repeat=50, warmup=3):
+    """Exécute fn `repeat` fois et retourne les latences en millisecondes"""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def report(label, samples):
+    print(f"{label:<45} p50={percentile(samples, 50):8.2f} ms  "
+          f"p95={percentile(samples, 95):8.2f} ms  mean={statistics.mean(samples):8.2f} ms")
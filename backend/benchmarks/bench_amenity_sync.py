@@ -0,0 +1,57 @@
+"""
+Nombre de requêtes SQL et latence de PlaceFacade.update_place selon la
+taille de la liste d'équipements. Le nombre de requêtes doit rester
+constant : le script échoue sinon.
+
+    python -m benchmarks.bench_amenity_sync
+"""
+import argparse
+
+from benchmarks._common import bench_app, seed_catalog, measure, report, QueryCounter
+from app.extensions import db
+from app.facades.place_facade import PlaceFacade
+from app.models import Place
+
+# Lecture de la place, génération du catalogue des équipements (une fois par
+# requête) et rechargement du catalogue (seulement après la création de
+# nouveaux noms, ce que fait chaque tour ici), INSERT des nouveaux noms +
+# génération "amenities", relecture, lecture des liens, DELETE, INSERT,
+# incrément de version, génération "place-facets" (liens modifiés). Le
+# nombre ne dépend toujours pas de la taille de la liste.
+MAX_QUERIES = 11
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=30)
+    args = parser.parse_args()
+
+    with bench_app():
+        seed_catalog(1_000)
+        place = Place.query.first()
+        place_id, owner_id = place.id, place.owner_id
+        # Crée les lignes de génération "amenities" et "place-facets" (une
+        # seule fois par base)
+        PlaceFacade.update_place(place_id, {"amenities": ["Préchauffage"]}, owner_id)
+        counter = QueryCounter(db.engine)
+
+        for size in (1, 10, 50, 200):
+            lists = [[f"Équipement {size}-{round_}-{i}" for i in range(size)] for round_ in range(2)]
+            for names in lists:  # création des noms, puis diff complet
+                counter.count = 0
+                PlaceFacade.update_place(place_id, {"amenities": names}, owner_id)
+                db.session.expire_all()
+                queries = counter.count
+                assert queries <= MAX_QUERIES, f"{queries} requêtes pour {size} équipements"
+            print(f"{size:>4} équipements : {queries} requêtes")
+
+            state = {"round": 0}
+
+            def toggle():
+                state["round"] ^= 1
+                PlaceFacade.update_place(place_id, {"amenities": lists[state["round"]]}, owner_id)
+            report(f"  update_place ({size} équipements)", measure(toggle, repeat=args.repeat))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Temps de recalcul de place_daily_stats et latence de l'analyse annuelle
+d'un propriétaire (toutes ses places, 12 mois).
+
+    python -m benchmarks.bench_analytics --places 10000 --reservations 1000000
+"""
+import argparse
+import time
+from datetime import datetime, timedelta
+
+from flask_jwt_extended import create_access_token
+
+from benchmarks._common import bench_app, seed_catalog, seed_reservations, measure, report, HISTORY_START
+from app.extensions import db
+from app.facades.analytics_facade import AnalyticsFacade
+from app.facades.reservation_facade import ReservationFacade, DATETIME_FORMAT
+from app.models import Place, PlaceDailyStat, User
+
+
+def place_totals(place_id):
+    """(secondes réservées, revenu) de la place dans place_daily_stats"""
+    seconds, revenue = (db.session.query(db.func.sum(PlaceDailyStat.booked_seconds),
+                                         db.func.sum(PlaceDailyStat.revenue))
+                        .filter(PlaceDailyStat.place_id == place_id).one())
+    return seconds or 0, revenue or 0.0
+
+
+def check_price_change(place_id):
+    """
+    Le prix change entre la réservation et son annulation : le revenu retiré
+    doit être celui ajouté (prix réservé), pas le prix courant de la place.
+    """
+    place = db.session.get(Place, place_id)
+    user_id = db.session.query(User.id).filter(User.id != place.owner_id).limit(1).scalar()
+    # Bien après l'historique généré : aucun chevauchement
+    start = datetime(2040, 1, 1, 15)
+    before = place_totals(place_id)
+
+    reservation = ReservationFacade.create_reservation(
+        user_id, place_id, start.strftime(DATETIME_FORMAT),
+        (start + timedelta(days=3)).strftime(DATETIME_FORMAT))
+    booked_price = reservation.price_by_night
+    place.price_by_night = booked_price * 2 + 10
+    db.session.commit()
+
+    # Modification des dates après le changement de prix : prix réservé conservé
+    ReservationFacade.update_reservation(
+        reservation.id, end_datetime=(start + timedelta(days=2)).strftime(DATETIME_FORMAT))
+    seconds, revenue = place_totals(place_id)
+    assert seconds - before[0] == 2 * 86400, seconds - before[0]
+    assert abs(revenue - before[1] - 2 * booked_price) < 1e-6, revenue - before[1]
+
+    ReservationFacade.delete_reservation(reservation.id)
+    seconds, revenue = place_totals(place_id)
+    assert seconds == before[0], (seconds, before[0])
+    assert abs(revenue - before[1]) < 1e-6, (revenue, before[1])
+
+    place.price_by_night = booked_price
+    db.session.commit()
+    print("changement de prix puis annulation : revenu de la place inchangé\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--places", type=int, default=10_000)
+    parser.add_argument("--reservations", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    with bench_app() as app:
+        seed_catalog(args.places)
+        seed_reservations(args.reservations)
+
+        start = time.perf_counter()
+        AnalyticsFacade.backfill()
+        elapsed = time.perf_counter() - start
+        print(f"backfill : {args.reservations} réservations en {elapsed:.1f} s "
+              f"({args.reservations / elapsed:.0f} réservations/s)\n")
+
+        # Le propriétaire qui a le plus de places
+        owner_id, count = (db.session.query(Place.owner_id, db.func.count())
+                           .group_by(Place.owner_id).order_by(db.func.count().desc()).first())
+        check_price_change(db.session.query(Place.id).filter(Place.owner_id == owner_id)
+                           .order_by(Place.id).limit(1).scalar())
+
+        token = create_access_token(identity=str(owner_id))
+        first = HISTORY_START + timedelta(days=365)
+        url = (f"/api/analytics/owner?from={first:%Y-%m}"
+               f"&to={first + timedelta(days=364):%Y-%m}")
+
+        client = app.test_client()
+        headers = {"Authorization": f"Bearer {token}"}
+        assert client.get(url, headers=headers).status_code == 200
+        report(f"12 mois, {count} places", measure(lambda: client.get(url, headers=headers),
+                                                   repeat=args.repeat))
+
+
+if __name__ == "__main__":
+    main()
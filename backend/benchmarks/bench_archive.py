@@ -0,0 +1,78 @@
+"""
+Latence de create_reservation avant et après archivage de l'historique :
+N réservations passées (5 M par défaut) réparties sur les places, puis
+archive_reservations, puis les mêmes réservations futures.
+
+    python -m benchmarks.bench_archive --history 5000000 --places 1000
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+
+from benchmarks._common import bench_app, seed_catalog, measure, report, CHUNK
+from app.extensions import db
+from app.facades.reservation_facade import ReservationFacade, DATETIME_FORMAT
+from app.models import Reservation, ArchivedReservation, User
+
+
+def seed_history(n_reservations, n_places, archive_days):
+    """Séjours d'une nuit bout à bout, en remontant depuis la date d'archivage"""
+    conn = db.session.connection()
+    user_ids = [row.id for row in conn.execute(db.select(User.id))]
+    newest = datetime.utcnow() - timedelta(days=archive_days + 1)
+    rows = []
+    for i in range(n_reservations):
+        place_id = i % n_places + 1
+        end = newest - timedelta(days=i // n_places)
+        rows.append({"place_id": place_id, "user_id": user_ids[i % len(user_ids)],
+                     "start_datetime": end - timedelta(days=1), "end_datetime": end, "created_at": end})
+        if len(rows) == CHUNK:
+            conn.execute(Reservation.__table__.insert(), rows)
+            rows = []
+    if rows:
+        conn.execute(Reservation.__table__.insert(), rows)
+    db.session.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--history", type=int, default=5_000_000)
+    parser.add_argument("--places", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    args = parser.parse_args()
+
+    with bench_app() as app:
+        seed_catalog(args.places)
+        start = time.perf_counter()
+        seed_history(args.history, args.places, app.config["RESERVATION_ARCHIVE_DAYS"])
+        print(f"{args.history} réservations passées générées en {time.perf_counter() - start:.1f} s\n")
+
+        rng = random.Random(42)
+        user_id = db.session.query(User.id).first().id
+
+        def book():
+            # Séjour futur sur une place au hasard (un conflit mesure aussi la vérification)
+            start_dt = datetime.utcnow() + timedelta(days=rng.randint(1, 3650), hours=rng.randint(0, 23))
+            try:
+                ReservationFacade.create_reservation(
+                    user_id, rng.randint(1, args.places),
+                    start_dt.strftime(DATETIME_FORMAT), (start_dt + timedelta(hours=20)).strftime(DATETIME_FORMAT))
+            except ValueError:
+                pass
+
+        report("create_reservation (table chaude pleine)", measure(book, repeat=args.repeat))
+
+        start = time.perf_counter()
+        archived = ReservationFacade.archive_reservations(batch_size=args.batch_size)
+        elapsed = time.perf_counter() - start
+        print(f"\n{archived} réservations archivées en {elapsed:.1f} s ({archived / elapsed:.0f} lignes/s)")
+        print(f"table chaude : {db.session.query(Reservation).count()} lignes, "
+              f"archive : {db.session.query(ArchivedReservation).count()} lignes\n")
+
+        report("create_reservation (après archivage)", measure(book, repeat=args.repeat))
+
+
+if __name__ == "__main__":
+    main()
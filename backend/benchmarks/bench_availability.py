@@ -0,0 +1,62 @@
+"""
+Recherche de places libres sur une période : anti-jointure unique contre
+un test de chevauchement par place.
+
+    python -m benchmarks.bench_availability --places 20000 --reservations 1000000
+"""
+import argparse
+import time
+from datetime import timedelta
+
+from benchmarks._common import (bench_app, seed_catalog, seed_reservations,
+                                measure, report, HISTORY_START)
+from app.extensions import db
+from app.facades.place_facade import PlaceFacade
+from app.facades.reservation_facade import ReservationFacade
+from app.models import Place, Reservation
+
+
+def per_place_overlap(start_dt, end_dt, limit):
+    """Ancienne approche : une requête de chevauchement par place"""
+    free = []
+    for (place_id,) in db.session.query(Place.id).order_by(Place.id):
+        busy = db.session.query(Reservation.id).filter(
+            Reservation.place_id == place_id,
+            *ReservationFacade.overlaps(start_dt, end_dt)
+        ).first()
+        if not busy:
+            free.append(place_id)
+            if len(free) == limit:
+                break
+    return free
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--places", type=int, default=20_000)
+    parser.add_argument("--reservations", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    with bench_app():
+        seed_catalog(args.places)
+        start = time.perf_counter()
+        seed_reservations(args.reservations)
+        print(f"{args.reservations} réservations générées en {time.perf_counter() - start:.1f} s\n")
+
+        stay_start = HISTORY_START + timedelta(days=200)
+        for nights in (2, 7, 30):
+            stay = (stay_start, stay_start + timedelta(days=nights))
+            report(f"{nights} nuits — anti-jointure (page de 50)",
+                   measure(lambda: PlaceFacade.search_places({"available": stay}, limit=50),
+                           repeat=args.repeat))
+            report(f"{nights} nuits — anti-jointure + ville + prix",
+                   measure(lambda: PlaceFacade.search_places(
+                       {"available": stay, "town": "Paris", "max_price": 200}, limit=50),
+                       repeat=args.repeat))
+            report(f"{nights} nuits — une requête par place",
+                   measure(lambda: per_place_overlap(*stay, limit=50), repeat=max(3, args.repeat // 4)))
+
+
+if __name__ == "__main__":
+    main()
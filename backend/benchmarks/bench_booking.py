@@ -0,0 +1,124 @@
+"""
+Réservations concurrentes sur quelques places : des workers (threads ou
+processus) tentent des séjours qui se chevauchent et déplacent une partie
+de leurs réservations. Affiche le débit, les conflits refusés et vérifie
+qu'aucune paire de réservations ne se chevauche à la fin.
+
+    python -m benchmarks.bench_booking --workers 8 --attempts 200 --mode process
+"""
+import argparse
+import multiprocessing
+import random
+import threading
+import time
+from datetime import timedelta
+
+from sqlalchemy.exc import OperationalError
+
+from benchmarks._common import bench_app, seed_catalog, HISTORY_START
+from app import create_app
+from app.extensions import db
+from app.facades.reservation_facade import ReservationFacade, DATETIME_FORMAT
+from app.models import Reservation, User
+
+UPDATE_RATIO = 0.2
+
+
+def book(worker, attempts, n_places, window_days, user_ids):
+    """Boucle d'un worker ; retourne (réservations, déplacements, conflits, erreurs)"""
+    rng = random.Random(worker)
+    user_id = user_ids[worker % len(user_ids)]
+    created, moved, conflicts, errors = [], 0, 0, 0
+
+    for _ in range(attempts):
+        start = HISTORY_START + timedelta(days=rng.randint(0, window_days))
+        end = start + timedelta(days=rng.randint(1, 3))
+        place_id = rng.randint(1, n_places)
+        try:
+            if created and rng.random() < UPDATE_RATIO:
+                ReservationFacade.update_reservation(
+                    rng.choice(created), place_id=place_id,
+                    start_datetime=start.strftime(DATETIME_FORMAT),
+                    end_datetime=end.strftime(DATETIME_FORMAT))
+                moved += 1
+            else:
+                reservation = ReservationFacade.create_reservation(
+                    user_id, place_id, start.strftime(DATETIME_FORMAT), end.strftime(DATETIME_FORMAT))
+                created.append(reservation.id)
+        except ValueError:
+            conflicts += 1
+        except OperationalError:
+            # SQLite : verrou d'écriture non obtenu avant le délai d'attente
+            db.session.rollback()
+            errors += 1
+    return len(created), moved, conflicts, errors
+
+
+def run_process(worker, attempts, n_places, window_days, user_ids, results):
+    app = create_app()
+    with app.app_context():
+        results.put(book(worker, attempts, n_places, window_days, user_ids))
+
+
+def run_thread(app, worker, attempts, n_places, window_days, user_ids, results):
+    with app.app_context():
+        results.append(book(worker, attempts, n_places, window_days, user_ids))
+
+
+def count_double_bookings():
+    """Paires de réservations d'une même place qui se chevauchent"""
+    other = db.aliased(Reservation)
+    return (db.session.query(Reservation.id)
+            .join(other, db.and_(other.place_id == Reservation.place_id, other.id > Reservation.id))
+            .filter(*ReservationFacade.overlaps(other.start_datetime, other.end_datetime))
+            .count())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--attempts", type=int, default=200)
+    parser.add_argument("--places", type=int, default=5)
+    parser.add_argument("--window-days", type=int, default=60)
+    parser.add_argument("--mode", choices=("thread", "process"), default="thread")
+    args = parser.parse_args()
+
+    with bench_app() as app:
+        seed_catalog(args.places, n_owners=args.workers)
+        user_ids = [row.id for row in db.session.query(User.id)]
+        db.session.remove()
+        db.engine.dispose()
+
+        worker_args = (args.attempts, args.places, args.window_days, user_ids)
+        start = time.perf_counter()
+        if args.mode == "process":
+            queue = multiprocessing.get_context("fork").Queue()
+            workers = [multiprocessing.get_context("fork").Process(
+                target=run_process, args=(worker, *worker_args, queue)) for worker in range(args.workers)]
+        else:
+            queue = []
+            workers = [threading.Thread(
+                target=run_thread, args=(app, worker, *worker_args, queue)) for worker in range(args.workers)]
+        for worker in workers:
+            worker.start()
+        if args.mode == "process":
+            results = [queue.get() for _ in workers]
+        else:
+            results = queue
+        for worker in workers:
+            worker.join()
+        elapsed = time.perf_counter() - start
+
+        created, moved, conflicts, errors = (sum(column) for column in zip(*results))
+        total = args.workers * args.attempts
+        print(f"{args.workers} workers ({args.mode}), {total} tentatives en {elapsed:.2f} s "
+              f"-> {total / elapsed:.0f} tentatives/s")
+        print(f"réservations créées {created}, déplacées {moved}, conflits refusés {conflicts}, "
+              f"erreurs de verrou {errors}")
+        double_bookings = count_double_bookings()
+        print(f"doubles réservations : {double_bookings}")
+        assert double_bookings == 0, "réservations qui se chevauchent"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Coût du contrôle d'accès admin sur une route authentifiée (GET
+/api/cache/stats) : utilisateur rechargé à chaque appel (comme l'ancien
+get_user_or_404) contre `current_user` servi par le cache de app/current_user.py.
+
+    python -m benchmarks.bench_current_user --users 1000 --repeat 500
+"""
+import argparse
+import itertools
+
+from flask_jwt_extended import create_access_token
+
+from benchmarks._common import bench_app, measure, report, QueryCounter
+from app.extensions import db, user_cache
+from app.facades.user_facade import UserFacade
+from app.models import User
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=500)
+    args = parser.parse_args()
+
+    with bench_app() as app:
+        db.session.execute(User.__table__.insert(), [
+            {"username": f"admin{i}", "email": f"admin{i}@bench.local", "password_hash": "x",
+             "country": "France", "town": "Paris", "is_admin": True}
+            for i in range(args.users)])
+        db.session.commit()
+        user_ids = [row.id for row in db.session.query(User.id)]
+        headers = {user_id: {"Authorization": f"Bearer {create_access_token(identity=str(user_id))}"}
+                   for user_id in user_ids}
+        client = app.test_client()
+        counter = QueryCounter(db.engine)
+
+        def call(user_id):
+            response = client.get("/api/cache/stats", headers=headers[user_id])
+            assert response.status_code == 200, response.json
+
+        ids = itertools.cycle(user_ids)
+        # TTL nul : une requête par appel, comme l'ancien get_user_or_404
+        ttl = user_cache.ttl
+        user_cache.ttl = 0
+        counter.count = 0
+        report("route admin, utilisateur rechargé", measure(lambda: call(next(ids)), repeat=args.repeat, warmup=0))
+        uncached = counter.count / args.repeat
+
+        user_cache.ttl = ttl
+        for user_id in user_ids:  # remplissage
+            call(user_id)
+        counter.count = 0
+        report("route admin, current_user en cache", measure(lambda: call(next(ids)), repeat=args.repeat, warmup=0))
+        cached = counter.count / args.repeat
+        print(f"\nrequêtes SQL par appel : {uncached:.2f} -> {cached:.2f} "
+              f"({user_cache.hits} succès, {user_cache.misses} défauts de cache)")
+        if args.users <= user_cache.backend.maxsize:
+            assert cached == 0, "utilisateur rechargé malgré le cache"
+
+        # Une modification par la facade est visible à l'appel suivant
+        UserFacade.update_user(user_ids[0], is_admin=False)
+        response = client.get("/api/cache/stats", headers=headers[user_ids[0]])
+        assert response.status_code == 403, "droits admin restés en cache"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""
+Débit et pic mémoire de l'export en flux du catalogue.
+
+    python -m benchmarks.bench_export --places 500000
+"""
+import argparse
+import resource
+import time
+
+from benchmarks._common import bench_app, seed_catalog
+from app.facades.place_facade import PlaceFacade, EXPORT_FORMATS
+
+
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--places", type=int, default=500_000)
+    args = parser.parse_args()
+
+    with bench_app() as app:
+        seed_catalog(args.places)
+        print(f"pic mémoire après génération : {peak_rss_mb():.0f} Mo\n")
+
+        for fmt in EXPORT_FORMATS:
+            start = time.perf_counter()
+            size = sum(len(line) for line in PlaceFacade.export_places(fmt))
+            elapsed = time.perf_counter() - start
+            print(f"{fmt:<7} {args.places / elapsed:10.0f} lignes/s  {size / 2**20:8.1f} Mo  "
+                  f"pic mémoire {peak_rss_mb():.0f} Mo")
+
+        # Même flux à travers la route HTTP
+        client = app.test_client()
+        start = time.perf_counter()
+        size = 0
+        with client.get("/api/places/export?format=ndjson", buffered=False) as response:
+            for chunk in response.response:
+                size += len(chunk)
+        elapsed = time.perf_counter() - start
+        print(f"{'HTTP':<7} {args.places / elapsed:10.0f} lignes/s  {size / 2**20:8.1f} Mo  "
+              f"pic mémoire {peak_rss_mb():.0f} Mo")
+
+
+if __name__ == "__main__":
+    main()
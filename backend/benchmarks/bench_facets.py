@@ -0,0 +1,56 @@
+"""
+Coût des facettes de recherche selon la taille du catalogue : agrégat
+précalculé (sans filtre), recalcul de l'agrégat et facettes sur un
+ensemble filtré.
+
+    python -m benchmarks.bench_facets --sizes 10000,50000,200000
+"""
+import argparse
+
+from benchmarks._common import bench_app, seed_catalog, measure, report
+from app.extensions import db
+from app.models.generation import bump_generation
+from app.models.place import FACETS_GENERATION
+
+FACETS = "facets=amenities,town,country,price"
+FILTERED = [
+    ("ville", "town=Lyon"),
+    ("prix", "min_price=100&max_price=300"),
+    ("2 équipements", "amenities=Wifi,Balcon"),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", default="10000,50000,200000")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    for size in (int(value) for value in args.sizes.split(",")):
+        with bench_app() as app:
+            seed_catalog(size)
+            print(f"\n--- {size} places ---")
+            client = app.test_client()
+
+            def search(qs):
+                response = client.get(f"/api/places/search?limit=20&{qs}")
+                assert response.status_code == 200
+                return response
+
+            report("sans facettes", measure(lambda: search(""), repeat=args.repeat))
+            report("sans filtre (agrégat)", measure(lambda: search(FACETS), repeat=args.repeat))
+
+            def rebuild():
+                # Simule une écriture : l'agrégat est recalculé à la lecture suivante
+                bump_generation(db.session.connection(), FACETS_GENERATION)
+                db.session.commit()
+                search(FACETS)
+            report("sans filtre (recalcul)", measure(rebuild, repeat=args.repeat))
+
+            for label, qs in FILTERED:
+                report(f"{label} (requêtes groupées)",
+                       measure(lambda: search(f"{qs}&{FACETS}"), repeat=args.repeat))
+
+
+if __name__ == "__main__":
+    main()
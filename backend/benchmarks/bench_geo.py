@@ -0,0 +1,61 @@
+"""
+Recherche géographique : index de cellules contre parcours complet.
+
+    python -m benchmarks.bench_geo --places 100000
+"""
+import argparse
+import itertools
+import random
+
+from benchmarks._common import bench_app, seed_catalog, measure, report
+from app import geo
+from app.extensions import db
+from app.facades.place_facade import PlaceFacade
+from app.models import Place
+
+
+def naive_nearby(latitude, longitude, radius_km, limit):
+    """Ancienne approche : toutes les coordonnées + haversine en Python"""
+    rows = db.session.query(Place.id, Place.latitude, Place.longitude).all()
+    hits = []
+    for place_id, lat, lng in rows:
+        distance = geo.haversine_km(latitude, longitude, lat, lng)
+        if distance <= radius_km:
+            hits.append((distance, place_id))
+    return sorted(hits)[:limit]
+
+
+def naive_bbox(min_lat, min_lng, max_lat, max_lng):
+    return [row for row in db.session.query(Place.id, Place.latitude, Place.longitude).all()
+            if min_lat <= row.latitude <= max_lat and min_lng <= row.longitude <= max_lng]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--places", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=30)
+    args = parser.parse_args()
+
+    with bench_app():
+        seed_catalog(args.places)
+        rng = random.Random(7)
+        points = [(rng.uniform(-50, 50), rng.uniform(-140, 140)) for _ in range(args.repeat)]
+        points_iter = itertools.cycle(points)
+
+        for radius in (25, 100, 500):
+            report(f"rayon {radius} km — index",
+                   measure(lambda: PlaceFacade.get_nearby_places(*next(points_iter), radius, 20),
+                           repeat=args.repeat))
+            report(f"rayon {radius} km — parcours complet",
+                   measure(lambda: naive_nearby(*next(points_iter), radius, 20), repeat=args.repeat))
+
+        viewport = (40.0, -5.0, 45.0, 5.0)
+        report("viewport 5°x10° — index",
+               measure(lambda: PlaceFacade.filter_places({"bbox": viewport}).limit(200).all(),
+                       repeat=args.repeat))
+        report("viewport 5°x10° — parcours complet",
+               measure(lambda: naive_bbox(*viewport)[:200], repeat=args.repeat))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Débit de l'import en masse contre la création place par place
+(PlaceFacade.create_place).
+
+    python -m benchmarks.bench_import --rows 20000
+"""
+import argparse
+import random
+import time
+
+from benchmarks._common import bench_app, seed_catalog, AMENITIES, TOWNS
+from app.extensions import db
+from app.facades.place_facade import PlaceFacade
+from app.models import User
+
+
+def synthetic_rows(n, prefix, seed=1):
+    rng = random.Random(seed)
+    for i in range(n):
+        town, country = rng.choice(TOWNS)
+        yield {
+            "name": f"{prefix} {i}",
+            "description": f"Logement importé {i}",
+            "price_by_night": rng.randint(20, 500),
+            "town": town,
+            "country": country,
+            "latitude": rng.uniform(-60, 60),
+            "longitude": rng.uniform(-150, 150),
+            # Quelques nouveaux équipements en plus du catalogue existant
+            "amenities": rng.sample(AMENITIES, 3) + [f"Option {rng.randint(1, 50)}"],
+            "images": [f"https://img.bench.local/{prefix}/{i}.jpg"],
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--per-row", type=int, default=2_000,
+                        help="lignes pour le chemin place par place (plus lent)")
+    args = parser.parse_args()
+
+    with bench_app():
+        seed_catalog(1_000)
+        owner_id = db.session.query(User.id).first()[0]
+
+        start = time.perf_counter()
+        for row in synthetic_rows(args.per_row, "facade"):
+            PlaceFacade.create_place(row, owner_id)
+        elapsed = time.perf_counter() - start
+        print(f"create_place ligne par ligne  {args.per_row / elapsed:10.0f} places/s")
+
+        start = time.perf_counter()
+        rows = enumerate(synthetic_rows(args.rows, "bulk"), start=1)
+        result = PlaceFacade.bulk_import(rows, owner_id)
+        elapsed = time.perf_counter() - start
+        print(f"bulk_import (lots de 500)     {result['created'] / elapsed:10.0f} places/s "
+              f"({result['created']} créées, {len(result['errors'])} erreurs)")
+
+
+if __name__ == "__main__":
+    main()
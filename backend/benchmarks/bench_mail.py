@@ -0,0 +1,189 @@
+"""
+Envoi des codes 2FA contre un serveur SMTP local simulé (délais de
+connexion, d'authentification et d'envoi configurables, refus temporaires
+4xx, connexions coupées par le serveur).
+
+Compare l'ancien envoi synchrone (une connexion + AUTH par message, dans la
+requête) à /login avec la file d'envoi, puis vérifie que chaque code a été
+remis malgré les refus et les coupures.
+
+    python -m benchmarks.bench_mail --logins 200 --auth-delay 0.3
+
+--server host:port vise un autre serveur local, par exemple aiosmtpd
+(`python -m aiosmtpd -n -l localhost:8025`) ; les délais et pannes simulés
+ne s'appliquent alors pas.
+"""
+import argparse
+import itertools
+import os
+import smtplib
+import socketserver
+import threading
+import time
+from email.message import EmailMessage
+
+from werkzeug.security import generate_password_hash
+
+# Hachage des mots de passe dans le thread, au coût des empreintes du jeu de
+# données (à choisir avant l'import de la config)
+os.environ.setdefault("PASSWORD_HASH_METHOD", "pbkdf2:sha256:1")
+os.environ.setdefault("PASSWORD_HASH_WORKERS", "0")
+
+from benchmarks._common import bench_app, measure, report  # noqa: E402
+from app.extensions import db, mail_queue  # noqa: E402
+from app.models import User  # noqa: E402
+
+PASSWORD = "bench-password"
+
+
+class StandInSMTP(socketserver.ThreadingTCPServer):
+    """Serveur SMTP minimal (EHLO, AUTH PLAIN, MAIL, RCPT, DATA) avec délais et pannes"""
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, connect_delay, auth_delay, message_delay, fail_every, max_per_connection):
+        super().__init__(("127.0.0.1", 0), StandInHandler)
+        self.connect_delay = connect_delay
+        self.auth_delay = auth_delay
+        self.message_delay = message_delay
+        self.fail_every = fail_every
+        self.max_per_connection = max_per_connection
+        self.lock = threading.Lock()
+        self.counter = itertools.count(1)
+        self.delivered = []
+
+    def should_fail(self):
+        return self.fail_every and next(self.counter) % self.fail_every == 0
+
+
+class StandInHandler(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self):
+        server = self.server
+        time.sleep(server.connect_delay)
+        self.reply("220 localhost stand-in")
+        accepted = 0
+        recipients = []
+        for raw in self.rfile:
+            command = raw.decode(errors="replace").strip()
+            verb = command.split(" ", 1)[0].upper()
+            if verb == "EHLO":
+                self.reply("250-localhost")
+                self.reply("250 AUTH PLAIN")
+            elif verb == "AUTH":
+                time.sleep(server.auth_delay)
+                self.reply("235 Authentication successful")
+            elif verb == "MAIL":
+                recipients = []
+                self.reply("250 OK")
+            elif verb == "RCPT":
+                recipients.append(command.split(":", 1)[1].strip("<> "))
+                self.reply("250 OK")
+            elif verb == "DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                for line in self.rfile:
+                    if line in (b".\r\n", b".\n"):
+                        break
+                time.sleep(server.message_delay)
+                if server.should_fail():
+                    self.reply("451 Temporary failure, try again later")
+                    continue
+                with server.lock:
+                    server.delivered.extend(recipients)
+                self.reply("250 Queued")
+                accepted += 1
+                if server.max_per_connection and accepted >= server.max_per_connection:
+                    return  # coupure sans QUIT : le client doit se reconnecter
+            elif verb in ("RSET", "NOOP", "HELO"):
+                self.reply("250 OK")
+            elif verb == "QUIT":
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("502 Command not implemented")
+
+
+def send_synchronously(host, port, to):
+    """Ancien send_2fa_code : nouvelle connexion et AUTH pour chaque message"""
+    msg = EmailMessage()
+    msg["Subject"] = "Your 2FA Code"
+    msg["From"] = "HBNB <bench@bench.local>"
+    msg["To"] = to
+    msg.set_content("Votre code de vérification 2FA est : 123456")
+    with smtplib.SMTP(host, port) as server:
+        server.login("bench", "secret")
+        server.send_message(msg)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--connect-delay", type=float, default=0.05)
+    parser.add_argument("--auth-delay", type=float, default=0.2)
+    parser.add_argument("--message-delay", type=float, default=0.005)
+    parser.add_argument("--fail-every", type=int, default=10)
+    parser.add_argument("--max-per-connection", type=int, default=50)
+    parser.add_argument("--server", help="host:port d'un serveur SMTP local existant")
+    args = parser.parse_args()
+
+    stand_in = None
+    if args.server:
+        host, port = args.server.rsplit(":", 1)
+        port = int(port)
+    else:
+        stand_in = StandInSMTP(args.connect_delay, args.auth_delay, args.message_delay,
+                               args.fail_every, args.max_per_connection)
+        host, port = stand_in.server_address
+        threading.Thread(target=stand_in.serve_forever, daemon=True).start()
+
+    with bench_app() as app:
+        mail_queue.server, mail_queue.port, mail_queue.use_tls = host, port, False
+        mail_queue.username, mail_queue.password = "bench", "secret"
+        mail_queue.workers, mail_queue.backoff = args.workers, 0.05
+
+        password_hash = generate_password_hash(PASSWORD, method="pbkdf2:sha256:1")
+        emails = [f"user{i}@bench.local" for i in range(args.logins)]
+        db.session.execute(User.__table__.insert(), [
+            {"username": f"user{i}", "email": email, "password_hash": password_hash,
+             "country": "France", "town": "Paris", "is_admin": False}
+            for i, email in enumerate(emails)])
+        db.session.commit()
+
+        # Ancien chemin mesuré sans pannes (un refus y donnait un 500)
+        if stand_in:
+            stand_in.fail_every = 0
+        report("envoi synchrone (ancien /login)",
+               measure(lambda: send_synchronously(host, port, "sync@bench.local"), repeat=20, warmup=0))
+        if stand_in:
+            stand_in.fail_every = args.fail_every
+            with stand_in.lock:
+                stand_in.delivered.clear()
+
+        client = app.test_client()
+        logins = iter(emails)
+
+        def login():
+            response = client.post("/api/auth/login", json={"email": next(logins), "password": PASSWORD})
+            assert response.status_code == 200, response.json
+
+        start = time.perf_counter()
+        report("/login avec file d'envoi", measure(login, repeat=args.logins, warmup=0))
+        assert mail_queue.flush(timeout=120), "file d'envoi non vidée"
+        elapsed = time.perf_counter() - start
+
+        stats = mail_queue.stats()
+        print(f"{stats['sent']} messages remis en {elapsed:.2f} s par {args.workers} threads, "
+              f"{stats['connections']} connexions SMTP, {stats['retried']} nouvelles tentatives, "
+              f"{stats['failed']} abandons")
+        print(f"file -> remise : p50={stats['latency_ms_p50']} ms  p95={stats['latency_ms_p95']} ms")
+        assert stats["sent"] == args.logins and stats["failed"] == 0
+        if stand_in:
+            assert sorted(stand_in.delivered) == sorted(emails), "codes non remis"
+            stand_in.shutdown()
+
+
+if __name__ == "__main__":
+    main()
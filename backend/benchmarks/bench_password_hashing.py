@@ -0,0 +1,126 @@
+"""
+Débit de /login selon l'algorithme et le coût du hachage des mots de passe.
+
+Pour chaque réglage, des clients concurrents (threads) se connectent ; le
+calcul est fait par le pool de processus (app/hashing.py). Affiche les
+connexions par seconde et par processus de hachage, les latences et les
+refus 503 quand le pool est saturé, puis vérifie la mise à niveau des
+empreintes d'un ancien format.
+
+    python -m benchmarks.bench_password_hashing --workers 4 --clients 16 --logins 200
+"""
+import argparse
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.security import generate_password_hash
+
+from benchmarks._common import bench_app, percentile
+from app.extensions import db, password_hasher
+from app.hashing import normalize_method
+from app.models import User
+from app.routes import auth
+
+PASSWORD = "bench-password"
+METHODS = ["pbkdf2:sha256:100000", "pbkdf2:sha256:600000", "scrypt:16384:8:1", "scrypt:32768:8:1"]
+LEGACY_METHOD = "pbkdf2:sha256:1000"
+
+
+def configure(method, workers, max_pending, wait):
+    password_hasher.method = normalize_method(method)
+    password_hasher.workers = workers
+    password_hasher.max_pending = max_pending
+    password_hasher.wait = wait
+    password_hasher._slots = threading.BoundedSemaphore(max_pending)
+
+
+def run_logins(app, emails, clients):
+    """Connexions concurrentes ; retourne (durée, latences des 200, nombre de 503)"""
+    local = threading.local()
+    latencies, shed = [], [0]
+    lock = threading.Lock()
+
+    def login(email):
+        if not hasattr(local, "client"):
+            local.client = app.test_client()
+        start = time.perf_counter()
+        response = local.client.post("/api/auth/login", json={"email": email, "password": PASSWORD})
+        elapsed = (time.perf_counter() - start) * 1000
+        with lock:
+            if response.status_code == 200:
+                latencies.append(elapsed)
+            elif response.status_code == 503:
+                shed[0] += 1
+            else:
+                raise AssertionError(response.json)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(clients) as pool:
+        list(pool.map(login, emails))
+    return time.perf_counter() - start, latencies, shed[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--max-pending", type=int, default=0,
+                        help="calculs en cours avant refus (défaut : 4 par processus)")
+    parser.add_argument("--wait", type=float, default=2.0)
+    parser.add_argument("--methods", default=",".join(METHODS))
+    args = parser.parse_args()
+    max_pending = args.max_pending or args.workers * 4
+
+    # Pas d'e-mail : on mesure la vérification du mot de passe
+    auth.send_2fa_code = lambda email, code: True
+
+    with bench_app() as app:
+        emails = [f"user{i}@bench.local" for i in range(args.logins)]
+        db.session.execute(User.__table__.insert(), [
+            {"username": f"user{i}", "email": email, "password_hash": "x",
+             "country": "France", "town": "Paris", "is_admin": False}
+            for i, email in enumerate(emails)])
+        db.session.commit()
+
+        print(f"{args.workers} processus de hachage, {args.clients} clients, "
+              f"{max_pending} calculs en cours au plus\n")
+        for method in args.methods.split(","):
+            configure(method, args.workers, max_pending, args.wait)
+            db.session.execute(User.__table__.update().values(
+                password_hash=generate_password_hash(PASSWORD, method=method)))
+            db.session.commit()
+            run_logins(app, emails[:args.workers], args.workers)  # démarrage du pool
+
+            elapsed, latencies, shed = run_logins(app, emails, args.clients)
+            rate = len(latencies) / elapsed
+            p50 = percentile(latencies, 50) if latencies else float("nan")
+            p95 = percentile(latencies, 95) if latencies else float("nan")
+            print(f"{method:<24} {rate:8.1f} connexions/s  {rate / args.workers:7.1f} /s par processus  "
+                  f"p50={p50:8.1f} ms  p95={p95:8.1f} ms  503={shed}")
+
+        # Empreintes d'un ancien format : recalculées à la connexion réussie
+        db.session.execute(User.__table__.update().values(
+            password_hash=generate_password_hash(PASSWORD, method=LEGACY_METHOD)))
+        db.session.commit()
+        configure(METHODS[-1], args.workers, len(emails), args.wait)
+        _, latencies, _ = run_logins(app, emails, args.clients)
+        db.session.expire_all()
+        upgraded = db.session.query(User).filter(User.password_hash.like(f"{METHODS[-1]}$%")).count()
+        print(f"\nmise à niveau {LEGACY_METHOD} -> {METHODS[-1]} : {upgraded}/{len(emails)} empreintes")
+        assert upgraded == len(latencies) == len(emails)
+
+        # Méthode configurée sous forme courte : les empreintes à jour ne
+        # sont pas recalculées
+        configure("scrypt", args.workers, len(emails), args.wait)
+        before = password_hasher.upgraded
+        _, latencies, _ = run_logins(app, emails, args.clients)
+        print(f"méthode courte 'scrypt' ({password_hasher.method}) : "
+              f"{password_hasher.upgraded - before}/{len(latencies)} empreintes recalculées")
+        assert len(latencies) == len(emails) and password_hasher.upgraded == before
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""
+Taille de réponse et latence de GET /api/places selon ?fields= / ?expand=,
+comparées au place_model complet.
+
+    python -m benchmarks.bench_place_fields --places 20000 --reviews 10
+"""
+import argparse
+
+from benchmarks._common import bench_app, seed_catalog, seed_reviews, measure, report
+
+VARIANTS = [
+    ("place_model complet", ""),
+    ("carte : nom, prix, images", "fields=name,price_by_night,rating_avg&expand=images"),
+    ("colonnes seules", "fields=name,price_by_night,town,country"),
+    ("tout sauf les avis", "expand=amenities,images"),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--places", type=int, default=20_000)
+    parser.add_argument("--reviews", type=int, default=10, help="avis par place")
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=30)
+    args = parser.parse_args()
+
+    with bench_app() as app:
+        seed_catalog(args.places)
+        seed_reviews(args.reviews)
+        client = app.test_client()
+
+        for label, qs in VARIANTS:
+            url = f"/api/places/?limit={args.limit}&{qs}"
+            size = len(client.get(url).data)
+            report(f"{label} ({size / 1024:.1f} Ko)", measure(lambda: client.get(url), repeat=args.repeat))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""
+Latence de GET /api/places/search par combinaison de filtres.
+
+    python -m benchmarks.bench_place_search --places 100000
+"""
+import argparse
+import time
+
+from benchmarks._common import bench_app, seed_catalog, measure, report
+
+COMBINATIONS = [
+    ("sans filtre", ""),
+    ("prix", "min_price=100&max_price=150"),
+    ("ville", "town=Lyon"),
+    ("pays + prix", "country=France&min_price=50&max_price=80"),
+    ("1 équipement", "amenities=Wifi"),
+    ("3 équipements", "amenities=Wifi,Piscine,Parking"),
+    ("ville + prix + 2 équipements", "town=Paris&min_price=100&max_price=300&amenities=Wifi,Balcon"),
+    ("tri prix + ville", "town=Dakar&sort=price_by_night"),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--places", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    with bench_app() as app:
+        start = time.perf_counter()
+        seed_catalog(args.places)
+        print(f"{args.places} places générées en {time.perf_counter() - start:.1f} s\n")
+
+        client = app.test_client()
+        for label, qs in COMBINATIONS:
+            url = f"/api/places/search?limit=20&{qs}"
+            assert client.get(url).status_code == 200
+            report(label, measure(lambda: client.get(url), repeat=args.repeat))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Soumission d'avis sur un gros historique de réservations : vérifications
+d'avant (lecture de l'avis existant + recherche d'un séjour terminé) contre
+la lecture par clé de review_eligibility, puis POST complets (avis créés et
+doublons refusés par la contrainte unique).
+
+    python -m benchmarks.bench_review_submit --reservations 2000000
+"""
+import argparse
+import itertools
+from datetime import datetime, timedelta
+
+from flask_jwt_extended import create_access_token
+
+from benchmarks._common import bench_app, seed_catalog, seed_reservations, measure, report
+from app.extensions import db
+from app.facades.review_facade import ReviewFacade
+from app.models import Review, Reservation, ReviewEligibility
+
+
+def previous_check(user_id, place_id):
+    """Les deux lectures faites avant chaque avis jusqu'ici"""
+    Review.query.filter_by(user_id=user_id, place_id=place_id).first()
+    return Reservation.query.filter_by(user_id=user_id, place_id=place_id) \
+        .filter(Reservation.end_datetime <= datetime.utcnow() - timedelta(minutes=15)).first()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--places", type=int, default=10_000)
+    parser.add_argument("--reservations", type=int, default=2_000_000)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    with bench_app() as app:
+        seed_catalog(args.places)
+        seed_reservations(args.reservations)
+        print(f"{ReviewFacade.backfill_eligibility()} couples utilisateur / place éligibles\n")
+
+        pairs = [(row.user_id, row.place_id) for row in ReviewEligibility.query
+                 .filter(ReviewEligibility.eligible_from <= datetime.utcnow())
+                 .limit(args.repeat * 3).all()]
+        checks = itertools.cycle(pairs)
+        report("vérification d'avant (2 lectures)",
+               measure(lambda: previous_check(*next(checks)), repeat=args.repeat))
+        report("is_eligible (clé primaire)",
+               measure(lambda: ReviewFacade.is_eligible(*next(checks)), repeat=args.repeat))
+
+        client = app.test_client()
+        tokens = {}
+
+        def post(pair, expected):
+            user_id, place_id = pair
+            if user_id not in tokens:
+                tokens[user_id] = create_access_token(identity=str(user_id))
+            response = client.post(f"/api/reviews/places/{place_id}/reviews",
+                                   json={"rating": 5, "comment": "Parfait"},
+                                   headers={"Authorization": f"Bearer {tokens[user_id]}"})
+            assert response.status_code == expected, response.json
+
+        fresh = iter(pairs)
+        report("POST avis (créé)", measure(lambda: post(next(fresh), 201), repeat=args.repeat, warmup=0))
+        duplicates = itertools.cycle(pairs[:args.repeat])
+        report("POST avis (doublon refusé)", measure(lambda: post(next(duplicates), 400), repeat=args.repeat))
+        print(f"\n{db.session.query(Review).count()} avis enregistrés")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Nombre de requêtes SQL et latence des listes d'avis (auteurs compris)
+selon la taille de la page. Le nombre de requêtes doit être le même pour
+toutes les tailles : le script échoue sinon.
+
+    python -m benchmarks.bench_reviews --places 1000 --reviews-per-place 100
+"""
+import argparse
+
+from benchmarks._common import bench_app, seed_catalog, seed_reviews, measure, report, QueryCounter
+from app.extensions import db
+
+# places : versions (ETag), existence de la place, page d'avis jointe aux auteurs
+# reviews : page d'avis jointe aux auteurs
+MAX_QUERIES = {"places": 3, "reviews": 1}
+URLS = {
+    "places": "/api/places/1/reviews?limit={limit}",
+    "reviews": "/api/reviews/places/1/reviews?limit={limit}",
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--places", type=int, default=1000)
+    parser.add_argument("--reviews-per-place", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    with bench_app() as app:
+        seed_catalog(args.places, n_owners=max(100, args.reviews_per_place))
+        seed_reviews(args.reviews_per_place)
+        client = app.test_client()
+        counter = QueryCounter(db.engine)
+
+        for namespace, url in URLS.items():
+            counts = set()
+            for limit in (10, 50, args.reviews_per_place):
+                counter.count = 0
+                response = client.get(url.format(limit=limit))
+                assert response.status_code == 200 and len(response.json) == limit
+                assert all(review["user_name"] for review in response.json)
+                counts.add(counter.count)
+                assert counter.count <= MAX_QUERIES[namespace], \
+                    f"{namespace} : {counter.count} requêtes pour {limit} avis"
+                report(f"{namespace} ({limit} avis, {counter.count} requêtes)",
+                       measure(lambda: client.get(url.format(limit=limit)), repeat=args.repeat))
+            assert len(counts) == 1, f"{namespace} : nombre de requêtes variable {sorted(counts)}"
+
+            # Parcours complet par curseur
+            seen, next_url = [], url.format(limit=7)
+            while next_url:
+                response = client.get(next_url)
+                seen += [review["id"] for review in response.json]
+                cursor = response.headers.get("X-Next-Cursor")
+                next_url = f"{url.format(limit=7)}&after={cursor}" if cursor else None
+            assert len(seen) == len(set(seen)) == args.reviews_per_place
+
+
+if __name__ == "__main__":
+    main()
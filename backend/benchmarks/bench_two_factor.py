@@ -0,0 +1,162 @@
+"""
+Connexions 2FA concurrentes sur plusieurs workers (processus) : chaque
+/login est fait par un worker et le /verify-2fa correspondant par le
+suivant, comme derrière un répartiteur de charge. Une partie des codes
+reçoit trop de mauvais essais (doit finir en 429) et chaque code utilisé est
+rejoué (doit finir en 404). Vérifie ensuite des connexions simultanées
+pour un même e-mail, puis mesure le balayage des codes abandonnés.
+
+    python -m benchmarks.bench_two_factor --workers 4 --logins 200 --backend database
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Le backend et le hachage des mots de passe (dans le thread, au coût des
+# empreintes du jeu de données) doivent être choisis avant l'import de la config
+os.environ.setdefault("PASSWORD_HASH_METHOD", "pbkdf2:sha256:1")
+os.environ.setdefault("PASSWORD_HASH_WORKERS", "0")
+if "--backend" in sys.argv:
+    os.environ["TWO_FACTOR_BACKEND"] = sys.argv[sys.argv.index("--backend") + 1]
+
+from werkzeug.security import generate_password_hash  # noqa: E402
+
+from benchmarks._common import bench_app, measure, report  # noqa: E402
+from app import create_app  # noqa: E402
+from app.extensions import db, two_factor_store  # noqa: E402
+from app.models import User  # noqa: E402
+from app.routes import auth  # noqa: E402
+from app.two_factor import SWEEP_BATCH  # noqa: E402
+
+PASSWORD = "bench-password"
+BRUTE_FORCE_EVERY = 10
+
+
+def worker(index, n_workers, emails, inbox, outboxes, results):
+    """Connecte ses utilisateurs, transmet les codes au worker suivant, vérifie ceux reçus"""
+    app = create_app()
+    client = app.test_client()
+    sent = {}
+
+    def capture(email, code):
+        sent[email] = code
+        return True
+
+    auth.send_2fa_code = capture
+    stats = {"verified": 0, "failed": 0, "locked": 0, "replays_rejected": 0, "latencies": []}
+
+    with app.app_context():
+        mine = emails[index::n_workers]
+        for email in mine:
+            response = client.post("/api/auth/login", json={"email": email, "password": PASSWORD})
+            assert response.status_code == 200, response.json
+            outboxes[(index + 1) % n_workers].put((email, sent.pop(email)))
+
+        expected = len(emails[(index - 1) % n_workers::n_workers])
+        for _ in range(expected):
+            email, code = inbox.get()
+            if emails.index(email) % BRUTE_FORCE_EVERY == 0:
+                wrong = f"{(int(code) + 1) % 1000000:06d}"
+                statuses = [client.post("/api/auth/verify-2fa", json={"email": email, "code": wrong}).status_code
+                            for _ in range(two_factor_store.max_attempts)]
+                after = client.post("/api/auth/verify-2fa", json={"email": email, "code": code}).status_code
+                if statuses[-1] == 429 and after == 404:
+                    stats["locked"] += 1
+                else:
+                    stats["failed"] += 1
+                continue
+
+            start = time.perf_counter()
+            response = client.post("/api/auth/verify-2fa", json={"email": email, "code": code})
+            stats["latencies"].append((time.perf_counter() - start) * 1000)
+            if response.status_code == 200:
+                stats["verified"] += 1
+            else:
+                stats["failed"] += 1
+            replay = client.post("/api/auth/verify-2fa", json={"email": email, "code": code})
+            if replay.status_code == 404:
+                stats["replays_rejected"] += 1
+    results.put(stats)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--abandoned", type=int, default=5000)
+    parser.add_argument("--backend", choices=("database", "memory"), default="database")
+    args = parser.parse_args()
+
+    with bench_app() as app:
+        # Hachage rapide : on mesure le stockage des codes, pas le mot de passe
+        password_hash = generate_password_hash(PASSWORD, method="pbkdf2:sha256:1")
+        emails = [f"user{i}@bench.local" for i in range(args.logins)]
+        db.session.execute(User.__table__.insert(), [
+            {"username": f"user{i}", "email": email, "password_hash": password_hash,
+             "country": "France", "town": "Paris", "is_admin": False}
+            for i, email in enumerate(emails)])
+        db.session.commit()
+        db.session.remove()
+        db.engine.dispose()
+
+        context = multiprocessing.get_context("fork")
+        inboxes = [context.Queue() for _ in range(args.workers)]
+        results = context.Queue()
+        processes = [context.Process(target=worker, args=(index, args.workers, emails,
+                                                          inboxes[index], inboxes, results))
+                     for index in range(args.workers)]
+        start = time.perf_counter()
+        for process in processes:
+            process.start()
+        stats = [results.get() for _ in processes]
+        for process in processes:
+            process.join()
+        elapsed = time.perf_counter() - start
+
+        totals = {key: sum(s[key] for s in stats) for key in ("verified", "failed", "locked", "replays_rejected")}
+        latencies = [sample for s in stats for sample in s["latencies"]]
+        print(f"{args.workers} workers, {args.logins} connexions en {elapsed:.2f} s "
+              f"({two_factor_store.stats()['backend']})")
+        print(f"vérifiés sur un autre worker {totals['verified']}, échecs {totals['failed']}, "
+              f"bloqués après {two_factor_store.max_attempts} essais {totals['locked']}, "
+              f"rejeux refusés {totals['replays_rejected']}")
+        if latencies:
+            report("verify-2fa (autre worker)", latencies)
+
+        if args.backend == "database":
+            assert totals["failed"] == 0, "codes refusés par un autre worker"
+            assert totals["replays_rejected"] == totals["verified"], "code accepté deux fois"
+            assert two_factor_store.stats()["size"] == 0, "codes restés en attente"
+
+        # Connexions simultanées pour un même e-mail : chaque code remplace le
+        # précédent, aucune ne doit échouer sur la clé primaire
+        def login(_):
+            with app.app_context():
+                return two_factor_store.issue("same@bench.local", 1)
+
+        with ThreadPoolExecutor(args.workers) as pool:
+            issued = list(pool.map(login, range(args.workers * 25)))
+        pending = two_factor_store.stats()["size"]
+        print(f"{len(issued)} connexions simultanées pour un même e-mail : "
+              f"{pending} code(s) en attente")
+        if args.backend == "database":
+            assert pending == 1, "un code par e-mail"
+        two_factor_store.clear()
+
+        # Codes abandonnés : une fois expirés, chaque écriture en retire SWEEP_BATCH
+        for i in range(args.abandoned):
+            two_factor_store.backend.put(f"gone{i}@bench.local", "x", 0, ttl=1)
+        time.sleep(1.1)
+        before = two_factor_store.stats()["size"]
+        counter = iter(range(10**9))
+        report(f"issue() avec {args.abandoned} codes expirés",
+               measure(lambda: two_factor_store.issue(f"new{next(counter)}@bench.local", 1), repeat=200))
+        print(f"codes en attente : {before} -> {two_factor_store.stats()['size']} "
+              f"({SWEEP_BATCH} expirés retirés par écriture)")
+
+
+if __name__ == "__main__":
+    main()
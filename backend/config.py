@@ -6,11 +6,48 @@ class Config:
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     SECRET_KEY = os.getenv("FLASK_SECRET_KEY", "secret-key")
 
+    # Cache des GET publics : "memory" (par processus), "redis" (partagé
+    # entre workers, CACHE_REDIS_URL) ou "none"
+    CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory")
+    CACHE_TTL = int(os.getenv("CACHE_TTL", "30"))
+    CACHE_MAXSIZE = int(os.getenv("CACHE_MAXSIZE", "1024"))
+    CACHE_REDIS_URL = os.getenv("CACHE_REDIS_URL", "redis://localhost:6379/0")
+
+    # Réservations terminées depuis plus de N jours déplacées vers
+    # reservations_archive (archive_reservations.py)
+    RESERVATION_ARCHIVE_DAYS = int(os.getenv("RESERVATION_ARCHIVE_DAYS", "30"))
+
+    # Codes 2FA en attente : "database" (table two_factor_codes, partagée
+    # entre workers) ou "memory" (un seul processus)
+    TWO_FACTOR_BACKEND = os.getenv("TWO_FACTOR_BACKEND", "database")
+    TWO_FACTOR_TTL = int(os.getenv("TWO_FACTOR_TTL", "600"))
+    TWO_FACTOR_MAX_ATTEMPTS = int(os.getenv("TWO_FACTOR_MAX_ATTEMPTS", "5"))
+
     # Configuration pour l'envoi d'e-mail via Gmail
-    MAIL_SERVER = 'smtp.gmail.com'
-    MAIL_PORT = 587
-    MAIL_USE_TLS = True
+    MAIL_SERVER = os.getenv("MAIL_SERVER", 'smtp.gmail.com')
+    MAIL_PORT = int(os.getenv("MAIL_PORT", "587"))
+    MAIL_USE_TLS = os.getenv("MAIL_USE_TLS", "true").lower() == "true"
     MAIL_USE_SSL = False
     MAIL_USERNAME = 'teckivoire@gmail.com'  # Ton adresse Gmail
-    MAIL_PASSWORD = 'ynsbluupsuxntxrr'      # Mot de passe d’application
+    MAIL_PASSWORD = os.getenv("MAIL_PASSWORD", 'ynsbluupsuxntxrr')  # Mot de passe d’application
     MAIL_DEFAULT_SENDER = 'teckivoire@gmail.com'
+
+    # File d'envoi des e-mails (app/mailer.py) : threads d'envoi gardant
+    # chacun une connexion SMTP ouverte, nouvelles tentatives espacées
+    MAIL_QUEUE_WORKERS = int(os.getenv("MAIL_QUEUE_WORKERS", "2"))
+    MAIL_QUEUE_MAXSIZE = int(os.getenv("MAIL_QUEUE_MAXSIZE", "1000"))
+    MAIL_MAX_RETRIES = int(os.getenv("MAIL_MAX_RETRIES", "3"))
+    MAIL_RETRY_BACKOFF = float(os.getenv("MAIL_RETRY_BACKOFF", "1.0"))
+    MAIL_IDLE_TIMEOUT = int(os.getenv("MAIL_IDLE_TIMEOUT", "30"))
+
+    # Hachage des mots de passe (app/hashing.py) : algorithme et coût au
+    # format Werkzeug, pool de processus (0 = dans le thread de la requête)
+    PASSWORD_HASH_METHOD = os.getenv("PASSWORD_HASH_METHOD", "scrypt:32768:8:1")
+    PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(os.cpu_count() or 1)))
+    PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "0")) or None
+    PASSWORD_HASH_WAIT = float(os.getenv("PASSWORD_HASH_WAIT", "0.5"))
+
+    # Utilisateur authentifié (app/current_user.py) : cache par processus de
+    # (id, is_admin, username), vidé par UserFacade.update_user / delete_user
+    CURRENT_USER_TTL = int(os.getenv("CURRENT_USER_TTL", "30"))
+    CURRENT_USER_CACHE_SIZE = int(os.getenv("CURRENT_USER_CACHE_SIZE", "1024"))
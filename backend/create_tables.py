@@ -6,9 +6,13 @@ sans utiliser Flask-Migrate
 
 from app import create_app
 from app.extensions import db
+from app.fulltext import install_fulltext
 
 app = create_app()
 
 with app.app_context():  # Obligatoire pour que db "voit" l'app
     db.create_all()
+    # Index plein texte pour les bases créées avant son introduction
+    with db.engine.begin() as connection:
+        install_fulltext(connection)
     print("✅ Tables créées avec succès !")
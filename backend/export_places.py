@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Script pour exporter tout le catalogue des places (avec équipements et
+images) en NDJSON ou CSV, en flux et à mémoire constante
+
+Usage : python export_places.py [--format ndjson|csv] [--output places.ndjson]
+"""
+
+import argparse
+import resource
+import sys
+import time
+
+from app import create_app
+from app.facades.place_facade import PlaceFacade, EXPORT_FORMATS
+
+parser = argparse.ArgumentParser(description="Export du catalogue des places")
+parser.add_argument("--format", choices=EXPORT_FORMATS, default="ndjson")
+parser.add_argument("--output", help="Fichier de sortie (défaut : sortie standard)")
+parser.add_argument("--batch-size", type=int, default=1000)
+args = parser.parse_args()
+
+app = create_app()
+
+with app.app_context():
+    out = open(args.output, "w", encoding="utf-8", newline="") if args.output else sys.stdout
+    start = time.perf_counter()
+    rows = 0
+    try:
+        for line in PlaceFacade.export_places(args.format, batch_size=args.batch_size):
+            out.write(line)
+            rows += 1
+    finally:
+        if args.output:
+            out.close()
+
+    elapsed = time.perf_counter() - start
+    if args.format == "csv":
+        rows -= 1  # en-tête
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"✅ {rows} places exportées en {elapsed:.1f} s "
+          f"({rows / elapsed if elapsed else 0:.0f} lignes/s, pic mémoire {peak_mb:.0f} Mo)",
+          file=sys.stderr)
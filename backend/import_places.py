@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+Script pour importer des places en masse (NDJSON ou CSV, mêmes colonnes
+que export_places.py) pour un propriétaire
+
+Usage : python import_places.py --owner-id 3 places.ndjson [--format csv]
+"""
+
+import argparse
+import sys
+import time
+
+from app import create_app
+from app.facades.place_facade import PlaceFacade, EXPORT_FORMATS, IMPORT_CHUNK_SIZE
+
+parser = argparse.ArgumentParser(description="Import en masse de places")
+parser.add_argument("input", help="Fichier à importer ('-' pour l'entrée standard)")
+parser.add_argument("--owner-id", type=int, required=True)
+parser.add_argument("--format", choices=EXPORT_FORMATS, default="ndjson")
+parser.add_argument("--chunk-size", type=int, default=IMPORT_CHUNK_SIZE)
+args = parser.parse_args()
+
+app = create_app()
+
+with app.app_context():
+    source = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8", newline="")
+    start = time.perf_counter()
+    try:
+        result = PlaceFacade.bulk_import(
+            PlaceFacade.iter_import_rows(source, args.format), args.owner_id, chunk_size=args.chunk_size
+        )
+    finally:
+        if source is not sys.stdin:
+            source.close()
+    elapsed = time.perf_counter() - start
+
+    for error in result["errors"]:
+        print(f"ligne {error['line']}: {error['error']}", file=sys.stderr)
+    print(f"✅ {result['created']} places importées en {elapsed:.1f} s, "
+          f"{len(result['errors'])} lignes rejetées")
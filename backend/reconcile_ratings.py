@@ -0,0 +1,14 @@
+#!/usr/bin/env python3
+"""
+Script pour recalculer les agrégats de notes des places (somme, nombre,
+moyenne, histogramme) depuis la table des avis
+"""
+
+from app import create_app
+from app.facades.place_facade import PlaceFacade
+
+app = create_app()
+
+with app.app_context():
+    fixed = PlaceFacade.reconcile_ratings()
+    print(f"✅ Agrégats recalculés, {fixed} places corrigées !")
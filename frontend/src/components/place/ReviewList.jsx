@@ -6,7 +6,7 @@ import {
   useImperativeHandle,
   useCallback,
 } from "react";
-import API from "../../services/api";
+import API, { getAllPages } from "../../services/api";
 import ReviewCard from "./ReviewCard";
 
 const ReviewList = forwardRef(({ place_Id }, ref) => {
@@ -17,8 +17,8 @@ const ReviewList = forwardRef(({ place_Id }, ref) => {
   // 🔹 fetchReviews mémorisé
   const fetchReviews = useCallback(async () => {
     try {
-      const res = await API.get(`/places/${place_Id}/reviews`);
-      setReviews(res.data);
+      // Avis paginés (X-Next-Cursor) : on suit toutes les pages
+      setReviews(await getAllPages(`/places/${place_Id}/reviews`));
     } catch (err) {
       console.error("Erreur fetch reviews:", err);
       setError("Erreur chargement avis.");
@@ -1,6 +1,6 @@
 // src/pages/HomePage.jsx
 import { useEffect, useState } from "react";
-import api from "../services/api";
+import api, { getAllPages } from "../services/api";
 import PlaceCard from "../components/place/PlaceCard";
 
 export default function HomePage() {
@@ -9,11 +9,11 @@ export default function HomePage() {
   const [error, setError] = useState("");
 
   useEffect(() => {
-    api
-      .get("/places/")
-      .then((res) => {
-        console.log("Places récupérées:", res.data);
-        setPlaces(res.data);
+    // La liste est paginée (X-Next-Cursor) : on suit toutes les pages
+    getAllPages("/places/")
+      .then((data) => {
+        console.log("Places récupérées:", data);
+        setPlaces(data);
         setLoading(false);
       })
       .catch((err) => {
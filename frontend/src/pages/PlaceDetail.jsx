@@ -6,22 +6,42 @@ import ReviewList from "../components/place/ReviewList";
 import ReservationForm from "../components/place/ReservationForm";
 import { getCurrentUser } from "../utils/auth"; // 🔑 récupère l'utilisateur connecté (selon ton utilitaire auth.js)
 
+const AVAILABILITY_DAYS = 90;
+
+// Regroupe les jours réservés du calendrier ("0110...") en périodes [début, fin]
+function blockedRanges(from, bitmap) {
+  const ranges = [];
+  const day = (i) => new Date(new Date(from).getTime() + i * 86400000);
+  let start = null;
+  for (let i = 0; i <= bitmap.length; i++) {
+    if (bitmap[i] === "1" && start === null) start = i;
+    if (bitmap[i] !== "1" && start !== null) {
+      ranges.push([day(start), day(i - 1)]);
+      start = null;
+    }
+  }
+  return ranges;
+}
+
 export default function PlaceDetail() {
   const { id } = useParams();
   const navigate = useNavigate();
   const [place, setPlace] = useState(null);
   const [amenities, setAmenities] = useState([]);
   const [images, setImages] = useState([]);
-  const [reservations, setReservations] = useState([]);
+  const [blocked, setBlocked] = useState([]);
   const [currentUser, setCurrentUser] = useState(null); // 👤 user connecté
   const reviewListRef = useRef(null);
 
   const loadReservations = useCallback(() => {
-    API.get(`/reservations/place/${id}`)
-      .then((res) => setReservations(res.data || []))
+    // Calendrier compact des prochains jours au lieu de toutes les réservations
+    const from = new Date().toISOString().slice(0, 10);
+    const to = new Date(Date.now() + AVAILABILITY_DAYS * 86400000).toISOString().slice(0, 10);
+    API.get(`/places/${id}/availability`, { params: { from, to } })
+      .then((res) => setBlocked(blockedRanges(res.data.from, res.data.bitmap || "")))
       .catch((err) => {
-        console.error("Erreur chargement réservations:", err);
-        setReservations([]);
+        console.error("Erreur chargement disponibilités:", err);
+        setBlocked([]);
       });
   }, [id]);
 
@@ -96,11 +116,11 @@ export default function PlaceDetail() {
       )}
 
       {/* Réservations */}
-      <h3>Réservations :</h3>
-      {reservations.length > 0 ? (
-        reservations.map((r) => (
-          <p key={r.id}>
-            {new Date(r.start_datetime).toLocaleString()} → {new Date(r.end_datetime).toLocaleString()}
+      <h3>Dates réservées ({AVAILABILITY_DAYS} prochains jours) :</h3>
+      {blocked.length > 0 ? (
+        blocked.map(([start, end]) => (
+          <p key={start.getTime()}>
+            {start.toLocaleDateString()} → {end.toLocaleDateString()}
           </p>
         ))
       ) : (
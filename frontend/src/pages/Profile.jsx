@@ -1,7 +1,7 @@
 import { useEffect, useState } from "react";
 import { useNavigate } from "react-router-dom";
 import { getCurrentUser } from "../utils/auth";
-import API, { uploadAvatar } from "../services/api";
+import { getAllPages, uploadAvatar } from "../services/api";
 import StarRating from "../components/common/StarRating";
 
 export default function Profile() {
@@ -34,12 +34,13 @@ export default function Profile() {
     setUser({ ...currentUser, id: userId }); // ✅ force la présence de `id`
 
     // Charge les données
-    API.get(`/reservations/user/${userId}`)
-      .then(res => setReservations(res.data))
+    // Listes paginées (X-Next-Cursor) : on suit toutes les pages
+    getAllPages(`/reservations/user/${userId}`)
+      .then(data => setReservations(data))
       .catch(err => console.error("Erreur réservations :", err));
 
-    API.get(`/reviews/user/${userId}`)
-      .then(res => setReviews(res.data))
+    getAllPages(`/reviews/user/${userId}`)
+      .then(data => setReviews(data))
       .catch(err => console.error("Erreur avis :", err))
       .finally(() => setLoading(false));
   }, [navigate]);
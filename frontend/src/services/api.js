@@ -41,4 +41,24 @@ export const uploadAvatar = async (userId, file) => {
   return res.data;
 };
 
+/**
+ * Récupère toutes les pages d'une liste paginée par curseur : l'API renvoie
+ * le curseur de la page suivante dans l'en-tête X-Next-Cursor
+ * @param {string} url - Liste à parcourir (ex. '/places/')
+ * @param {Object} params - Paramètres de requête supplémentaires
+ * @returns {Promise<Array>} - Tous les éléments, dans l'ordre des pages
+ */
+export const getAllPages = async (url, params = {}) => {
+  const items = [];
+  let after = null;
+  do {
+    const res = await API.get(url, {
+      params: { ...params, limit: 200, ...(after ? { after } : {}) },
+    });
+    items.push(...res.data);
+    after = res.headers['x-next-cursor'];
+  } while (after);
+  return items;
+};
+
 export default API;